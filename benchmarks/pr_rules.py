@@ -0,0 +1,77 @@
+"""Benchmark classifying pull requests with large release note bodies.
+
+Run with `script/benchmark`.
+"""
+
+import random
+import re
+import timeit
+
+from repo_conformance.pr_rules import RuleEngine
+
+PRS = 500
+RELEASE_NOTES_SIZE = 40_000
+
+
+def legacy_is_major(title: str, body: str) -> bool:
+    """The uncompiled, full body scan the rule engine replaced."""
+    text = f"{title}\n{body}"
+    if re.search(r"\bmajor\b", title, re.IGNORECASE):
+        return True
+    match = re.search(
+        r"(?:from|bump[s]?\s+\S+\s+from)\s+v?(\d+)\.\S+\s+to\s+v?(\d+)\.\S+",
+        text,
+        re.IGNORECASE,
+    )
+    if match:
+        return match.group(1) != match.group(2)
+    return bool(re.search(r"\bto\s+v?(\d+)(?!\.\d+)\b", title, re.IGNORECASE))
+
+
+def legacy_is_security(title: str, body: str) -> bool:
+    """The full body lowercase scan the rule engine replaced."""
+    text = f"{title}\n{body}".lower()
+    return any(kw in text for kw in ["security", "cve-", "vulnerability", "advisory"])
+
+
+def corpus(rng: random.Random) -> list[tuple[str, str]]:
+    """Return synthetic Renovate PRs with large release notes."""
+    words = ["fix", "add", "update", "bump", "release", "docs", "refactor", "test"]
+    result = []
+    for i in range(PRS):
+        old = f"{rng.randint(0, 9)}.{rng.randint(0, 20)}.{rng.randint(0, 9)}"
+        new = f"{rng.randint(0, 9)}.{rng.randint(0, 20)}.{rng.randint(0, 9)}"
+        notes = " ".join(rng.choice(words) for _ in range(RELEASE_NOTES_SIZE // 6))
+        body = (
+            "This PR contains the following updates:\n\n"
+            "| Package | Change | Age | Confidence |\n"
+            "|---|---|---|---|\n"
+            f"| [pkg{i}](https://example.com) | `{old}` -> `{new}` | | |\n\n"
+            f"---\n\n### Release Notes\n\n{notes}\n"
+        )
+        result.append((f"Update dependency pkg{i} to v{new}", body))
+    return result
+
+
+def main() -> None:
+    prs = corpus(random.Random(0))
+    rules = RuleEngine()
+
+    def legacy() -> None:
+        for title, body in prs:
+            legacy_is_major(title, body)
+            legacy_is_security(title, body)
+
+    def engine() -> None:
+        for title, body in prs:
+            rules.is_major(title, body)
+            rules.is_security(title, body)
+
+    print(f"Classifying {PRS} PRs with ~{RELEASE_NOTES_SIZE // 1000}KB bodies")
+    for name, fn in [("legacy", legacy), ("rule engine", engine)]:
+        best = min(timeit.repeat(fn, number=1, repeat=5))
+        print(f"  {name:<12} {best * 1000:8.1f}ms ({best / PRS * 1e6:.1f}us/PR)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark the makespan of a fleet check with a few slow repos.
+
+Repos are checked by sleeping for their duration, so the result is the wall
+clock of the run with the check worker pool. Run with `script/benchmark`.
+"""
+
+import random
+import tempfile
+import time
+
+from repo_conformance.check import MAX_WORKERS, CheckAction, longest_first
+from repo_conformance.exceptions import Failure
+from repo_conformance.history_store import HistoryStore
+from repo_conformance.manifest import Repo
+from repo_conformance.registry import CheckRun
+
+REPOS = 60
+SLOW_REPOS = 4
+FAST_SECONDS = (0.02, 0.08)
+SLOW_SECONDS = 0.6
+JITTER = 0.2
+
+
+def workload(rng: random.Random) -> dict[str, float]:
+    """Return the duration of each repo, with the slow repos last."""
+    durations = {f"repo{i}": rng.uniform(*FAST_SECONDS) for i in range(REPOS)}
+    for i in range(REPOS - SLOW_REPOS, REPOS):
+        durations[f"repo{i}"] = SLOW_SECONDS
+    return durations
+
+
+def record_history(
+    store: HistoryStore, durations: dict[str, float], rng: random.Random
+) -> None:
+    """Record a few previous runs with durations that vary between runs."""
+    for _ in range(3):
+        run_id = store.start_run("check", {})
+        for repo, duration in durations.items():
+            run = CheckRun(repo, "worktree", time.time())
+            run.duration = duration * rng.uniform(1 - JITTER, 1 + JITTER)
+            store.record(run_id, run)
+        store.finish_run(run_id)
+
+
+def makespan(repos: list[Repo], durations: dict[str, float]) -> float:
+    """Return the wall clock seconds to check the repos in the given order."""
+
+    def check_repo(target: Repo) -> list[Failure]:
+        time.sleep(durations[target.name])
+        return []
+
+    start = time.monotonic()
+    CheckAction()._run_all(repos, check_repo, None)
+    return time.monotonic() - start
+
+
+def main() -> None:
+    rng = random.Random(0)
+    durations = workload(rng)
+    repos = [Repo(name=name) for name in durations]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = HistoryStore(f"{tmpdir}/history.sqlite3")
+        record_history(store, durations, rng)
+        start = time.monotonic()
+        estimates = store.durations()
+        query = time.monotonic() - start
+        store.close()
+
+    lower_bound = max(max(durations.values()), sum(durations.values()) / MAX_WORKERS)
+    print(
+        f"Checking {REPOS} repos ({SLOW_REPOS} slow) with {MAX_WORKERS} workers,"
+        f" lower bound {lower_bound:.2f}s"
+    )
+    print(f"  duration query {query * 1000:8.1f}ms")
+    for name, order in [
+        ("manifest", repos),
+        ("longest first", longest_first(repos, estimates)),
+    ]:
+        print(f"  {name:<14} {makespan(order, durations):8.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Library for failing fast when a remote destination is unavailable.
+
+Each destination host has a circuit breaker. After a number of consecutive
+failures the circuit opens and further calls fail immediately with a
+CircuitOpenError instead of each waiting for its own timeout. After a reset
+timeout a single probe call is allowed through (half-open) and its outcome
+decides whether the circuit closes again.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+
+from .exceptions import CircuitOpenError, DeadlineExceeded, Failure
+
+_LOGGER = logging.getLogger(__name__)
+
+FAILURE_THRESHOLD = 3
+RESET_TIMEOUT = 30.0
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+CIRCUIT_OPEN = "(circuit open)"
+
+
+def _default_is_failure(err: BaseException) -> bool:
+    return True
+
+
+class CircuitBreaker:
+    """Circuit breaker for calls to a single destination."""
+
+    def __init__(
+        self,
+        destination: str,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        reset_timeout: float = RESET_TIMEOUT,
+    ) -> None:
+        """Initialize CircuitBreaker."""
+        self.destination = destination
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.tripped = False
+        """True if the circuit has opened at any point."""
+        self.short_circuited = 0
+        """Number of calls rejected while the circuit was open."""
+
+    @property
+    def state(self) -> str:
+        """Return the current state of the circuit."""
+        return self._state
+
+    @property
+    def message(self) -> str:
+        """Error detail for calls rejected while the circuit is open."""
+        return f"{self.destination} is unavailable {CIRCUIT_OPEN}"
+
+    def _before_call(self) -> None:
+        with self._lock:
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self._reset_timeout:
+                    self.short_circuited += 1
+                    raise CircuitOpenError(self.message)
+                _LOGGER.debug("Probing %s after reset timeout", self.destination)
+                self._state = HALF_OPEN
+                self._probing = True
+            elif self._state == HALF_OPEN:
+                if self._probing:
+                    self.short_circuited += 1
+                    raise CircuitOpenError(self.message)
+                self._probing = True
+
+    def _record(self, failed: bool | None) -> None:
+        with self._lock:
+            self._probing = False
+            if failed is None:
+                return
+            if not failed:
+                self._state = CLOSED
+                self._failures = 0
+                return
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self._failure_threshold:
+                if self._state != OPEN:
+                    _LOGGER.warning(
+                        "Circuit for %s opened after %d consecutive failures",
+                        self.destination,
+                        self._failures,
+                    )
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self.tripped = True
+
+    @contextmanager
+    def guard(
+        self, is_failure: Callable[[BaseException], bool] = _default_is_failure
+    ) -> Generator[None]:
+        """Run the enclosed call through the circuit breaker.
+
+        The `is_failure` function decides whether an error raised by the
+        call indicates the destination is unhealthy (e.g. a timeout) rather
+        than a problem with the request itself (e.g. a 404).
+        """
+        self._before_call()
+        try:
+            yield
+        except (CircuitOpenError, DeadlineExceeded):
+            # Says nothing about the health of the destination
+            self._record(None)
+            raise
+        except BaseException as err:
+            self._record(is_failure(err))
+            raise
+        self._record(False)
+
+
+_BREAKERS: dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+_failure_threshold = FAILURE_THRESHOLD
+_reset_timeout = RESET_TIMEOUT
+
+
+def configure(failure_threshold: int, reset_timeout: float) -> None:
+    """Configure and reset the circuit breakers for a new run."""
+    global _failure_threshold, _reset_timeout
+    with _BREAKERS_LOCK:
+        _failure_threshold = failure_threshold
+        _reset_timeout = reset_timeout
+        _BREAKERS.clear()
+
+
+def breaker(destination: str) -> CircuitBreaker:
+    """Return the circuit breaker for a destination host."""
+    with _BREAKERS_LOCK:
+        if (result := _BREAKERS.get(destination)) is None:
+            result = _BREAKERS[destination] = CircuitBreaker(
+                destination,
+                failure_threshold=_failure_threshold,
+                reset_timeout=_reset_timeout,
+            )
+        return result
+
+
+def is_circuit_open(failure: Failure) -> bool:
+    """Return True if the failure was a call skipped by an open circuit."""
+    return CIRCUIT_OPEN in failure.detail
+
+
+def tripped() -> list[CircuitBreaker]:
+    """Return the circuit breakers that opened during the run."""
+    with _BREAKERS_LOCK:
+        return [result for result in _BREAKERS.values() if result.tripped]
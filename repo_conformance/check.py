@@ -1,36 +1,173 @@
 """Action to check repositories for conformance."""
 
+import collections
 import concurrent.futures
+import functools
 import logging
 import pathlib
 import re
 import sys
-from argparse import ArgumentParser
+import threading
+import time
+from argparse import ArgumentParser, BooleanOptionalAction
 from argparse import _SubParsersAction as SubParsersAction
+from collections.abc import Callable
 from typing import cast
 
-from .checks.registries import REPO_CHECKS
+from . import breaker, tracing
+from . import hedge as hedging
+from .breaker import CircuitBreaker, is_circuit_open
+from .checks.registries import REPO_CHECKS, WORKTREE_CHECKS
+from .cost import Cost
+from .deadline import Deadline, is_timeout, scope
 from .exceptions import Failure
+from .failure_groups import group_failures
+from .history_store import HistoryStore
+from .journal import Journal, JournalEntry
 from .manifest import Repo, parse_manifest
+from .registry import CheckInfo, record_checks
+from .watch import WorktreeWatcher
+from .worktree_cache import WorktreeCache, worktree_fingerprint
 
 _LOGGER = logging.getLogger(__name__)
 
 MAX_WORKERS = 10
 
+DEADLINE_GRACE = 1.0
+"""Seconds to wait for running checks to report a timeout after the deadline."""
+
 
 def print_errors(errors: list[Failure]) -> None:
-    """Print conformance test failures."""
-    for error in errors:
-        indent = 0
-        buf = ""
-        for name in error.names:
-            if indent:
-                buf += "\n"
-            buf += " " * indent
-            buf += f"{name}:"
+    """Print conformance test failures, once for each distinct problem."""
+    for group in group_failures(errors):
+        if len(group.repos) > 1:
+            lines = [f"{len(group.repos)} repos: {', '.join(group.repos)}"]
+        else:
+            lines = [f"{group.repos[0]}:" if group.repos[0] else ""]
+        indent = 2
+        for name in group.path:
+            lines.append(" " * indent + f"{name}:")
             indent += 2
-        print(f"{buf} {error.detail}")
+        if len(lines) == 1 and len(group.repos) > 1:
+            lines.append(f"  {group.detail}")
+        else:
+            lines[-1] += f" {group.detail}"
+        print("\n".join(lines))
+        print()
+
+
+def print_checks(checks: list[CheckInfo], indent: int = 0) -> None:
+    """Print the registered conformance tests and their costs."""
+    for info in checks:
+        name = " " * indent + info.name
+        default = "default" if info.default else "optional"
+        print(
+            f"{name:<24} {info.cost:<16} {default:<10} network calls: {info.network_calls}"
+        )
+        print_checks(info.children, indent + 2)
+
+
+def print_degraded(
+    breakers: list[CircuitBreaker], errors: list[Failure]
+) -> list[Failure]:
+    """Print a summary for each unavailable destination.
+
+    Failures from calls skipped by an open circuit are folded into the
+    summary and the remaining failures are returned.
+    """
+    for circuit in breakers:
+        skipped = {fail.names[0] for fail in errors if circuit.message in fail.detail}
+        errors = [fail for fail in errors if circuit.message not in fail.detail]
+        print(
+            f"Run degraded: {circuit.destination} is unavailable "
+            f"({circuit.short_circuited} calls skipped)"
+        )
+        if skipped:
+            print(f"  unchecked repos: {', '.join(sorted(skipped))}")
         print()
+    return errors
+
+
+def select_failed(
+    target_repos: list[Repo],
+    failed: dict[str, list[tuple[str, ...]]],
+    checks: bool = False,
+) -> dict[str, list[str] | None]:
+    """Return the names of the repos with checks that failed in their last run.
+
+    The `failed` paths of each repo are as returned by
+    `HistoryStore.failed_checks`. With `checks`, each repo is mapped to the
+    checks that failed, otherwise to None to run all of its checks.
+    """
+    selected: dict[str, list[str] | None] = {}
+    for target in target_repos:
+        if not (paths := failed.get(target.name)):
+            continue
+        names = REPO_CHECKS.rerun_checks(paths) if checks else None
+        selected[target.name] = sorted(names) if names is not None else None
+    return selected
+
+
+def longest_first(
+    target_repos: list[Repo],
+    durations: dict[tuple[str, str], float],
+    only: dict[str, list[str] | None] | None = None,
+) -> list[Repo]:
+    """Return the repos ordered by expected duration, longest first.
+
+    Starting the slowest repos first keeps one slow repo from running alone
+    at the end of the run while the other workers are idle. A repo is
+    expected to take the sum of the recorded durations of the checks it
+    runs now. A check without a recorded duration for the repo is expected
+    to take its average across repos. Repos with the same expected duration
+    keep their manifest order.
+    """
+    if not durations:
+        return target_repos
+    totals: dict[str, list[float]] = {}
+    for (_, check), duration in durations.items():
+        totals.setdefault(check, []).append(duration)
+    averages = {check: sum(values) / len(values) for check, values in totals.items()}
+    only = only or {}
+
+    def expected(target: Repo) -> float:
+        return sum(
+            durations.get((target.name, check), averages.get(check, 0.0))
+            for check in REPO_CHECKS.enabled_checks(target, only.get(target.name))
+        )
+
+    return sorted(target_repos, key=lambda target: -expected(target))
+
+
+def _start_workers(
+    target_repos: list[Repo], check_repo: Callable[[Repo], list[Failure]]
+) -> dict[concurrent.futures.Future[list[Failure]], Repo]:
+    """Check repos on a pool of daemon threads.
+
+    Unlike the threads of a ThreadPoolExecutor, these are not joined at
+    interpreter exit, so checks abandoned at the run deadline do not delay it.
+    """
+    future_to_repo = {
+        concurrent.futures.Future[list[Failure]](): target for target in target_repos
+    }
+    queue = collections.deque(future_to_repo.items())
+
+    def work() -> None:
+        while True:
+            try:
+                future, target = queue.popleft()
+            except IndexError:
+                return
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(check_repo(target))
+            except BaseException as err:  # noqa: BLE001
+                future.set_exception(err)
+
+    for i in range(min(MAX_WORKERS, len(queue))):
+        threading.Thread(target=work, name=f"check-{i}", daemon=True).start()
+    return future_to_repo
 
 
 class CheckAction:
@@ -71,23 +208,141 @@ class CheckAction:
             type=pathlib.Path,
             required=False,
         )
+        args.add_argument(
+            "--cache",
+            help="Replay cached results when a local --worktree is unchanged",
+            default=True,
+            action=BooleanOptionalAction,
+        )
+        args.add_argument(
+            "--watch",
+            help="Keep running and rerun checks when files in the --worktree change",
+            default=False,
+            action=BooleanOptionalAction,
+        )
+        args.add_argument(
+            "--max-cost",
+            help="Skip conformance tests more expensive than this cost class",
+            type=Cost,
+            choices=list(Cost),
+            required=False,
+        )
+        args.add_argument(
+            "--list-checks",
+            help="List the conformance tests with their cost and exit",
+            default=False,
+            action=BooleanOptionalAction,
+        )
+        args.add_argument(
+            "--trace",
+            help="Write a timeline of the run in Chrome trace event format",
+            type=pathlib.Path,
+            required=False,
+        )
+        args.add_argument(
+            "--history",
+            help="Record the results of the run for `repo history`",
+            default=True,
+            action=BooleanOptionalAction,
+        )
+        args.add_argument(
+            "--rerun-failed",
+            help="Check only the repos that failed in the previous run",
+            default=False,
+            action=BooleanOptionalAction,
+        )
+        args.add_argument(
+            "--rerun-failed-checks",
+            help="Run only the checks that failed in the previous run",
+            default=False,
+            action=BooleanOptionalAction,
+        )
+        args.add_argument(
+            "--resume",
+            help="Skip repos finished by the previous interrupted run",
+            default=False,
+            action=BooleanOptionalAction,
+        )
+        args.add_argument(
+            "--deadline",
+            help="Maximum seconds for the whole run; unfinished checks fail",
+            type=float,
+            required=False,
+        )
+        args.add_argument(
+            "--breaker-threshold",
+            help="Consecutive failures before calls to a destination fail fast",
+            type=int,
+            default=breaker.FAILURE_THRESHOLD,
+        )
+        args.add_argument(
+            "--breaker-reset",
+            help="Seconds before probing an unavailable destination again",
+            type=float,
+            default=breaker.RESET_TIMEOUT,
+        )
+        args.add_argument(
+            "--hedge",
+            help="Issue a duplicate of remote fetches slower than usual",
+            default=False,
+            action=BooleanOptionalAction,
+        )
+        args.add_argument(
+            "--hedge-percentile",
+            help="Latency percentile after which a remote fetch is hedged",
+            type=float,
+            default=hedging.PERCENTILE,
+        )
+        args.add_argument(
+            "--hedge-max-extra",
+            help="Maximum number of duplicate remote fetches in a run",
+            type=int,
+            default=hedging.MAX_EXTRA,
+        )
         args.set_defaults(cls=CheckAction)
         return args
 
     def run(  # type: ignore[no-untyped-def]
+        self,
+        trace: pathlib.Path | None = None,
+        **kwargs,
+    ) -> None:
+        """Action implementation, optionally recording a trace of the run."""
+        with tracing.trace_to(trace):
+            self._run(**kwargs)
+
+    def _run(  # type: ignore[no-untyped-def]
         self,
         repo: str | None,
         exclude: list[str] | None = None,
         include: list[str] | None = None,
         worktree: pathlib.Path | None = None,
+        cache: bool = True,
+        watch: bool = False,
+        max_cost: Cost | None = None,
+        list_checks: bool = False,
+        deadline: float | None = None,
+        breaker_threshold: int = breaker.FAILURE_THRESHOLD,
+        breaker_reset: float = breaker.RESET_TIMEOUT,
+        hedge: bool = False,
+        hedge_percentile: float = hedging.PERCENTILE,
+        hedge_max_extra: int = hedging.MAX_EXTRA,
+        resume: bool = False,
+        rerun_failed: bool = False,
+        rerun_failed_checks: bool = False,
+        history: bool = True,
         **kwargs,  # pylint: disable=unused-argument
     ) -> None:
         """Async Action implementation."""
         if worktree and not repo:
             raise ValueError("Cannot specify --worktree without a single repo argument")
+        if watch and not worktree:
+            raise ValueError("Cannot specify --watch without a --worktree")
         if exclude:
             _LOGGER.debug("Excluding checks: %s", exclude)
         manifest = parse_manifest()
+        breaker.configure(breaker_threshold, breaker_reset)
+        hedging.configure(hedge, hedge_percentile, hedge_max_extra)
 
         target_repos: list[Repo] = []
         for r in manifest.repos:
@@ -103,21 +358,196 @@ class CheckAction:
                 )
                 - set(include or ())
             )
+            r.checks.max_cost = (
+                max_cost or r.checks.max_cost or manifest.checks.max_cost
+            )
+            r.checks.timeouts = {**manifest.checks.timeouts, **r.checks.timeouts}
             if worktree:
                 r.worktree = str(worktree)
             target_repos.append(r)
 
+        if list_checks:
+            print_checks(
+                REPO_CHECKS.describe(
+                    target_repos[0]
+                    if repo and target_repos
+                    else Repo(name="", worktree=str(worktree) if worktree else None)
+                )
+            )
+            return
+
+        run_deadline = (
+            Deadline.after(deadline, f"run deadline of {deadline}s")
+            if deadline is not None
+            else None
+        )
+
+        # The checks each repo is limited to when rerunning failed checks
+        only: dict[str, list[str] | None] = {}
+
         def _check_repo(target: Repo) -> list[Failure]:
-            return [
-                fail.of(target.name) for fail in REPO_CHECKS.run_checks(target, None)
-            ]
+            with scope(run_deadline), tracing.span(target.name, "repo"):
+                return [
+                    fail.of(target.name)
+                    for fail in REPO_CHECKS.run_checks(
+                        target, None, only=only.get(target.name)
+                    )
+                ]
+
+        if watch and target_repos:
+            self._watch(target_repos[0], cast(pathlib.Path, worktree))
+            return
 
+        if worktree and cache and len(target_repos) == 1:
+            errors = self._run_cached(target_repos[0], worktree, _check_repo)
+            if errors:
+                print_errors(errors)
+                sys.exit(1)
+            return
+
+        if rerun_failed or rerun_failed_checks:
+            previous = HistoryStore()
+            only = select_failed(
+                target_repos, previous.failed_checks(), checks=rerun_failed_checks
+            )
+            previous.close()
+            target_repos = [target for target in target_repos if target.name in only]
+            if not target_repos:
+                print("No failures from the previous run to check again.")
+                return
+
+        run_args = {
+            "repo": repo,
+            "exclude": sorted(exclude or ()),
+            "include": sorted(include or ()),
+            "max_cost": max_cost,
+            "worktree": str(worktree) if worktree else None,
+            "rerun_failed": rerun_failed or rerun_failed_checks,
+        }
+        journal = Journal("check", run_args, resume=resume)
+        # Local worktree results are not recorded as the state of the repo
+        store = HistoryStore() if history and not worktree else None
+        run_id = store.start_run("check", run_args) if store else 0
+        remaining: list[Repo] = []
         errors: list[Failure] = []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            future_to_repo = {executor.submit(_check_repo, r): r for r in target_repos}
-            for future in concurrent.futures.as_completed(future_to_repo):
-                errors.extend(future.result())
+        for target in target_repos:
+            if (entry := journal.get(target.name)) is not None:
+                errors.extend(entry.failures)
+            else:
+                remaining.append(target)
+        if len(remaining) < len(target_repos):
+            print(
+                f"Resuming: {len(target_repos) - len(remaining)} repos already checked",
+                file=sys.stderr,
+            )
+
+        def _check_and_record(target: Repo) -> list[Failure]:
+            with record_checks(
+                functools.partial(store.record, run_id) if store else None
+            ):
+                errors = _check_repo(target)
+            # Unfinished repos are checked again when resuming
+            if not any(is_timeout(fail) or is_circuit_open(fail) for fail in errors):
+                journal.record(
+                    target.name,
+                    JournalEntry(
+                        outcome="failed" if errors else "passed", failures=errors
+                    ),
+                )
+            return errors
+
+        network_calls = sum(
+            REPO_CHECKS.estimate_network_calls(r, only.get(r.name)) for r in remaining
+        )
+        print(
+            f"Checking {len(remaining)} repos (estimated network calls: {network_calls})",
+            file=sys.stderr,
+        )
 
+        if store:
+            remaining = longest_first(remaining, store.durations(), only)
+        errors.extend(self._run_all(remaining, _check_and_record, run_deadline))
+        if all(journal.get(target.name) for target in target_repos):
+            journal.complete()
+        if store:
+            store.finish_run(run_id)
+            store.close()
+        if degraded := breaker.tripped():
+            errors = print_degraded(degraded, errors)
+            print_errors(errors)
+            sys.exit(1)
         if errors:
             print_errors(errors)
             sys.exit(1)
+
+    def _run_all(
+        self,
+        target_repos: list[Repo],
+        check_repo: Callable[[Repo], list[Failure]],
+        run_deadline: Deadline | None,
+    ) -> list[Failure]:
+        """Check repos concurrently, abandoning any still running at the deadline."""
+        errors: list[Failure] = []
+        future_to_repo = _start_workers(target_repos, check_repo)
+        pending = set(future_to_repo)
+        timeout = None
+        if run_deadline is not None:
+            timeout = max(run_deadline.remaining(), 0) + DEADLINE_GRACE
+        try:
+            for future in concurrent.futures.as_completed(pending, timeout=timeout):
+                pending.discard(future)
+                errors.extend(future.result())
+        except TimeoutError:
+            assert run_deadline is not None
+            _LOGGER.debug("Abandoning %d repos at the run deadline", len(pending))
+            for future in pending:
+                errors.extend(
+                    fail.of(future_to_repo[future].name)
+                    for fail in run_deadline.error().errors
+                )
+        finally:
+            # Checks already running observe the deadline through their
+            # network timeouts, and their daemon threads do not block exit
+            for future in pending:
+                future.cancel()
+        return errors
+
+    def _watch(self, target: Repo, worktree: pathlib.Path) -> None:
+        """Rerun worktree checks as files change until interrupted."""
+
+        def report(ran: list[str]) -> None:
+            if not ran:
+                return
+            print(f"[{time.strftime('%H:%M:%S')}] Ran {', '.join(ran)}")
+            if errors := watcher.failures:
+                print_errors(errors)
+            else:
+                print("All checks passed.\n")
+
+        watcher = WorktreeWatcher(target, worktree)
+        try:
+            watcher.watch(report)
+        except KeyboardInterrupt:
+            pass
+
+    def _run_cached(
+        self,
+        target: Repo,
+        worktree: pathlib.Path,
+        check_repo: Callable[[Repo], list[Failure]],
+    ) -> list[Failure]:
+        """Run checks on a local worktree, replaying results if unchanged."""
+        checks = REPO_CHECKS.enabled_checks(target) + WORKTREE_CHECKS.enabled_checks(
+            target
+        )
+        key = worktree_fingerprint(worktree, checks)
+        if key is None:
+            return check_repo(target)
+        worktree_cache = WorktreeCache()
+        if (errors := worktree_cache.get(worktree, key)) is not None:
+            _LOGGER.debug("Worktree %s unchanged; replaying cached results", worktree)
+            return errors
+        errors = check_repo(target)
+        if not any(is_timeout(fail) for fail in errors):
+            worktree_cache.put(worktree, key, errors)
+        return errors
@@ -1,34 +1,59 @@
 """Conformance tests to for ensuring the repository is up to date."""
 
-import json
 import logging
 import os
 import pathlib
 import subprocess
 from functools import cache
+from typing import Any
 
+from repo_conformance import deadline, tracing
+from repo_conformance.breaker import breaker
+from repo_conformance.cost import Cost
 from repo_conformance.exceptions import CheckError
+from repo_conformance.hedge import hedger
 from repo_conformance.manifest import Repo
+from repo_conformance.registry import record_upstream
+from repo_conformance.singleflight import single_flight
 
 from .registries import WORKTREE_CHECKS
 
 _LOGGER = logging.getLogger(__name__)
 
 
+GIT_HOST = "github.com"
+
+
+def _is_network_failure(err: BaseException) -> bool:
+    """Return True if git failed to reach the host, not e.g. a missing repo."""
+    if isinstance(err, subprocess.CalledProcessError):
+        return "unable to access" in (err.stderr or "")
+    return isinstance(err, (subprocess.TimeoutExpired, OSError))
+
+
 @cache
+@single_flight
 def get_latest_commit(repo_full_name: str) -> str:
     """Get the latest commit hash for a given repository."""
-    url = f"https://github.com/{repo_full_name}.git"
+    url = f"https://{GIT_HOST}/{repo_full_name}.git"
     env = {**os.environ, "GIT_TERMINAL_PROMPT": "0"}
+
+    def ls_remote() -> subprocess.CompletedProcess[str]:
+        with (
+            breaker(GIT_HOST).guard(_is_network_failure),
+            tracing.span("git ls-remote", "subprocess", url=url),
+        ):
+            return subprocess.run(
+                ["git", "ls-remote", url, "refs/heads/main"],
+                check=True,
+                capture_output=True,
+                text=True,
+                timeout=deadline.timeout(5),
+                env=env,
+            )
+
     try:
-        res = subprocess.run(
-            ["git", "ls-remote", url, "refs/heads/main"],
-            check=True,
-            capture_output=True,
-            text=True,
-            timeout=5,
-            env=env,
-        )
+        res = hedger(GIT_HOST).call(ls_remote)
         if res.stdout:
             return res.stdout.split()[0]
         raise CheckError(f"No commit ref found for main branch of '{repo_full_name}'")
@@ -38,25 +63,35 @@ def get_latest_commit(repo_full_name: str) -> str:
         ) from err
 
 
-@WORKTREE_CHECKS.register(default=False)
-def cruft(repo: Repo, worktree: pathlib.Path) -> None:
-    """Verify the github repository configuration via the github API."""
-    cruft_file = worktree / ".cruft.json"
-    if not cruft_file.exists():
-        raise CheckError("Repo has no .cruft.json configuration file")
-
-    with cruft_file.open("r") as fd:
-        cruft_config = json.load(fd)
-
+@WORKTREE_CHECKS.fixture()
+def template_head(
+    repo: Repo, worktree: pathlib.Path, cruft_config: dict[str, Any]
+) -> str:
+    """Latest commit of the cruft template the worktree was rendered from."""
     template_url = cruft_config["template"].rstrip("/")
     repo_full_name = "/".join(template_url.split("/")[-2:])
-    commit = cruft_config["commit"]
     try:
-        latest_commit = get_latest_commit(repo_full_name)
+        return get_latest_commit(repo_full_name)
     except Exception as err:
         raise CheckError(
             f"Failed to retrieve latest commit for template '{repo_full_name}': {err}"
         ) from err
 
-    if commit != latest_commit:
-        raise CheckError(f"Repo is out of date, expected {latest_commit}, got {commit}")
+
+@WORKTREE_CHECKS.register(
+    default=False,
+    paths=[".cruft.json"],
+    cost=Cost.REMOTE_CONTENT,
+    network_calls=1,
+)
+def cruft(
+    repo: Repo,
+    worktree: pathlib.Path,
+    cruft_config: dict[str, Any],
+    template_head: str,
+) -> None:
+    """Verify the repository is up to date with its cruft template."""
+    commit = cruft_config["commit"]
+    record_upstream(template_head)
+    if commit != template_head:
+        raise CheckError(f"Repo is out of date, expected {template_head}, got {commit}")
@@ -1,30 +1,65 @@
 """Conformance tests to perform on the GitHub repository configuration."""
 
 import logging
+import math
 
 from github import Github, GithubException
+from github.Repository import Repository
 
+from repo_conformance import deadline, ratelimit, tracing
+from repo_conformance.breaker import breaker
+from repo_conformance.cost import Cost
 from repo_conformance.exceptions import CheckError
 from repo_conformance.manifest import Repo
+from repo_conformance.singleflight import single_flight
 
 from .registries import REPO_CHECKS
 
 _LOGGER = logging.getLogger(__name__)
 
 
-@REPO_CHECKS.register(default=False)
-def github(repo: Repo, context: None) -> None:
-    """Verify the github repository configuration via the github API."""
+API_HOST = "api.github.com"
+
+
+def _is_server_failure(err: BaseException) -> bool:
+    """Return True if the error indicates the API is unhealthy."""
+    if isinstance(err, GithubException):
+        return err.status >= 500
+    return isinstance(err, OSError)
+
+
+@single_flight
+def get_github_repo(full_id: str) -> Repository:
+    """Fetch repository metadata from the github API."""
+    limiter = ratelimit.bucket(authenticated=False)
+    limiter.acquire()
+    github = Github(timeout=math.ceil(deadline.timeout(15)))
+    with (
+        breaker(API_HOST).guard(_is_server_failure),
+        tracing.span("GET /repos", "http", repo=full_id),
+    ):
+        git_repo = github.get_repo(full_id)
+    remaining, limit = github.rate_limiting
+    limiter.observe(remaining, github.rate_limiting_resettime, limit)
+    return git_repo
+
 
-    github = Github()
+@REPO_CHECKS.fixture()
+def github_repo(repo: Repo, context: None) -> Repository:
+    """Repository metadata from the github API."""
     full_id = f"{repo.user}/{repo.name}"
     try:
-        git_repo = github.get_repo(full_id)
+        git_repo = get_github_repo(full_id)
     except GithubException as err:
         raise CheckError(f"Github repo does not exist: {full_id}: {err}") from err
     _LOGGER.debug("Repo details: %s", git_repo)
+    return git_repo
 
-    if git_repo.has_wiki:
+
+@REPO_CHECKS.register(default=False, cost=Cost.API, network_calls=1)
+def github(repo: Repo, context: None, github_repo: Repository) -> None:
+    """Verify the github repository configuration via the github API."""
+    if github_repo.has_wiki:
         raise CheckError("Repo has wiki enabled")
-    if git_repo.has_projects:
+    if github_repo.has_projects:
         raise CheckError("Repo has projects enabled")
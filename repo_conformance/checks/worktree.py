@@ -1,15 +1,23 @@
 """Checks to perform on the contents of github repository worktree."""
 
+import json
 import logging
 import pathlib
 import tempfile
 import urllib.error
+import urllib.parse
 import urllib.request
 from collections.abc import Generator
 from contextlib import contextmanager
+from typing import Any, cast
 
+from repo_conformance import deadline, tracing
+from repo_conformance.breaker import breaker
+from repo_conformance.cost import Cost
 from repo_conformance.exceptions import CheckError
+from repo_conformance.hedge import hedger
 from repo_conformance.manifest import Repo
+from repo_conformance.singleflight import single_flight
 
 from .registries import REPO_CHECKS, WORKTREE_CHECKS
 
@@ -22,13 +30,30 @@ RAW_CRUFT_URL_FORMAT = (
 )
 
 
+def _is_server_failure(err: BaseException) -> bool:
+    """Return True if the error indicates the host is unhealthy."""
+    if isinstance(err, urllib.error.HTTPError):
+        return err.code >= 500
+    return isinstance(err, (urllib.error.URLError, TimeoutError, OSError))
+
+
+@single_flight
 def fetch_remote_cruft_config(user: str, repo_name: str) -> bytes:
     """Fetch .cruft.json directly via raw HTTP to avoid full git fetch overhead."""
     url = RAW_CRUFT_URL_FORMAT.format(user=user, repo=repo_name)
+    host = urllib.parse.urlsplit(url).netloc
     req = urllib.request.Request(url, headers={"User-Agent": "repo-conformance"})
+
+    def fetch() -> bytes:
+        with (
+            breaker(host).guard(_is_server_failure),
+            tracing.span("GET", "http", url=url),
+            urllib.request.urlopen(req, timeout=deadline.timeout(5)) as response,
+        ):
+            return cast(bytes, response.read())
+
     try:
-        with urllib.request.urlopen(req, timeout=5) as response:
-            return response.read()
+        return hedger(host).call(fetch)
     except urllib.error.HTTPError as err:
         if err.code == 404:
             raise CheckError(
@@ -43,6 +68,19 @@ def fetch_remote_cruft_config(user: str, repo_name: str) -> bytes:
         ) from err
 
 
+@WORKTREE_CHECKS.fixture()
+def cruft_config(repo: Repo, worktree: pathlib.Path) -> dict[str, Any]:
+    """Parsed .cruft.json configuration of the worktree."""
+    cruft_file = worktree / ".cruft.json"
+    if not cruft_file.exists():
+        raise CheckError("Repo has no .cruft.json configuration file")
+    try:
+        with cruft_file.open("r") as fd:
+            return cast(dict[str, Any], json.load(fd))
+    except ValueError as err:
+        raise CheckError(f"Repo has an invalid .cruft.json file: {err}") from err
+
+
 @contextmanager
 def repo_worktree(repo: Repo) -> Generator[pathlib.Path]:
     """Open the repository locally."""
@@ -56,7 +94,11 @@ def repo_worktree(repo: Repo) -> Generator[pathlib.Path]:
         yield worktree_path
 
 
-@REPO_CHECKS.register()
+@REPO_CHECKS.register(
+    cost=lambda repo: Cost.LOCAL if repo.worktree else Cost.REMOTE_CONTENT,
+    network_calls=lambda repo: 0 if repo.worktree else 1,
+    nested=WORKTREE_CHECKS,
+)
 def worktree(repo: Repo, target: None) -> None:
     """Run conformance tests on the github worktree."""
 
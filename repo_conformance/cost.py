@@ -0,0 +1,24 @@
+"""Cost classes used to budget which conformance checks run."""
+
+from enum import StrEnum
+
+
+class Cost(StrEnum):
+    """How expensive a check is to run, from cheapest to most expensive."""
+
+    LOCAL = "local"
+    """Only reads local files."""
+
+    REMOTE_CONTENT = "remote-content"
+    """Fetches file contents or refs from a remote host."""
+
+    API = "api"
+    """Calls the rate limited GitHub API."""
+
+    CLONE = "clone"
+    """Clones or fetches an entire repository."""
+
+    @property
+    def rank(self) -> int:
+        """Return the relative expense of this cost class."""
+        return list(Cost).index(self)
@@ -0,0 +1,87 @@
+"""Library for propagating deadlines to blocking operations.
+
+A deadline is set for a block of code with `scope` and applies to everything
+run in the same thread (or asyncio task). Blocking operations use `timeout` to
+bound their own timeout by the remaining time, so a deadline for a check or
+a whole run is honored without the operation knowing who set it. Nested
+scopes can only shorten the current deadline.
+"""
+
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Self
+
+from .exceptions import DeadlineExceeded, Failure
+
+DEADLINE_EXCEEDED = "Deadline exceeded"
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """A point in time by which work must be complete."""
+
+    expires: float
+    """The time.monotonic() value when the deadline expires."""
+
+    description: str
+    """Human readable description of the deadline for error messages."""
+
+    @classmethod
+    def after(cls, seconds: float, description: str) -> Self:
+        """Create a deadline that expires after the given number of seconds."""
+        return cls(expires=time.monotonic() + seconds, description=description)
+
+    def remaining(self) -> float:
+        """Return the seconds remaining until the deadline."""
+        return self.expires - time.monotonic()
+
+    def error(self) -> DeadlineExceeded:
+        """Return the error reported when the deadline is exceeded."""
+        return DeadlineExceeded(f"{DEADLINE_EXCEEDED} ({self.description})")
+
+
+def is_timeout(failure: Failure) -> bool:
+    """Return True if the failure was caused by an exceeded deadline."""
+    return failure.detail.startswith(DEADLINE_EXCEEDED)
+
+
+_CURRENT: ContextVar[Deadline | None] = ContextVar("deadline", default=None)
+
+
+def current() -> Deadline | None:
+    """Return the deadline for the current context, if any."""
+    return _CURRENT.get()
+
+
+@contextmanager
+def scope(deadline: Deadline | None) -> Generator[None]:
+    """Apply the deadline to the enclosed block, unless one sooner is set."""
+    existing = _CURRENT.get()
+    if deadline is None or (existing and existing.expires <= deadline.expires):
+        yield
+        return
+    token = _CURRENT.set(deadline)
+    try:
+        yield
+    finally:
+        _CURRENT.reset(token)
+
+
+def expired() -> DeadlineExceeded | None:
+    """Return the error for the current deadline if it has passed."""
+    if (deadline := _CURRENT.get()) and deadline.remaining() <= 0:
+        return deadline.error()
+    return None
+
+
+def timeout(default: float) -> float:
+    """Return a timeout for a blocking operation bounded by the deadline."""
+    if (deadline := _CURRENT.get()) is None:
+        return default
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        raise deadline.error()
+    return min(default, remaining)
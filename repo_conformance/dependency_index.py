@@ -0,0 +1,71 @@
+"""Index of dependency update PRs across all repos by package and version.
+
+Renovate and Dependabot open the same update, such as `pytest 8.3.0 -> 8.4.0`,
+in every repo that uses the package. The index groups those PRs by the
+(package, from, to) update they contain, so that an update can be reviewed and
+merged once for the whole fleet instead of once per repo.
+"""
+
+from dataclasses import dataclass
+from typing import Self
+
+from .pr_record import Groups, PullRequest
+from .pr_rules import DependencyUpdate
+
+
+@dataclass(frozen=True, slots=True)
+class IndexEntry:
+    """A pull request containing an update, and where it was found."""
+
+    name: str
+    fullname: str
+    group: str
+    pr: PullRequest
+
+
+class DependencyIndex:
+    """In-memory index of dependency update PRs keyed by update."""
+
+    def __init__(self) -> None:
+        """Initialize DependencyIndex."""
+        self._updates: dict[tuple[str, str, str], list[IndexEntry]] = {}
+        self._names: dict[tuple[str, str, str], DependencyUpdate] = {}
+
+    @classmethod
+    def from_repos(cls, repos_data: list[tuple[str, str, Groups]]) -> Self:
+        """Build the index from the grouped PRs of each repo."""
+        index = cls()
+        for name, fullname, groups in repos_data:
+            for group, prs in groups.items():
+                for pr in prs:
+                    for update in pr.updates:
+                        index.add(update, IndexEntry(name, fullname, group, pr))
+        return index
+
+    def add(self, update: DependencyUpdate, entry: IndexEntry) -> None:
+        """Add a PR containing the update."""
+        key = (update.package.lower(), update.old, update.new)
+        self._names.setdefault(key, update)
+        self._updates.setdefault(key, []).append(entry)
+
+    def updates(self) -> list[tuple[DependencyUpdate, list[IndexEntry]]]:
+        """Return each update with its PRs, the most widespread first."""
+        return sorted(
+            ((self._names[key], entries) for key, entries in self._updates.items()),
+            key=lambda item: (-len(item[1]), item[0].package.lower(), item[0].new),
+        )
+
+    def find(self, package: str) -> list[IndexEntry]:
+        """Return the PRs updating the package, across all versions."""
+        package = package.lower()
+        entries: dict[tuple[str, int], IndexEntry] = {}
+        for key, update_entries in self._updates.items():
+            if key[0] != package:
+                continue
+            for entry in update_entries:
+                entries.setdefault((entry.fullname, entry.pr.number), entry)
+        return list(entries.values())
+
+    def __len__(self) -> int:
+        """Return the number of distinct updates."""
+        return len(self._updates)
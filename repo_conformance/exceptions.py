@@ -1,21 +1,40 @@
 """Module for exceptions related to conformance checks."""
 
-from dataclasses import dataclass, field
+import sys
+from collections.abc import Sequence
+from dataclasses import dataclass
 
+_NAMES: dict[tuple[str, ...], tuple[str, ...]] = {}
 
-@dataclass
+
+def intern_names(names: Sequence[str]) -> tuple[str, ...]:
+    """Return a shared tuple for the failure names.
+
+    The same check paths are reported by many failures, e.g. once per
+    repo nesting level, so each distinct path is stored once.
+    """
+    key = tuple(names)
+    if (shared := _NAMES.get(key)) is None:
+        shared = _NAMES.setdefault(key, tuple(sys.intern(name) for name in key))
+    return shared
+
+
+@dataclass(slots=True)
 class Failure:
     """An individual conformance test failure."""
 
     detail: str
     """A detailed error message about the check failure."""
 
-    names: list[str] = field(default_factory=list)
+    names: tuple[str, ...] = ()
     """The name of the check failure."""
 
+    def __post_init__(self) -> None:
+        self.names = intern_names(self.names)
+
     def of(self, name: str) -> "Failure":
         """Return this failure as a child nested of another check."""
-        return Failure(names=[name] + self.names, detail=self.detail)
+        return Failure(names=(name, *self.names), detail=self.detail)
 
     @property
     def name(self) -> str:
@@ -41,5 +60,13 @@ class CheckError(Exception):
         return self._errors
 
 
+class DeadlineExceeded(CheckError):
+    """A check did not finish within its time budget."""
+
+
+class CircuitOpenError(CheckError):
+    """A call was skipped because its destination is unavailable."""
+
+
 class ManifestError(Exception):
     """An error parsing the manifest."""
@@ -0,0 +1,72 @@
+"""Library for grouping the same failure reported by many repos.
+
+A fleet run often finds one problem in many repos, such as every repo being
+out of date when the cruft template advances. Failures of the same check
+whose details only differ by commit SHAs or by the name of the repo itself
+(as `name` or `user/name`) are grouped, so a report lists each distinct
+problem once with the repos it affects. SHAs and names that differ between
+the repos of a group are shown as `<sha>` and `<repo>`.
+"""
+
+import functools
+import re
+from dataclasses import dataclass, field
+
+from .exceptions import Failure
+
+SHA_RE = re.compile(r"\b[0-9a-f]{7,40}\b")
+VARIES = "<sha>"
+REPO = "<repo>"
+
+
+@functools.cache
+def _varying(repo: str) -> re.Pattern[str]:
+    """Return the pattern of the parts of a detail that vary between repos."""
+    if not repo:
+        return re.compile(f"({SHA_RE.pattern})")
+    name = rf"(?<![\w.-])(?:[\w.-]+/)?{re.escape(repo)}(?![\w-])"
+    return re.compile(f"({SHA_RE.pattern}|{name})")
+
+
+@dataclass(slots=True)
+class FailureGroup:
+    """Failures of the same check with the same normalized detail."""
+
+    path: tuple[str, ...]
+    """The check names below the repo, e.g. `("worktree", "cruft")`."""
+
+    parts: list[str]
+    """The detail split around each SHA and repo name, with those at odd indexes."""
+
+    repos: list[str] = field(default_factory=list)
+    """The repos with the failure, in the order they were reported."""
+
+    @property
+    def detail(self) -> str:
+        """The detail of the failure, with SHAs and names that vary replaced."""
+        return "".join(self.parts)
+
+    def add(self, repo: str, parts: list[str]) -> None:
+        """Add a repo with the failure, with the SHAs and names in its detail."""
+        self.repos.append(repo)
+        for i in range(1, len(parts), 2):
+            if self.parts[i] != parts[i]:
+                self.parts[i] = VARIES if SHA_RE.fullmatch(parts[i]) else REPO
+
+
+def group_failures(errors: list[Failure]) -> list[FailureGroup]:
+    """Return the failures grouped by check and normalized detail.
+
+    Groups with the most repos come first, and otherwise keep the order the
+    failures were reported in.
+    """
+    groups: dict[tuple[tuple[str, ...], tuple[str, ...]], FailureGroup] = {}
+    for error in errors:
+        repo, path = (error.names[0], error.names[1:]) if error.names else ("", ())
+        parts = _varying(repo).split(error.detail)
+        key = (path, tuple(parts[::2]))
+        if (group := groups.get(key)) is None:
+            groups[key] = FailureGroup(path=path, parts=parts, repos=[repo])
+        else:
+            group.add(repo, parts)
+    return sorted(groups.values(), key=lambda group: -len(group.repos))
@@ -0,0 +1,262 @@
+"""Library for calling the GitHub API over a single keep-alive connection.
+
+This is an in-process alternative to spawning the `gh` CLI for every call. It
+reuses the token already stored by `gh` (or GH_TOKEN / GITHUB_TOKEN) and keeps
+one HTTPS connection per thread open for the duration of the run.
+"""
+
+import http.client
+import json
+import logging
+import subprocess
+import threading
+import urllib.parse
+from dataclasses import dataclass
+from functools import cache
+from typing import Any
+
+from . import deadline, ratelimit, tracing
+from .breaker import breaker
+
+_LOGGER = logging.getLogger(__name__)
+
+API_URL = "https://api.github.com"
+API_VERSION = "2022-11-28"
+TIMEOUT = 30.0
+
+
+class GitHubApiError(Exception):
+    """An error response from the GitHub API."""
+
+    def __init__(self, status: int, message: str) -> None:
+        """Initialize GitHubApiError."""
+        super().__init__(f"GitHub API error (HTTP {status}): {message}")
+        self.status = status
+
+
+@dataclass
+class Response:
+    """A decoded GitHub API response."""
+
+    status: int
+    headers: dict[str, str]
+    data: Any
+
+
+@cache
+def gh_token() -> str | None:
+    """Return the GitHub token from the environment or the `gh` CLI."""
+    if token := ratelimit.github_token():
+        return token
+    try:
+        res = subprocess.run(
+            ["gh", "auth", "token"],
+            check=False,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+    except (subprocess.SubprocessError, OSError) as err:
+        _LOGGER.debug("Unable to read token from gh: %s", err)
+        return None
+    if res.returncode != 0:
+        return None
+    return res.stdout.strip() or None
+
+
+def observe_gh_rate_limit() -> None:
+    """Correct the shared rate limit bucket from the quota of the `gh` token."""
+    # Reading the quota does not count against it
+    with tracing.span("gh api rate_limit", "subprocess"):
+        try:
+            res = subprocess.run(
+                ["gh", "api", "rate_limit"],
+                check=False,
+                capture_output=True,
+                text=True,
+                timeout=deadline.timeout(10),
+            )
+        except (subprocess.SubprocessError, OSError) as err:
+            _LOGGER.debug("Unable to read the rate limit from gh: %s", err)
+            return
+    try:
+        rate = json.loads(res.stdout)["rate"]
+        ratelimit.bucket().observe(
+            int(rate["remaining"]), float(rate["reset"]), int(rate["limit"])
+        )
+    except (ValueError, KeyError, TypeError):
+        _LOGGER.debug("Unable to read the rate limit from gh: %s", res.stderr.strip())
+
+
+def _is_server_failure(err: BaseException) -> bool:
+    if isinstance(err, GitHubApiError):
+        return err.status >= 500
+    return isinstance(err, OSError)
+
+
+class GitHubSession:
+    """Keep-alive session for the GitHub REST and GraphQL APIs."""
+
+    def __init__(self, token: str | None = None, base_url: str = API_URL) -> None:
+        """Initialize GitHubSession."""
+        self._token = token
+        url = urllib.parse.urlsplit(base_url)
+        self._https = url.scheme == "https"
+        self._host = url.netloc
+        self._prefix = url.path.rstrip("/")
+        self._local = threading.local()
+        self._auth_lock = threading.Lock()
+        self._authenticated: bool | None = None
+
+    @property
+    def token(self) -> str | None:
+        """Return the token used to authenticate requests."""
+        if self._token is None:
+            self._token = gh_token()
+        return self._token
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn_cls = (
+                http.client.HTTPSConnection
+                if self._https
+                else http.client.HTTPConnection
+            )
+            conn = self._local.conn = conn_cls(self._host, timeout=TIMEOUT)
+        return conn
+
+    def _send(
+        self, method: str, path: str, body: bytes | None, headers: dict[str, str]
+    ) -> tuple[http.client.HTTPResponse, bytes]:
+        # A kept-alive connection may have been closed by the server; retry
+        # once on a fresh connection.
+        for attempt in range(2):
+            conn = self._connection()
+            conn.timeout = deadline.timeout(TIMEOUT)
+            if conn.sock is not None:
+                # The timeout of a kept-alive connection applies on connect
+                conn.sock.settimeout(conn.timeout)
+            try:
+                with tracing.span(f"{method} {path}", "http"):
+                    conn.request(
+                        method, self._prefix + path, body=body, headers=headers
+                    )
+                    resp = conn.getresponse()
+                    return resp, resp.read()
+            except (
+                http.client.RemoteDisconnected,
+                ConnectionResetError,
+                BrokenPipeError,
+            ):
+                self._reset(conn)
+                if attempt:
+                    raise
+            except http.client.HTTPException as err:
+                self._reset(conn)
+                # e.g. a malformed or truncated response; raised as an OSError
+                # so that it is handled like any other connection failure
+                raise ConnectionError(f"{type(err).__name__}: {err}") from err
+            except BaseException:
+                # A timeout leaves the connection mid-request, unusable for
+                # the next request on this thread
+                self._reset(conn)
+                raise
+        raise AssertionError("unreachable")
+
+    def _reset(self, conn: http.client.HTTPConnection) -> None:
+        conn.close()
+        self._local.conn = None
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: Any = None,
+        headers: dict[str, str] | None = None,
+    ) -> Response:
+        """Send a request and decode the json response."""
+        request_headers = {
+            "Accept": "application/vnd.github+json",
+            "User-Agent": "repo-conformance",
+            "X-GitHub-Api-Version": API_VERSION,
+            **(headers or {}),
+        }
+        if self.token:
+            request_headers["Authorization"] = f"Bearer {self.token}"
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            request_headers["Content-Type"] = "application/json"
+
+        limiter = ratelimit.bucket()
+        limiter.acquire()
+        with breaker(self._host).guard(_is_server_failure):
+            resp, raw = self._send(method, path, payload, request_headers)
+            response_headers = {key.lower(): value for key, value in resp.getheaders()}
+            limiter.observe_headers(response_headers)
+            try:
+                data = json.loads(raw) if raw else None
+            except ValueError as err:
+                # e.g. an HTML error page from a proxy or an outage
+                if resp.status < 400:
+                    raise GitHubApiError(
+                        resp.status, f"Invalid JSON response: {err}"
+                    ) from err
+                data = None
+            if resp.status >= 400:
+                message = data.get("message", "") if isinstance(data, dict) else ""
+                raise GitHubApiError(resp.status, message or resp.reason)
+        return Response(status=resp.status, headers=response_headers, data=data)
+
+    def graphql(self, query: str, variables: dict[str, Any]) -> dict[str, Any]:
+        """Run a GraphQL query and return its data."""
+        resp = self.request(
+            "POST",
+            "/graphql",
+            body={"query": query, "variables": variables},
+            # Required for mergeStateStatus on pull requests
+            headers={"Accept": "application/vnd.github.merge-info-preview+json"},
+        )
+        if errors := resp.data.get("errors"):
+            raise GitHubApiError(resp.status, "; ".join(e["message"] for e in errors))
+        return dict(resp.data["data"])
+
+    def check_auth(self) -> bool:
+        """Return True if the token is valid, verifying it once per session."""
+        with self._auth_lock:
+            if self._authenticated is None:
+                if not self.token:
+                    self._authenticated = False
+                else:
+                    try:
+                        self.request("GET", "/user")
+                        self._authenticated = True
+                    except (GitHubApiError, OSError) as err:
+                        _LOGGER.debug("GitHub authentication failed: %s", err)
+                        self._authenticated = False
+            return self._authenticated
+
+    def create_pull_request(
+        self, repo_fullname: str, title: str, body: str, head: str, base: str
+    ) -> str:
+        """Create a pull request, returning the url of it or an existing one."""
+        try:
+            resp = self.request(
+                "POST",
+                f"/repos/{repo_fullname}/pulls",
+                body={"title": title, "body": body, "head": head, "base": base},
+            )
+            return str(resp.data["html_url"])
+        except GitHubApiError as err:
+            if err.status != 422:
+                raise
+        owner = repo_fullname.split("/")[0]
+        resp = self.request(
+            "GET",
+            f"/repos/{repo_fullname}/pulls?state=open&head={owner}:{head}",
+        )
+        if not resp.data:
+            raise GitHubApiError(422, f"Unable to create pull request for {head}")
+        _LOGGER.info("Pull request already exists for this branch.")
+        return str(resp.data[0]["html_url"])
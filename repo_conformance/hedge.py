@@ -0,0 +1,166 @@
+"""Library for hedging slow remote requests to trim tail latency.
+
+Each destination tracks the latency of its recent requests. When hedging is
+enabled and a request has not completed by a configured latency percentile,
+a duplicate request is issued and whichever finishes first wins. The total
+number of duplicate requests in a run is capped.
+
+Only duplicates run on the shared hedge pool. Each first attempt runs on its
+own thread so that, when every check worker is waiting on a slow request, the
+duplicates are not queued behind the requests they are meant to race.
+"""
+
+import bisect
+import collections
+import concurrent.futures
+import contextvars
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import cast
+
+from . import deadline
+
+_LOGGER = logging.getLogger(__name__)
+
+PERCENTILE = 0.9
+MAX_EXTRA = 10
+MIN_SAMPLES = 5
+WINDOW = 200
+MAX_WORKERS = 10
+
+
+class LatencyTracker:
+    """Latency percentiles over a sliding window of recent requests."""
+
+    def __init__(self, window: int = WINDOW) -> None:
+        """Initialize LatencyTracker."""
+        self._lock = threading.Lock()
+        self._samples: collections.deque[float] = collections.deque(maxlen=window)
+        self._sorted: list[float] = []
+
+    def record(self, seconds: float) -> None:
+        """Record the latency of a completed request."""
+        with self._lock:
+            if len(self._samples) == self._samples.maxlen:
+                oldest = self._samples[0]
+                del self._sorted[bisect.bisect_left(self._sorted, oldest)]
+            self._samples.append(seconds)
+            bisect.insort(self._sorted, seconds)
+
+    def percentile(self, q: float) -> float | None:
+        """Return the latency percentile, or None with too few samples."""
+        with self._lock:
+            if len(self._sorted) < MIN_SAMPLES:
+                return None
+            return self._sorted[min(int(q * len(self._sorted)), len(self._sorted) - 1)]
+
+
+class Hedger:
+    """Hedges requests to a single destination."""
+
+    def __init__(self, destination: str) -> None:
+        """Initialize Hedger."""
+        self.destination = destination
+        self.latency = LatencyTracker()
+
+    def call[V](self, fn: Callable[[], V]) -> V:
+        """Call fn, issuing a duplicate if it is slower than usual."""
+        delay = self.latency.percentile(_percentile) if _enabled else None
+        if delay is None:
+            return self._timed(fn)
+
+        attempts = {_start(self._timed, fn)}
+        done, _ = concurrent.futures.wait(attempts, timeout=delay)
+        if not done and _take_budget():
+            _LOGGER.debug("Hedging request to %s after %.3fs", self.destination, delay)
+            attempts.add(_submit(self._timed, fn))
+        current = deadline.current()
+        while True:
+            done, pending = concurrent.futures.wait(
+                attempts,
+                timeout=current.remaining() if current else None,
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            if not done:
+                raise cast(deadline.Deadline, current).error()
+            # Prefer a successful attempt, but report an error once all failed
+            for future in done:
+                if future.exception() is None or not pending:
+                    return future.result()
+            attempts = pending
+
+    def _timed[V](self, fn: Callable[[], V]) -> V:
+        start = time.monotonic()
+        result = fn()
+        self.latency.record(time.monotonic() - start)
+        return result
+
+
+_lock = threading.Lock()
+_hedgers: dict[str, Hedger] = {}
+_executor: concurrent.futures.ThreadPoolExecutor | None = None
+_enabled = False
+_percentile = PERCENTILE
+_budget = MAX_EXTRA
+
+
+def configure(
+    enabled: bool, percentile: float = PERCENTILE, max_extra: int = MAX_EXTRA
+) -> None:
+    """Configure hedging and reset latency tracking for a new run."""
+    global _enabled, _percentile, _budget
+    with _lock:
+        _enabled = enabled
+        _percentile = percentile
+        _budget = max_extra
+        _hedgers.clear()
+
+
+def hedger(destination: str) -> Hedger:
+    """Return the hedger for a destination host."""
+    with _lock:
+        if (result := _hedgers.get(destination)) is None:
+            result = _hedgers[destination] = Hedger(destination)
+        return result
+
+
+def _take_budget() -> bool:
+    global _budget
+    with _lock:
+        if _budget <= 0:
+            return False
+        _budget -= 1
+        return True
+
+
+def _start[V](
+    fn: Callable[[Callable[[], V]], V], arg: Callable[[], V]
+) -> concurrent.futures.Future[V]:
+    """Run a first attempt on its own thread, preserving the caller's deadline."""
+    future: concurrent.futures.Future[V] = concurrent.futures.Future()
+    context = contextvars.copy_context()
+
+    def run() -> None:
+        try:
+            future.set_result(context.run(fn, arg))
+        except BaseException as err:  # noqa: BLE001
+            future.set_exception(err)
+
+    threading.Thread(target=run, name="hedge-primary", daemon=True).start()
+    return future
+
+
+def _submit[V](
+    fn: Callable[[Callable[[], V]], V], arg: Callable[[], V]
+) -> concurrent.futures.Future[V]:
+    """Run a duplicate attempt on the shared pool, preserving the caller's deadline."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=MAX_WORKERS, thread_name_prefix="hedge"
+            )
+        executor = _executor
+    return executor.submit(contextvars.copy_context().run, fn, arg)
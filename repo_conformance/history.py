@@ -0,0 +1,133 @@
+"""Action to query the history of conformance check runs."""
+
+import re
+import time
+from argparse import ArgumentParser, BooleanOptionalAction
+from argparse import _SubParsersAction as SubParsersAction
+from datetime import datetime
+from typing import cast
+
+from .history_store import CheckStatus, HistoryStore
+
+SINCE_UNITS = {"m": 60, "h": 3600, "d": 86400, "w": 604800}
+SINCE_RE = re.compile(r"^(\d+)([mhdw])$")
+
+
+def parse_since(value: str) -> float:
+    """Parse a relative age such as `1d` or an ISO date into a timestamp."""
+    if match := SINCE_RE.match(value):
+        return time.time() - int(match.group(1)) * SINCE_UNITS[match.group(2)]
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError as err:
+        raise ValueError(
+            f"Invalid --since '{value}', expected e.g. 12h, 1d or 2024-01-31"
+        ) from err
+
+
+def format_duration(seconds: float) -> str:
+    """Format a duration as the largest whole unit."""
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            return f"{int(seconds // size)}{unit}"
+    return f"{int(seconds)}s"
+
+
+def print_statuses(statuses: list[CheckStatus]) -> None:
+    """Print failing checks with how long they have been failing."""
+    now = time.time()
+    for status in statuses:
+        upstream = (
+            f" (upstream {status.upstream_sha[:12]})" if status.upstream_sha else ""
+        )
+        print(
+            f"{status.repo} {status.check}: failing for "
+            f"{format_duration(now - status.since)}{upstream}"
+        )
+        for detail in status.details:
+            print(f"  {detail}")
+
+
+class HistoryAction:
+    """History action."""
+
+    @classmethod
+    def register(cls, subparsers: SubParsersAction) -> ArgumentParser:
+        args = cast(
+            ArgumentParser,
+            subparsers.add_parser(
+                "history", help="Query the results of previous conformance checks"
+            ),
+        )
+        args.add_argument(
+            "repo",
+            help="The name of the repo to query, or all if omitted",
+            type=str,
+            default=None,
+            nargs="?",
+        )
+        args.add_argument(
+            "--check",
+            help="Only show results of this check, e.g. worktree/cruft",
+            type=str,
+            default=None,
+        )
+        args.add_argument(
+            "--regressions",
+            help="Show checks that passed at --since and fail now",
+            default=False,
+            action=BooleanOptionalAction,
+        )
+        args.add_argument(
+            "--since",
+            help="Start of the regression window, e.g. 12h, 1d or 2024-01-31",
+            type=str,
+            default="1d",
+        )
+        args.add_argument(
+            "--runs",
+            help="Show the most recent runs",
+            type=int,
+            default=None,
+        )
+        args.set_defaults(cls=HistoryAction)
+        return args
+
+    def run(  # type: ignore[no-untyped-def]
+        self,
+        repo: str | None = None,
+        check: str | None = None,
+        regressions: bool = False,
+        since: str = "1d",
+        runs: int | None = None,
+        **kwargs,  # pylint: disable=unused-argument
+    ) -> None:
+        """Action implementation."""
+        store = HistoryStore()
+        try:
+            if runs:
+                for summary in store.runs(runs):
+                    started = datetime.fromtimestamp(summary.started)
+                    took = (
+                        format_duration(summary.finished - summary.started)
+                        if summary.finished
+                        else "unfinished"
+                    )
+                    print(
+                        f"#{summary.id:<5} {started:%Y-%m-%d %H:%M} {summary.action:<8}"
+                        f" {took:<10} {summary.repos} repos, {summary.checks} checks,"
+                        f" {summary.failed} failed"
+                    )
+                return
+
+            if regressions:
+                statuses = store.regressions(parse_since(since), repo, check)
+                if not statuses:
+                    print(f"No regressions since {since}.")
+            else:
+                statuses = store.failing(repo, check)
+                if not statuses:
+                    print("No failing checks.")
+            print_statuses(statuses)
+        finally:
+            store.close()
@@ -0,0 +1,262 @@
+"""Library for storing the history of conformance check runs.
+
+Every fleet check run records the result of each check against each repo,
+its duration, its failures and the upstream commit it compared against in an
+SQLite database in the state directory. The results are indexed by repo, check
+and time, so questions like "which repos regressed since yesterday" or "how
+long has this repo been out of date" are answered without running any checks.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from .registry import CheckRun
+from .state import state_dir
+
+_LOGGER = logging.getLogger(__name__)
+
+DB_FILE = "history.sqlite3"
+
+DURATION_RUNS = 5
+"""The number of recent results each expected check duration is averaged over."""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    action TEXT NOT NULL,
+    args TEXT NOT NULL,
+    started REAL NOT NULL,
+    finished REAL
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    repo TEXT NOT NULL,
+    check_name TEXT NOT NULL,
+    started REAL NOT NULL,
+    duration REAL NOT NULL,
+    passed INTEGER NOT NULL,
+    upstream_sha TEXT
+);
+CREATE TABLE IF NOT EXISTS failures (
+    result_id INTEGER NOT NULL REFERENCES results(id),
+    names TEXT NOT NULL,
+    detail TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_repo_check ON results(repo, check_name, started);
+CREATE INDEX IF NOT EXISTS results_check ON results(check_name, started);
+CREATE INDEX IF NOT EXISTS results_run ON results(run_id);
+CREATE INDEX IF NOT EXISTS failures_result ON failures(result_id);
+"""
+
+LATEST = """
+SELECT repo, check_name, MAX(started) AS started, passed, upstream_sha, id
+FROM results {where} GROUP BY repo, check_name
+"""
+"""The latest result of each (repo, check), relying on SQLite bare columns."""
+
+
+@dataclass
+class RunSummary:
+    """A recorded run with its totals."""
+
+    id: int
+    action: str
+    started: float
+    finished: float | None
+    repos: int
+    checks: int
+    failed: int
+
+
+@dataclass
+class CheckStatus:
+    """The state of a check against a repo."""
+
+    repo: str
+    check: str
+    since: float
+    """When the check started failing."""
+
+    upstream_sha: str | None = None
+    """The upstream commit of the latest result, if any."""
+
+    details: list[str] = field(default_factory=list)
+    """The failure details of the latest result."""
+
+
+class HistoryStore:
+    """SQLite store of check results."""
+
+    def __init__(self, path: str | None = None) -> None:
+        """Initialize HistoryStore."""
+        self._conn = sqlite3.connect(
+            path or str(state_dir() / DB_FILE), check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the database."""
+        self._conn.close()
+
+    def start_run(self, action: str, args: dict[str, Any]) -> int:
+        """Record the start of a run and return its id."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO runs (action, args, started) VALUES (?, ?, ?)",
+                (action, json.dumps(args, default=str), time.time()),
+            )
+        assert cursor.lastrowid is not None
+        return cursor.lastrowid
+
+    def finish_run(self, run_id: int) -> None:
+        """Record the end of a run."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE runs SET finished = ? WHERE id = ?", (time.time(), run_id)
+            )
+
+    def record(self, run_id: int, result: CheckRun) -> None:
+        """Record the result of a check."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO results (run_id, repo, check_name, started, duration,"
+                " passed, upstream_sha) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id,
+                    result.repo,
+                    result.check,
+                    result.started,
+                    result.duration,
+                    not result.failures,
+                    result.upstream_sha,
+                ),
+            )
+            self._conn.executemany(
+                "INSERT INTO failures (result_id, names, detail) VALUES (?, ?, ?)",
+                [
+                    (cursor.lastrowid, json.dumps(fail.names), fail.detail)
+                    for fail in result.failures
+                ],
+            )
+
+    def runs(self, limit: int = 10) -> list[RunSummary]:
+        """Return the most recent runs, newest first."""
+        rows = self._conn.execute(
+            "SELECT runs.id, action, runs.started, finished,"
+            " COUNT(DISTINCT repo), COUNT(results.id),"
+            " COALESCE(SUM(results.passed = 0), 0)"
+            " FROM runs LEFT JOIN results ON results.run_id = runs.id"
+            " GROUP BY runs.id ORDER BY runs.id DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [RunSummary(*row) for row in rows]
+
+    def failing(
+        self, repo: str | None = None, check: str | None = None
+    ) -> list[CheckStatus]:
+        """Return the checks failing in their latest result, and since when."""
+        where, params = _filters(repo, check)
+        rows = self._conn.execute(
+            f"SELECT latest.repo, latest.check_name, latest.upstream_sha, latest.id,"
+            " (SELECT MIN(started) FROM results AS r"
+            "  WHERE r.repo = latest.repo AND r.check_name = latest.check_name"
+            "  AND r.started > COALESCE((SELECT MAX(started) FROM results AS p"
+            "   WHERE p.repo = latest.repo AND p.check_name = latest.check_name"
+            "   AND p.passed = 1), 0))"
+            f" FROM ({LATEST.format(where=where)}) AS latest"
+            " WHERE latest.passed = 0 ORDER BY latest.repo, latest.check_name",
+            params,
+        ).fetchall()
+        return [
+            CheckStatus(
+                repo=row[0],
+                check=row[1],
+                since=row[4],
+                upstream_sha=row[2],
+                details=self._details(row[3]),
+            )
+            for row in rows
+        ]
+
+    def regressions(
+        self, since: float, repo: str | None = None, check: str | None = None
+    ) -> list[CheckStatus]:
+        """Return the failing checks whose latest result at `since` passed."""
+        passed = set(
+            self._conn.execute(
+                "SELECT repo, check_name FROM (SELECT repo, check_name,"
+                " MAX(started), passed FROM results WHERE started <= ?"
+                " GROUP BY repo, check_name) WHERE passed = 1",
+                (since,),
+            ).fetchall()
+        )
+        return [
+            status
+            for status in self.failing(repo, check)
+            if (status.repo, status.check) in passed
+        ]
+
+    def failed_checks(self) -> dict[str, list[tuple[str, ...]]]:
+        """Return the failure paths of the top level checks failing in each repo.
+
+        A path is the check name followed by the failure names below it, e.g.
+        `("worktree", "cruft")`, as of the latest result of the check.
+        """
+        top_level = LATEST.format(where="WHERE check_name NOT LIKE '%/%'")
+        rows = self._conn.execute(
+            "SELECT latest.repo, latest.check_name, failures.names"
+            f" FROM ({top_level}) AS latest"
+            " JOIN failures ON failures.result_id = latest.id"
+            " WHERE latest.passed = 0 ORDER BY latest.repo, latest.check_name"
+        ).fetchall()
+        result: dict[str, list[tuple[str, ...]]] = {}
+        for repo, check, names in rows:
+            result.setdefault(repo, []).append((check, *json.loads(names)))
+        return result
+
+    def durations(self, runs: int = DURATION_RUNS) -> dict[tuple[str, str], float]:
+        """Return the mean duration of each top level check of each repo.
+
+        Each (repo, check) is averaged over its most recent results, so runs
+        limited to some of the checks do not change the estimates of the
+        others. Nested checks are included in the check that runs them.
+        """
+        rows = self._conn.execute(
+            "SELECT repo, check_name, AVG(duration) FROM (SELECT repo, check_name,"
+            " duration, ROW_NUMBER() OVER (PARTITION BY repo, check_name"
+            " ORDER BY started DESC, id DESC) AS n"
+            " FROM results WHERE check_name NOT LIKE '%/%')"
+            " WHERE n <= ? GROUP BY repo, check_name",
+            (runs,),
+        ).fetchall()
+        return {(repo, check): duration for repo, check, duration in rows}
+
+    def _details(self, result_id: int) -> list[str]:
+        return [
+            detail
+            for (detail,) in self._conn.execute(
+                "SELECT detail FROM failures WHERE result_id = ?", (result_id,)
+            )
+        ]
+
+
+def _filters(repo: str | None, check: str | None) -> tuple[str, tuple[str, ...]]:
+    """Return a WHERE clause limiting results to a repo and check."""
+    clauses, params = [], []
+    if repo:
+        clauses.append("repo = ?")
+        params.append(repo)
+    if check:
+        clauses.append("check_name = ?")
+        params.append(check)
+    if not clauses:
+        return "", ()
+    return "WHERE " + " AND ".join(clauses), tuple(params)
@@ -0,0 +1,103 @@
+"""Library for resuming interrupted fleet-wide runs.
+
+An action records the outcome of each repo in a journal in the state directory
+as soon as the repo finishes. A run started with `--resume` skips the repos
+already recorded by the previous run with the same arguments and only redoes
+the unfinished ones. A run without `--resume`, or with different arguments,
+starts a new journal. Once every repo has finished the journal is marked as
+complete and the next `--resume` starts over. A disabled journal, such as for
+a dry run, records nothing and leaves the previous journal in place.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any
+
+from .exceptions import Failure
+from .state import load_json, save_json
+
+_LOGGER = logging.getLogger(__name__)
+
+JOURNAL_FILE = "journal-{action}.json"
+
+
+@dataclass
+class JournalEntry:
+    """The recorded outcome of a single repo."""
+
+    outcome: str
+    """Short description of the outcome, e.g. `passed` or `updated`."""
+
+    url: str | None = None
+    """Link to the result, such as a created pull request."""
+
+    failures: list[Failure] = field(default_factory=list)
+    """Conformance failures found for the repo."""
+
+
+class Journal:
+    """Per-repo progress of an action, persisted as each repo finishes."""
+
+    def __init__(
+        self,
+        action: str,
+        args: dict[str, Any],
+        resume: bool = False,
+        enabled: bool = True,
+    ) -> None:
+        """Initialize Journal."""
+        self._name = JOURNAL_FILE.format(action=action)
+        self._args = args
+        self._enabled = enabled
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, Any]] = {}
+        data = load_json(self._name) if resume and enabled else None
+        if data and data.get("args") != args:
+            _LOGGER.warning(
+                "Not resuming %s: the previous run used different arguments", action
+            )
+        elif data and data.get("complete"):
+            _LOGGER.info("Not resuming %s: the previous run completed", action)
+        elif data:
+            self._entries = data.get("repos", {})
+        self._save(complete=False)
+
+    def _save(self, complete: bool) -> None:
+        if not self._enabled:
+            return
+        save_json(
+            self._name,
+            {"args": self._args, "complete": complete, "repos": self._entries},
+        )
+
+    def get(self, repo: str) -> JournalEntry | None:
+        """Return the recorded outcome of a repo finished by the previous run."""
+        if (entry := self._entries.get(repo)) is None:
+            return None
+        return JournalEntry(
+            outcome=entry["outcome"],
+            url=entry.get("url"),
+            failures=[
+                Failure(detail=fail["detail"], names=fail["names"])
+                for fail in entry.get("failures", [])
+            ],
+        )
+
+    def record(self, repo: str, entry: JournalEntry) -> None:
+        """Record that a repo finished."""
+        with self._lock:
+            self._entries[repo] = {
+                "outcome": entry.outcome,
+                "url": entry.url,
+                "failures": [
+                    {"detail": fail.detail, "names": fail.names}
+                    for fail in entry.failures
+                ],
+            }
+            self._save(complete=False)
+
+    def complete(self) -> None:
+        """Mark the run as finished for every repo."""
+        with self._lock:
+            self._save(complete=True)
@@ -8,6 +8,7 @@ import yaml
 from mashumaro import DataClassDictMixin
 from mashumaro.codecs.yaml import yaml_decode
 
+from .cost import Cost
 from .exceptions import ManifestError
 
 MANIFEST = pathlib.Path("manifest.yaml")
@@ -23,6 +24,12 @@ class CheckContext(DataClassDictMixin):
     include: list[str] = field(default_factory=list)
     """Non-default conformance tests to include."""
 
+    max_cost: Cost | None = None
+    """Skip conformance tests more expensive than this cost class."""
+
+    timeouts: dict[str, float] = field(default_factory=dict)
+    """Maximum seconds each named conformance test may run."""
+
     def allow_empty(cls, value: Any | None) -> Any:
         return value or []
 
@@ -59,6 +66,20 @@ class IgnoredRepo(DataClassDictMixin):
     """Name of the repository."""
 
 
+@dataclass
+class PrRules(DataClassDictMixin):
+    """Rules for classifying pull requests, extending the built-in defaults."""
+
+    security_keywords: list[str] = field(default_factory=list)
+    """Additional case insensitive keywords that mark a security update."""
+
+    major_patterns: list[str] = field(default_factory=list)
+    """Additional regular expressions that mark a major version bump."""
+
+    trusted_bots: list[str] = field(default_factory=list)
+    """Additional bot logins whose dependency update PRs are trusted."""
+
+
 @dataclass
 class Manifest(DataClassDictMixin):
     """Repo manifest."""
@@ -73,6 +94,9 @@ class Manifest(DataClassDictMixin):
 
     ignored_repos: list[IgnoredRepo] = field(default_factory=list)
 
+    prs: PrRules = field(default_factory=PrRules)
+    """Pull request classification rules."""
+
 
 def parse_manifest() -> Manifest:
     """Read the manifest file into an object."""
@@ -0,0 +1,169 @@
+"""Library for merging many pull requests across repositories.
+
+Merges in different repositories are independent and run concurrently, while
+merges within a repository run one at a time: each squash merge moves the base
+branch, so the next PR in the same repository is re-checked for mergeability
+before it is merged. PRs that cannot be merged yet, such as those with checks
+still running, may instead have GitHub auto-merge enabled.
+"""
+
+import concurrent.futures
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import Protocol
+
+from . import deadline
+from .pr_record import PullRequest
+
+_LOGGER = logging.getLogger(__name__)
+
+MAX_WORKERS = 8
+RECHECK_ATTEMPTS = 5
+RECHECK_DELAY = 2.0
+
+WAITING_STATES = {"BEHIND", "BLOCKED", "UNSTABLE"}
+"""Merge states that may resolve on their own, e.g. once checks finish."""
+
+
+class MergeClient(Protocol):
+    """GitHub operations used to merge pull requests."""
+
+    def merge_pr(self, repo_fullname: str, pr_number: int) -> tuple[bool, str]: ...
+
+    def get_pr_mergeable(
+        self, repo_fullname: str, pr_number: int
+    ) -> tuple[str, str]: ...
+
+    def enable_auto_merge(
+        self, repo_fullname: str, pr_number: int
+    ) -> tuple[bool, str]: ...
+
+
+class MergeStatus(StrEnum):
+    """Outcome of merging a single pull request."""
+
+    MERGED = "merged"
+    AUTO_MERGE = "auto-merge"
+    SKIPPED = "skipped"
+    FAILED = "failed"
+
+
+@dataclass
+class MergeRequest:
+    """A pull request to merge."""
+
+    name: str
+    fullname: str
+    pr: PullRequest
+    auto: bool = False
+    """Enable auto-merge instead of merging now, e.g. while checks run."""
+
+
+@dataclass
+class MergeResult:
+    """The outcome of a merge request."""
+
+    request: MergeRequest
+    status: MergeStatus
+    message: str = ""
+
+
+class MergeScheduler:
+    """Merges concurrently across repos and serially within a repo."""
+
+    def __init__(
+        self,
+        client: MergeClient,
+        auto_merge: bool = False,
+        max_workers: int = MAX_WORKERS,
+        recheck_delay: float = RECHECK_DELAY,
+    ) -> None:
+        """Initialize MergeScheduler."""
+        self._client = client
+        self._auto_merge = auto_merge
+        self._max_workers = max_workers
+        self._recheck_delay = recheck_delay
+        self._lock = threading.Lock()
+
+    def run(
+        self,
+        requests: list[MergeRequest],
+        report: Callable[[MergeResult], None] | None = None,
+    ) -> list[MergeResult]:
+        """Merge the pull requests, reporting each result as it completes."""
+        by_repo: dict[str, list[MergeRequest]] = {}
+        for request in requests:
+            by_repo.setdefault(request.fullname, []).append(request)
+
+        results: list[MergeResult] = []
+
+        def done(result: MergeResult) -> None:
+            with self._lock:
+                results.append(result)
+                if report:
+                    report(result)
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self._max_workers, thread_name_prefix="merge"
+        ) as executor:
+            futures = [
+                executor.submit(self._merge_repo, repo_requests, done)
+                for repo_requests in by_repo.values()
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                future.result()
+        return results
+
+    def _merge_repo(
+        self, requests: list[MergeRequest], done: Callable[[MergeResult], None]
+    ) -> None:
+        base_moved = False
+        for request in requests:
+            result = self._merge(request, base_moved)
+            base_moved = base_moved or result.status == MergeStatus.MERGED
+            done(result)
+
+    def _merge(self, request: MergeRequest, base_moved: bool) -> MergeResult:
+        fullname, number = request.fullname, request.pr.number
+        if request.auto:
+            return self._enable_auto_merge(request)
+
+        if base_moved:
+            mergeable, state = self._recheck(fullname, number)
+            if mergeable == "CONFLICTING" or state == "DIRTY":
+                return MergeResult(
+                    request, MergeStatus.SKIPPED, "conflicts after an earlier merge"
+                )
+            if state in WAITING_STATES and self._auto_merge:
+                return self._enable_auto_merge(request)
+
+        success, message = self._client.merge_pr(fullname, number)
+        if success:
+            return MergeResult(request, MergeStatus.MERGED)
+        if self._auto_merge:
+            _LOGGER.debug("Merge of %s#%s failed: %s", fullname, number, message)
+            return self._enable_auto_merge(request)
+        return MergeResult(request, MergeStatus.FAILED, message)
+
+    def _recheck(self, fullname: str, number: int) -> tuple[str, str]:
+        """Return the mergeability, waiting while GitHub recomputes it."""
+        delay = self._recheck_delay
+        for _ in range(RECHECK_ATTEMPTS - 1):
+            mergeable, state = self._client.get_pr_mergeable(fullname, number)
+            if mergeable != "UNKNOWN" and state != "UNKNOWN":
+                return mergeable, state
+            time.sleep(deadline.timeout(delay))
+            delay *= 2
+        return self._client.get_pr_mergeable(fullname, number)
+
+    def _enable_auto_merge(self, request: MergeRequest) -> MergeResult:
+        success, message = self._client.enable_auto_merge(
+            request.fullname, request.pr.number
+        )
+        if success:
+            return MergeResult(request, MergeStatus.AUTO_MERGE)
+        return MergeResult(request, MergeStatus.FAILED, message)
@@ -0,0 +1,81 @@
+"""Cache of pull request results that are fixed once the head commit is known.
+
+The files changed by a pull request and its completed check results only
+change when new commits are pushed, so they are cached by repository and head
+commit SHA. Pending check results are never cached. The least recently used
+commits are evicted once the cache is full. The cache may be shared by threads
+fetching results concurrently.
+"""
+
+import logging
+import threading
+from collections.abc import Callable
+from typing import Any
+
+from .state import load_json, save_json
+
+_LOGGER = logging.getLogger(__name__)
+
+CACHE_FILE = "pr-cache.json"
+MAX_ENTRIES = 2000
+
+DIFF_FILES = "files"
+CHECKS = "check-runs"
+
+
+class PrCache:
+    """Persistent LRU cache of pull request results keyed by head SHA."""
+
+    def __init__(self, enabled: bool = True, max_entries: int = MAX_ENTRIES) -> None:
+        """Initialize PrCache."""
+        self._enabled = enabled
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, Any]] = (
+            (load_json(CACHE_FILE) or {}) if enabled else {}
+        )
+
+    def get(self, repo_fullname: str, sha: str, kind: str) -> Any | None:
+        """Return a cached result, marking the commit as recently used."""
+        key = f"{repo_fullname}@{sha}"
+        with self._lock:
+            if (entry := self._entries.pop(key, None)) is None:
+                return None
+            self._entries[key] = entry
+            return entry.get(kind)
+
+    def put(self, repo_fullname: str, sha: str, kind: str, value: Any) -> None:
+        """Store a result for the commit, evicting the least recently used."""
+        key = f"{repo_fullname}@{sha}"
+        with self._lock:
+            entry = self._entries.pop(key, {})
+            entry[kind] = value
+            self._entries[key] = entry
+            while len(self._entries) > self._max_entries:
+                del self._entries[next(iter(self._entries))]
+            save_json(CACHE_FILE, self._entries)
+
+    def fetch[V](
+        self,
+        repo_fullname: str,
+        sha: str,
+        kind: str,
+        fn: Callable[[], V],
+        cacheable: bool | Callable[[V], bool] = True,
+    ) -> V:
+        """Return the cached result, or call fn and cache its result.
+
+        The `cacheable` function decides from the result itself whether it
+        is final for the commit, e.g. only once every check has completed.
+        """
+        if not self._enabled or not sha:
+            return fn()
+        if (value := self.get(repo_fullname, sha, kind)) is not None:
+            _LOGGER.debug("Using cached %s for %s@%s", kind, repo_fullname, sha)
+            return value  # type: ignore[no-any-return]
+        value = fn()
+        if callable(cacheable):
+            cacheable = cacheable(value)
+        if cacheable and value:
+            self.put(repo_fullname, sha, kind, value)
+        return value
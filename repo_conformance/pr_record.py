@@ -0,0 +1,266 @@
+"""Typed record of an open pull request used by the prs action.
+
+Each pull request returned by GitHub is parsed once into a `PullRequest` with
+all of its classifications computed up front, so that filtering, grouping,
+merging and printing do not repeat the same string matching.
+"""
+
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import Any, Self
+
+from .pr_rules import DEFAULT_RULES, DependencyUpdate, RuleEngine
+
+CRUFT_BRANCH = "cruft-update"
+CRUFT_TITLE = "Apply cruft updates"
+
+
+class CiState(StrEnum):
+    """Combined state of the CI checks on a pull request."""
+
+    PASSED = "passed"
+    FAILED = "failed"
+    PENDING = "pending"
+    NONE = "none"
+    UNKNOWN = "unknown"
+
+    def label(self, color: bool = True) -> str:
+        """Return the label used when printing the state."""
+        label, code = _CI_LABELS[self]
+        if color and code:
+            return f"\033[{code}m{label}\033[0m"
+        return label
+
+
+_CI_LABELS = {
+    CiState.PASSED: ("🟢 PASSED", "92"),
+    CiState.FAILED: ("🔴 FAILED", "91"),
+    CiState.PENDING: ("🟡 PENDING", "93"),
+    CiState.NONE: ("No checks", ""),
+    CiState.UNKNOWN: ("⚪ UNKNOWN", ""),
+}
+
+
+class CheckBucket(StrEnum):
+    """Outcome of a single CI check, in the order checks are printed."""
+
+    FAIL = "fail"
+    CANCEL = "cancel"
+    PENDING = "pending"
+    PASS = "pass"
+    SKIPPING = "skipping"
+
+
+CHECK_BUCKETS = {
+    "success": CheckBucket.PASS,
+    "neutral": CheckBucket.PASS,
+    "skipped": CheckBucket.SKIPPING,
+    "cancelled": CheckBucket.CANCEL,
+    "failure": CheckBucket.FAIL,
+    "timed_out": CheckBucket.FAIL,
+    "action_required": CheckBucket.FAIL,
+    "startup_failure": CheckBucket.FAIL,
+    "stale": CheckBucket.FAIL,
+}
+"""Bucket of each check run conclusion, as reported by `gh pr checks`."""
+
+
+def check_bucket(conclusion: str | None) -> CheckBucket:
+    """Return the bucket of a check run from its conclusion."""
+    if not conclusion:
+        return CheckBucket.PENDING
+    return CHECK_BUCKETS.get(conclusion.lower(), CheckBucket.FAIL)
+
+
+def status_bucket(state: str) -> CheckBucket:
+    """Return the bucket of a commit status from its state."""
+    if state == "pending":
+        return CheckBucket.PENDING
+    return check_bucket(state)
+
+
+def checks_complete(checks: list[dict[str, str]]) -> bool:
+    """Return True if no check is still pending or queued."""
+    return all(check["bucket"] != CheckBucket.PENDING for check in checks)
+
+
+def sort_checks(checks: list[dict[str, str]]) -> list[dict[str, str]]:
+    """Return checks with failures first, then by name."""
+    order = list(CheckBucket)
+    return sorted(
+        checks,
+        key=lambda check: (
+            order.index(CheckBucket(check["bucket"]))
+            if check["bucket"] in CheckBucket
+            else len(order),
+            check["name"],
+        ),
+    )
+
+
+def ci_state(checks: list[dict]) -> CiState:
+    """Determine CI state of a PR from its statusCheckRollup."""
+    if not checks:
+        return CiState.NONE
+
+    has_pending = False
+    for check in checks:
+        status = check.get("status")
+        conclusion = check.get("conclusion")
+        state = check.get("state")
+
+        if (
+            conclusion == "FAILURE"
+            or state == "FAILURE"
+            or conclusion == "failed"
+            or state == "failed"
+        ):
+            return CiState.FAILED
+        if status in ["IN_PROGRESS", "QUEUED", "pending", "expected"] or (
+            not conclusion and not state
+        ):
+            has_pending = True
+
+    return CiState.PENDING if has_pending else CiState.PASSED
+
+
+def is_major_version_bump(title: str, body: str = "") -> bool:
+    """Determine if a PR represents a major version bump."""
+    return DEFAULT_RULES.is_major(title, body)
+
+
+def is_security_update(title: str, body: str = "") -> bool:
+    """Determine if a PR is a security patch or CVE fix."""
+    return DEFAULT_RULES.is_security(title, body)
+
+
+@dataclass(slots=True)
+class PullRequest:
+    """An open pull request with its classifications precomputed."""
+
+    number: int
+    title: str
+    url: str
+    author: str
+    is_bot: bool
+    created_at: str
+    head_ref: str
+    head_sha: str
+    head_repo_owner: str
+    review_decision: str | None
+    mergeable: str
+    merge_state_status: str
+    is_draft: bool
+    ci: CiState
+    is_renovate: bool
+    is_dependabot: bool
+    is_trusted_bot: bool
+    is_cruft: bool
+    is_major: bool
+    is_security: bool
+    has_rej_files: bool = False
+    updates: tuple[DependencyUpdate, ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any], rules: RuleEngine = DEFAULT_RULES) -> Self:
+        """Parse a pull request in the shape returned by `gh pr list --json`."""
+        author = data.get("author") or {}
+        login = author.get("login", "")
+        title = data.get("title") or ""
+        body = data.get("body") or ""
+        head_ref = data.get("headRefName") or ""
+        is_trusted_bot = rules.is_trusted_bot(login)
+        return cls(
+            number=int(data.get("number") or 0),
+            title=title,
+            url=data.get("url") or "",
+            author=login,
+            is_bot=author.get("is_bot", False),
+            created_at=data.get("createdAt") or "",
+            head_ref=head_ref,
+            head_sha=data.get("headRefOid") or "",
+            head_repo_owner=(
+                (
+                    data.get("headRepositoryOwner")
+                    or (data.get("headRepository") or {}).get("owner")
+                    or {}
+                )
+                .get("login", "")
+                .lower()
+            ),
+            review_decision=data.get("reviewDecision", ""),
+            mergeable=data.get("mergeable", "UNKNOWN"),
+            merge_state_status=data.get("mergeStateStatus", "UNKNOWN"),
+            is_draft=data.get("isDraft", False),
+            ci=ci_state(data.get("statusCheckRollup") or []),
+            is_renovate="renovate" in login.lower(),
+            is_dependabot="dependabot" in login.lower(),
+            is_trusted_bot=is_trusted_bot,
+            is_cruft="cruft" in title.lower() or head_ref == CRUFT_BRANCH,
+            is_major=rules.is_major(title, body),
+            is_security=rules.is_security(title, body),
+            updates=rules.dependency_updates(title, body) if is_trusted_bot else (),
+        )
+
+    @property
+    def author_login(self) -> str:
+        """Return the lower case author login used for matching."""
+        return self.author.lower()
+
+    @property
+    def is_dependency_update(self) -> bool:
+        """Return True if opened by a trusted update bot such as Renovate."""
+        return self.is_trusted_bot
+
+    @property
+    def is_maintenance(self) -> bool:
+        """Return True for dependency and template update PRs."""
+        return self.is_trusted_bot or self.is_cruft
+
+    @property
+    def is_conflicting(self) -> bool:
+        """Return True if the PR has merge conflicts."""
+        return self.mergeable == "CONFLICTING" or self.merge_state_status == "DIRTY"
+
+    @property
+    def is_changes_requested(self) -> bool:
+        """Return True if a reviewer requested changes."""
+        return self.review_decision == "CHANGES_REQUESTED"
+
+    @property
+    def is_mergeable(self) -> bool:
+        """Return True if GitHub reports the PR can be merged."""
+        return self.mergeable == "MERGEABLE" or self.merge_state_status in [
+            "CLEAN",
+            "HAS_HOOKS",
+        ]
+
+    @property
+    def is_approved_or_no_review(self) -> bool:
+        """Return True if the PR is approved or does not require review."""
+        return self.review_decision in ["APPROVED", "", "NONE", None]
+
+    def is_valid_cruft(self, manifest_user: str) -> bool:
+        """Return True for a cruft update PR opened by the manifest user."""
+        user = manifest_user.lower()
+        return (
+            self.head_ref == CRUFT_BRANCH
+            and self.title == CRUFT_TITLE
+            and self.author_login == user
+            # Reject forks, where the head repository has another owner
+            and (not self.head_repo_owner or self.head_repo_owner == user)
+        )
+
+    def is_trusted_author(self, manifest_user: str) -> bool:
+        """Return True if authored by a trusted entity (self or a bot)."""
+        return (
+            self.author_login == manifest_user.lower()
+            or self.is_bot
+            or self.is_trusted_bot
+        )
+
+
+Groups = dict[str, list[PullRequest]]
+"""Open PRs of a repo grouped as ready, pending or attention."""
+
+GROUPS = ("ready", "pending", "attention")
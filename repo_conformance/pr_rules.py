@@ -0,0 +1,171 @@
+"""Rule engine for classifying pull requests from their title and body.
+
+Patterns are compiled once when the engine is built. The title is checked
+first, and only a bounded prefix of the body is read: dependency update bodies
+often include many kilobytes of release notes after the summary. When the
+body has a Renovate update table, the scan stops at the end of the table.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Self
+
+from .exceptions import ManifestError
+from .manifest import PrRules
+
+SECURITY_KEYWORDS = ("security", "cve-", "vulnerability", "advisory")
+TRUSTED_BOTS = ("renovate", "dependabot")
+
+BODY_SCAN_LIMIT = 4096
+"""Maximum number of body characters read, unless a Renovate table is longer."""
+
+RENOVATE_TABLE_HEADER = "| Package |"
+
+MAJOR_WORD = re.compile(r"\bmajor\b", re.IGNORECASE)
+FROM_TO = re.compile(
+    r"(?:from|bump[s]?\s+\S+\s+from)\s+v?(\d+)\.\S+\s+to\s+v?(\d+)\.\S+",
+    re.IGNORECASE,
+)
+TO_MAJOR = re.compile(r"\bto\s+v?(\d+)(?!\.\d+)\b", re.IGNORECASE)
+TABLE_CHANGE = re.compile(r"`v?([^`]+)`\s*(?:->|→)\s*`v?([^`]+)`")
+TABLE_PACKAGE = re.compile(r"\[([^\]]+)\]|`([^`]+)`")
+LEADING_NUMBER = re.compile(r"\d+")
+DEPENDABOT_BUMP = re.compile(
+    r"\bbumps?\s+\[?([^\s\]]+)\]?(?:\([^)\s]*\))?\s+from\s+v?(\S+?)"
+    r"\s+to\s+v?(\S+?)\.?(?:\s|$)",
+    re.IGNORECASE,
+)
+RENOVATE_UPDATE = re.compile(
+    r"\bupdate\s+(?:(?:dependency|module|docker tag|image)\s+)?(\S+)\s+to\s+v?(\S+)",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class DependencyUpdate:
+    """A single package version change listed in a dependency update PR."""
+
+    package: str
+    old: str
+    new: str
+
+    @property
+    def is_major(self) -> bool | None:
+        """Return if the major version changed, or None if not a version."""
+        old = LEADING_NUMBER.match(self.old)
+        new = LEADING_NUMBER.match(self.new)
+        if old is None or new is None:
+            return None
+        return int(old.group()) != int(new.group())
+
+
+class RuleEngine:
+    """Compiled rules for classifying pull requests."""
+
+    def __init__(
+        self,
+        security_keywords: list[str] | None = None,
+        major_patterns: list[str] | None = None,
+        trusted_bots: list[str] | None = None,
+    ) -> None:
+        """Initialize RuleEngine."""
+        keywords = (*SECURITY_KEYWORDS, *(security_keywords or []))
+        self._security = re.compile(
+            "|".join(re.escape(keyword) for keyword in keywords), re.IGNORECASE
+        )
+        try:
+            self._major_patterns = [
+                re.compile(pattern, re.IGNORECASE) for pattern in major_patterns or []
+            ]
+        except re.error as err:
+            raise ManifestError(f"Invalid major version pattern: {err}") from err
+        self._trusted_bots = tuple(
+            bot.lower() for bot in (*TRUSTED_BOTS, *(trusted_bots or []))
+        )
+
+    @classmethod
+    def from_config(cls, rules: PrRules) -> Self:
+        """Build the engine from the manifest rules."""
+        return cls(
+            security_keywords=rules.security_keywords,
+            major_patterns=rules.major_patterns,
+            trusted_bots=rules.trusted_bots,
+        )
+
+    def excerpt(self, body: str) -> str:
+        """Return the part of the body that is scanned by the rules."""
+        start = body.find(RENOVATE_TABLE_HEADER, 0, BODY_SCAN_LIMIT)
+        if start < 0:
+            return body[:BODY_SCAN_LIMIT]
+        end = start
+        while end < len(body) and body.startswith("|", end):
+            newline = body.find("\n", end)
+            end = len(body) if newline < 0 else newline + 1
+        return body[:end]
+
+    def updates(self, body: str) -> list[DependencyUpdate]:
+        """Return the package updates listed in a Renovate update table."""
+        excerpt = self.excerpt(body)
+        if (start := excerpt.find(RENOVATE_TABLE_HEADER)) < 0:
+            return []
+        result = []
+        for row in excerpt[start:].splitlines()[2:]:
+            cells = row.split("|")
+            if len(cells) < 3 or (change := TABLE_CHANGE.search(row)) is None:
+                continue
+            if (package := TABLE_PACKAGE.search(cells[1])) is None:
+                name = cells[1].strip()
+            else:
+                name = package.group(1) or package.group(2)
+            result.append(DependencyUpdate(name, change.group(1), change.group(2)))
+        return result
+
+    def dependency_updates(
+        self, title: str, body: str = ""
+    ) -> tuple[DependencyUpdate, ...]:
+        """Return the package updates of a Renovate or Dependabot PR.
+
+        The Renovate update table is preferred, then a Dependabot "Bump X from
+        A to B" summary. A Renovate "Update X to vB" title has no old version.
+        """
+        if body and (updates := self.updates(body)):
+            return tuple(updates)
+        match = DEPENDABOT_BUMP.search(title)
+        if match is None and body:
+            match = DEPENDABOT_BUMP.search(self.excerpt(body))
+        if match is not None:
+            return (DependencyUpdate(*match.groups()),)
+        if match := RENOVATE_UPDATE.search(title):
+            return (DependencyUpdate(match.group(1), "", match.group(2)),)
+        return ()
+
+    def is_major(self, title: str, body: str = "") -> bool:
+        """Determine if a PR represents a major version bump."""
+        if MAJOR_WORD.search(title):
+            return True
+        excerpt = self.excerpt(body) if body else ""
+        if any(p.search(title) or p.search(excerpt) for p in self._major_patterns):
+            return True
+        if match := FROM_TO.search(title):
+            return match.group(1) != match.group(2)
+        if excerpt:
+            majors = [u.is_major for u in self.updates(excerpt)]
+            if any(major is not None for major in majors):
+                return any(majors)
+            if match := FROM_TO.search(excerpt):
+                return match.group(1) != match.group(2)
+        return bool(TO_MAJOR.search(title))
+
+    def is_security(self, title: str, body: str = "") -> bool:
+        """Determine if a PR is a security patch or CVE fix."""
+        if self._security.search(title):
+            return True
+        return bool(body) and bool(self._security.search(self.excerpt(body)))
+
+    def is_trusted_bot(self, login: str) -> bool:
+        """Return True if the login belongs to a trusted update bot."""
+        login = login.lower()
+        return any(bot in login for bot in self._trusted_bots)
+
+
+DEFAULT_RULES = RuleEngine()
@@ -1,16 +1,40 @@
 """Action to inspect and manage open pull requests in manifest repositories."""
 
+import collections
+import concurrent.futures
+import functools
+import itertools
 import json
 import logging
-import re
 import subprocess
 import sys
+import time
 from argparse import ArgumentParser, BooleanOptionalAction
 from argparse import _SubParsersAction as SubParsersAction
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass
 from datetime import UTC, datetime
-from typing import cast
-
-from .manifest import parse_manifest
+from typing import Any, TextIO, cast
+
+from . import ratelimit, tracing
+from .dependency_index import DependencyIndex
+from .github_api import GitHubApiError, GitHubSession, observe_gh_rate_limit
+from .manifest import Repo, parse_manifest
+from .merge_scheduler import MergeRequest, MergeResult, MergeScheduler, MergeStatus
+from .pr_cache import CHECKS, DIFF_FILES, PrCache
+from .pr_record import (
+    GROUPS,
+    CheckBucket,
+    CiState,
+    Groups,
+    PullRequest,
+    check_bucket,
+    checks_complete,
+    sort_checks,
+    status_bucket,
+)
+from .pr_rules import RuleEngine
+from .prs_watch import PrWatcher
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -39,101 +63,194 @@ def format_age(dt_str: str) -> str:
         return "unknown"
 
 
-def get_ci_status(checks: list[dict], color: bool = True) -> str:
-    """Determine CI status of a PR from its statusCheckRollup."""
-    if not checks:
-        return "No checks"
-
-    has_failure = False
-    has_pending = False
-
-    for check in checks:
-        status = check.get("status")
-        conclusion = check.get("conclusion")
-        state = check.get("state")
-
-        if (
-            conclusion == "FAILURE"
-            or state == "FAILURE"
-            or conclusion == "failed"
-            or state == "failed"
-        ):
-            has_failure = True
-        elif status in ["IN_PROGRESS", "QUEUED", "pending", "expected"] or (
-            not conclusion and not state
-        ):
-            has_pending = True
-
-    if has_failure:
-        return "\033[91m🔴 FAILED\033[0m" if color else "🔴 FAILED"
-    if has_pending:
-        return "\033[93m🟡 PENDING\033[0m" if color else "🟡 PENDING"
-    return "\033[92m🟢 PASSED\033[0m" if color else "🟢 PASSED"
-
-
-def is_trusted_author(pr: dict, manifest_user: str) -> bool:
-    """Check if the PR is authored by a trusted entity (self or a bot)."""
-    author_login = pr.get("author", {}).get("login", "").lower()
-    is_bot = pr.get("author", {}).get("is_bot", False)
+def is_awaiting_checks(pr: PullRequest, allow_major: bool) -> bool:
+    """Return True if the PR only waits for its checks to finish."""
     return (
-        author_login == manifest_user.lower()
-        or is_bot
-        or "renovate" in author_login
-        or "dependabot" in author_login
+        pr.ci == CiState.PENDING
+        and not pr.is_draft
+        and not (pr.is_major and not allow_major)
+        and not pr.is_conflicting
+        and not pr.is_changes_requested
+        and not pr.has_rej_files
+        and pr.is_approved_or_no_review
     )
 
 
-def is_major_version_bump(title: str, body: str = "") -> bool:
-    """Determine if a PR represents a major version bump."""
-    text = f"{title}\n{body}"
-
-    if re.search(r"\bmajor\b", title, re.IGNORECASE):
-        return True
-
-    match = re.search(
-        r"(?:from|bump[s]?\s+\S+\s+from)\s+v?(\d+)\.\S+\s+to\s+v?(\d+)\.\S+",
-        text,
-        re.IGNORECASE,
+def group_pr(pr: PullRequest, allow_major: bool) -> str:
+    """Return the ready, pending or attention group for a PR."""
+    if (
+        pr.ci == CiState.FAILED
+        or pr.is_conflicting
+        or pr.is_changes_requested
+        or pr.has_rej_files
+    ):
+        return "attention"
+    if pr.is_draft or (pr.is_major and not allow_major):
+        return "pending"
+    if (
+        pr.ci in (CiState.PASSED, CiState.NONE)
+        and pr.is_mergeable
+        and pr.is_approved_or_no_review
+    ):
+        return "ready"
+    return "pending"
+
+
+LIST_FIELDS = [
+    "number",
+    "title",
+    "url",
+    "author",
+    "createdAt",
+    "headRefName",
+    "headRefOid",
+    "headRepositoryOwner",
+    "reviewDecision",
+    "mergeable",
+    "mergeStateStatus",
+    "isDraft",
+]
+"""Lightweight fields needed to filter and group PRs."""
+
+CHECK_FIELDS = "name,bucket,link"
+CHECKS_WORKERS = 8
+
+DETAIL_FIELDS = ["body", "statusCheckRollup"]
+"""Heavier fields fetched only for PRs that pass the filters."""
+
+DETAILS_BATCH_SIZE = 50
+
+LIST_PRS_QUERY = """
+query($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) {
+    pullRequests(states: OPEN, first: 100, orderBy: {field: CREATED_AT, direction: DESC}) {
+      nodes {
+        number title url createdAt headRefName headRefOid reviewDecision
+        mergeable mergeStateStatus isDraft
+        author { login __typename }
+        headRepositoryOwner { login }
+      }
+    }
+  }
+}
+"""
+
+PR_DETAILS_FRAGMENT = """
+fragment details on PullRequest {
+  number body
+  commits(last: 1) {
+    nodes { commit { statusCheckRollup { contexts(first: 100) { nodes {
+      __typename
+      ... on CheckRun { name status conclusion }
+      ... on StatusContext { context state }
+    } } } } }
+  }
+}
+"""
+
+
+MERGEABLE_QUERY = """
+query($owner: String!, $name: String!, $number: Int!) {
+  repository(owner: $owner, name: $name) {
+    pullRequest(number: $number) { id mergeable mergeStateStatus }
+  }
+}
+"""
+
+ENABLE_AUTO_MERGE_MUTATION = """
+mutation($id: ID!) {
+  enablePullRequestAutoMerge(input: {pullRequestId: $id, mergeMethod: SQUASH}) {
+    clientMutationId
+  }
+}
+"""
+
+
+def pr_details_query(numbers: Iterable[int]) -> str:
+    """Return a query fetching the details of several PRs in one request."""
+    fields = "\n".join(
+        f"pr{number}: pullRequest(number: {number}) {{ ...details }}"
+        for number in numbers
+    )
+    return (
+        "query($owner: String!, $name: String!) {\n"
+        f"  repository(owner: $owner, name: $name) {{\n{fields}\n  }}\n"
+        f"}}\n{PR_DETAILS_FRAGMENT}"
     )
-    if match:
-        from_major, to_major = match.group(1), match.group(2)
-        return from_major != to_major
 
-    to_v_match = re.search(r"\bto\s+v?(\d+)(?!\.\d+)\b", title, re.IGNORECASE)
-    return bool(to_v_match)
 
+def parse_pr_details(node: dict) -> dict:
+    """Return PR details in the shape returned by `gh pr list --json`."""
+    rollup = []
+    for commit in node["commits"]["nodes"]:
+        if contexts := commit["commit"]["statusCheckRollup"]:
+            rollup.extend(contexts["contexts"]["nodes"])
+    return {"body": node["body"], "statusCheckRollup": rollup}
 
-def is_security_update(title: str, body: str = "") -> bool:
-    """Determine if a PR is a security patch or CVE fix."""
-    text = f"{title}\n{body}".lower()
-    return any(kw in text for kw in ["security", "cve-", "vulnerability", "advisory"])
+
+def split_included_response(output: str) -> tuple[dict[str, str], str]:
+    """Return the headers and body of `gh api --include` output."""
+    head, _, body = output.replace("\r\n", "\n").partition("\n\n")
+    headers = {}
+    for line in head.splitlines()[1:]:
+        key, sep, value = line.partition(":")
+        if sep:
+            headers[key.strip().lower()] = value.strip()
+    return headers, body
 
 
 class GitHubClient:
-    """Interface for GitHub CLI operations."""
+    """Interface for GitHub CLI operations.
+
+    Only `gh api` calls expose the `X-RateLimit-*` headers, so the shared
+    rate limit bucket is corrected from the GraphQL queries and from the
+    quota read when verifying authentication. Other `gh` commands only take
+    tokens from the bucket.
+    """
+
+    def _graphql(self, query: str, variables: dict[str, Any]) -> dict | None:
+        """Run a GraphQL query, returning None on failure."""
+        args = ["api", "graphql", "--include", "-f", f"query={query}"]
+        for key, value in variables.items():
+            # -F sends typed values such as integers, -f sends strings
+            args.extend(["-f" if isinstance(value, str) else "-F", f"{key}={value}"])
+        res = self._gh(args)
+        headers, body = split_included_response(res.stdout)
+        ratelimit.bucket().observe_headers(headers)
+        if res.returncode != 0:
+            return None
+        try:
+            return json.loads(body).get("data")
+        except json.JSONDecodeError:
+            return None
+
+    def _gh(self, args: list[str]) -> subprocess.CompletedProcess[str]:
+        """Run a gh command, pacing calls against the shared API quota."""
+        ratelimit.bucket().acquire()
+        with tracing.span(f"gh {' '.join(args[:2])}", "subprocess"):
+            return subprocess.run(
+                ["gh", *args],
+                check=False,
+                capture_output=True,
+                text=True,
+            )
 
     def check_auth(self) -> bool:
-        res = subprocess.run(
-            ["gh", "auth", "status"],
-            check=False,
-            capture_output=True,
-        )
-        return res.returncode == 0
+        if self._gh(["auth", "status"]).returncode != 0:
+            return False
+        observe_gh_rate_limit()
+        return True
 
     def list_prs(self, repo_fullname: str) -> list[dict]:
-        res = subprocess.run(
+        res = self._gh(
             [
-                "gh",
                 "pr",
                 "list",
                 "--repo",
                 repo_fullname,
                 "--json",
-                "number,title,url,state,statusCheckRollup,author,createdAt,headRefName,reviewDecision,mergeable,mergeStateStatus,isDraft,body",
-            ],
-            check=False,
-            capture_output=True,
-            text=True,
+                ",".join(LIST_FIELDS),
+            ]
         )
         if res.returncode != 0:
             return []
@@ -142,53 +259,492 @@ class GitHubClient:
         except json.JSONDecodeError:
             return []
 
+    def get_pr_details(
+        self, repo_fullname: str, pr_numbers: list[int]
+    ) -> dict[int, dict]:
+        """Return the body and check rollup of each PR, batching requests."""
+        owner, name = repo_fullname.split("/", 1)
+        details = {}
+        for batch in itertools.batched(pr_numbers, DETAILS_BATCH_SIZE):
+            data = self._graphql(
+                pr_details_query(batch), {"owner": owner, "name": name}
+            )
+            for node in ((data or {}).get("repository") or {}).values():
+                if node:
+                    details[int(node["number"])] = parse_pr_details(node)
+        return details
+
     def get_pr_diff_files(self, repo_fullname: str, pr_number: int) -> list[str]:
-        res = subprocess.run(
+        res = self._gh(
             [
-                "gh",
                 "pr",
                 "diff",
                 str(pr_number),
                 "--repo",
                 repo_fullname,
                 "--name-only",
-            ],
-            check=False,
-            capture_output=True,
-            text=True,
+            ]
         )
         if res.returncode == 0:
             return res.stdout.splitlines()
         return []
 
-    def get_pr_checks(self, repo_fullname: str, pr_number: int) -> str:
-        res = subprocess.run(
-            ["gh", "pr", "checks", str(pr_number), "--repo", repo_fullname],
-            check=False,
-            capture_output=True,
-            text=True,
+    def get_pr_checks(
+        self, repo_fullname: str, pr_number: int, head_sha: str = ""
+    ) -> list[dict[str, str]]:
+        """Return the name, bucket and link of each check on a PR."""
+        res = self._gh(
+            [
+                "pr",
+                "checks",
+                str(pr_number),
+                "--repo",
+                repo_fullname,
+                "--json",
+                CHECK_FIELDS,
+            ]
         )
-        return res.stdout if res.returncode == 0 else (res.stderr or "")
+        # Failing and pending checks exit non-zero but still list the checks
+        try:
+            return cast(list[dict[str, str]], json.loads(res.stdout))
+        except json.JSONDecodeError:
+            _LOGGER.warning(
+                "Unable to get checks for %s#%s: %s",
+                repo_fullname,
+                pr_number,
+                res.stderr.strip(),
+            )
+            return []
 
     def merge_pr(self, repo_fullname: str, pr_number: int) -> tuple[bool, str]:
-        res = subprocess.run(
+        res = self._gh(
+            [
+                "pr",
+                "merge",
+                str(pr_number),
+                "--repo",
+                repo_fullname,
+                "--squash",
+                "--delete-branch",
+            ]
+        )
+        return res.returncode == 0, res.stderr.strip()
+
+    def get_pr_mergeable(self, repo_fullname: str, pr_number: int) -> tuple[str, str]:
+        """Return the current mergeable and merge state status of a PR."""
+        res = self._gh(
+            [
+                "pr",
+                "view",
+                str(pr_number),
+                "--repo",
+                repo_fullname,
+                "--json",
+                "mergeable,mergeStateStatus",
+            ]
+        )
+        try:
+            data = json.loads(res.stdout) if res.returncode == 0 else {}
+        except json.JSONDecodeError:
+            data = {}
+        return data.get("mergeable", "UNKNOWN"), data.get("mergeStateStatus", "UNKNOWN")
+
+    def enable_auto_merge(self, repo_fullname: str, pr_number: int) -> tuple[bool, str]:
+        """Squash merge the PR automatically once its requirements are met."""
+        res = self._gh(
             [
-                "gh",
                 "pr",
                 "merge",
                 str(pr_number),
                 "--repo",
                 repo_fullname,
                 "--squash",
+                "--auto",
                 "--delete-branch",
-            ],
-            check=False,
-            capture_output=True,
-            text=True,
+            ]
         )
         return res.returncode == 0, res.stderr.strip()
 
 
+class RestGitHubClient(GitHubClient):
+    """GitHub operations over the API in-process, without spawning `gh`.
+
+    All calls share one keep-alive session, so a run pays for the connection
+    and token lookup once rather than once per call.
+    """
+
+    def __init__(self, session: GitHubSession | None = None) -> None:
+        """Initialize RestGitHubClient."""
+        self._session = session or GitHubSession()
+
+    @property
+    def session(self) -> GitHubSession:
+        """Return the session used for API calls."""
+        return self._session
+
+    def check_auth(self) -> bool:
+        return self._session.check_auth()
+
+    def _graphql(self, query: str, variables: dict[str, Any]) -> dict | None:
+        try:
+            return self._session.graphql(query, variables)
+        except (GitHubApiError, OSError) as err:
+            _LOGGER.debug("GraphQL query failed: %s", err)
+            return None
+
+    def list_prs(self, repo_fullname: str) -> list[dict]:
+        owner, name = repo_fullname.split("/", 1)
+        data = self._graphql(LIST_PRS_QUERY, {"owner": owner, "name": name})
+        if not data or not data.get("repository"):
+            return []
+        prs = []
+        for node in data["repository"]["pullRequests"]["nodes"]:
+            author = node.pop("author") or {}
+            node["author"] = {
+                "login": author.get("login", ""),
+                "is_bot": author.get("__typename") == "Bot",
+            }
+            prs.append(node)
+        return prs
+
+    def get_pr_diff_files(self, repo_fullname: str, pr_number: int) -> list[str]:
+        files: list[str] = []
+        page = 1
+        try:
+            while True:
+                resp = self._session.request(
+                    "GET",
+                    f"/repos/{repo_fullname}/pulls/{pr_number}/files"
+                    f"?per_page=100&page={page}",
+                )
+                files.extend(f["filename"] for f in resp.data)
+                if len(resp.data) < 100:
+                    return files
+                page += 1
+        except (GitHubApiError, OSError) as err:
+            _LOGGER.debug(
+                "Unable to list files for %s#%s: %s", repo_fullname, pr_number, err
+            )
+            return []
+
+    def get_pr_checks(
+        self, repo_fullname: str, pr_number: int, head_sha: str = ""
+    ) -> list[dict[str, str]]:
+        try:
+            if not head_sha:
+                head_sha = self._session.request(
+                    "GET", f"/repos/{repo_fullname}/pulls/{pr_number}"
+                ).data["head"]["sha"]
+            commit = f"/repos/{repo_fullname}/commits/{head_sha}"
+            runs = self._session.request(
+                "GET", f"{commit}/check-runs?per_page=100"
+            ).data["check_runs"]
+            # CI that reports through commit statuses rather than check runs
+            statuses = self._session.request(
+                "GET", f"{commit}/status?per_page=100"
+            ).data["statuses"]
+        except (GitHubApiError, OSError) as err:
+            _LOGGER.warning(
+                "Unable to get checks for %s#%s: %s", repo_fullname, pr_number, err
+            )
+            return []
+        return [
+            {
+                "name": run["name"],
+                "bucket": check_bucket(run["conclusion"]),
+                "link": run["html_url"],
+            }
+            for run in runs
+        ] + [
+            {
+                "name": status["context"],
+                "bucket": status_bucket(status["state"]),
+                "link": status.get("target_url") or "",
+            }
+            for status in statuses
+        ]
+
+    def merge_pr(self, repo_fullname: str, pr_number: int) -> tuple[bool, str]:
+        try:
+            pr = self._session.request(
+                "GET", f"/repos/{repo_fullname}/pulls/{pr_number}"
+            ).data
+            self._session.request(
+                "PUT",
+                f"/repos/{repo_fullname}/pulls/{pr_number}/merge",
+                body={"merge_method": "squash", "sha": pr["head"]["sha"]},
+            )
+        except (GitHubApiError, OSError) as err:
+            return False, str(err)
+        head = pr["head"]
+        if (head.get("repo") or {}).get("full_name") == repo_fullname:
+            try:
+                self._session.request(
+                    "DELETE", f"/repos/{repo_fullname}/git/refs/heads/{head['ref']}"
+                )
+            except (GitHubApiError, OSError) as err:
+                _LOGGER.warning("Unable to delete branch %s: %s", head["ref"], err)
+        return True, ""
+
+    def _mergeability(self, repo_fullname: str, pr_number: int) -> dict:
+        owner, name = repo_fullname.split("/", 1)
+        data = self._session.graphql(
+            MERGEABLE_QUERY, {"owner": owner, "name": name, "number": pr_number}
+        )
+        return dict(data["repository"]["pullRequest"])
+
+    def get_pr_mergeable(self, repo_fullname: str, pr_number: int) -> tuple[str, str]:
+        try:
+            pr = self._mergeability(repo_fullname, pr_number)
+        except (GitHubApiError, OSError, KeyError, TypeError) as err:
+            _LOGGER.debug(
+                "Unable to get mergeability of %s#%s: %s", repo_fullname, pr_number, err
+            )
+            return "UNKNOWN", "UNKNOWN"
+        return pr["mergeable"], pr["mergeStateStatus"]
+
+    def enable_auto_merge(self, repo_fullname: str, pr_number: int) -> tuple[bool, str]:
+        try:
+            pr = self._mergeability(repo_fullname, pr_number)
+            self._session.graphql(ENABLE_AUTO_MERGE_MUTATION, {"id": pr["id"]})
+        except (GitHubApiError, OSError, KeyError, TypeError) as err:
+            return False, str(err)
+        return True, ""
+
+
+FORMATS = ("text", "json", "ndjson")
+
+CLIENTS = {"gh": GitHubClient, "rest": RestGitHubClient}
+
+
+@dataclass
+class PrFilter:
+    """Criteria for the open PRs that are shown."""
+
+    manifest_user: str
+    renovate: bool = False
+    cruft: bool = False
+    author: str | None = None
+    show_all: bool = False
+
+    def matches(self, pr: PullRequest) -> bool:
+        """Return True if the PR should be shown."""
+        if self.renovate and not pr.is_dependency_update:
+            return False
+        if self.cruft and not pr.is_valid_cruft(self.manifest_user):
+            return False
+        if self.author and pr.author_login != self.author:
+            return False
+        # Default: only show maintenance PRs unless --all is specified
+        return (
+            bool(self.renovate or self.cruft or self.author or self.show_all)
+            or pr.is_maintenance
+        )
+
+
+def collect_prs(
+    github_client: GitHubClient,
+    pr_cache: PrCache,
+    rules: RuleEngine,
+    pr_filter: PrFilter,
+    allow_major: bool,
+    repo_fullname: str,
+) -> Groups | None:
+    """Fetch, filter and group the open PRs of a repo, or None if it has none."""
+    listed = github_client.list_prs(repo_fullname)
+    if not listed:
+        return None
+
+    filtered = []
+    for data in listed:
+        pr = PullRequest.from_dict(data, rules)
+        if pr_filter.matches(pr):
+            filtered.append((pr, data))
+
+    # Fetch bodies and check rollups only for the PRs that remain
+    missing = [
+        pr.number for pr, data in filtered if any(f not in data for f in DETAIL_FIELDS)
+    ]
+    details = github_client.get_pr_details(repo_fullname, missing) if missing else {}
+
+    grouped: Groups = {"ready": [], "pending": [], "attention": []}
+    for pr, data in filtered:
+        if pr.number in details:
+            pr = PullRequest.from_dict({**data, **details[pr.number]}, rules)
+        elif pr.number in missing:
+            # Without its checks and body the PR must not look ready to merge
+            pr.ci = CiState.UNKNOWN
+        # Fetch file list for cruft PRs to check for .rej files
+        if pr.is_cruft and pr.number:
+            modified_files = pr_cache.fetch(
+                repo_fullname,
+                pr.head_sha,
+                DIFF_FILES,
+                functools.partial(
+                    github_client.get_pr_diff_files, repo_fullname, pr.number
+                ),
+            )
+            pr.has_rej_files = any(f.endswith(".rej") for f in modified_files)
+        grouped[group_pr(pr, allow_major)].append(pr)
+    return grouped
+
+
+CHECK_SYMBOLS = {
+    CheckBucket.FAIL: "\033[91m✗\033[0m",
+    CheckBucket.CANCEL: "\033[91m⊘\033[0m",
+    CheckBucket.PENDING: "\033[93m●\033[0m",
+    CheckBucket.PASS: "\033[92m✓\033[0m",
+    CheckBucket.SKIPPING: "-",
+}
+
+
+def print_pr_checks(name: str, pr: PullRequest, checks: list[dict[str, str]]) -> None:
+    """Print the checks of a PR with failures first and their links."""
+    print(f"\n\033[1mChecks for {name} #{pr.number}\033[0m: {pr.title}")
+    print("-" * 60)
+    if not checks:
+        print("Failed to retrieve check details.")
+        return
+    counts = collections.Counter(check["bucket"] for check in checks)
+    print(
+        ", ".join(
+            f"{counts[bucket]} {bucket}" for bucket in CheckBucket if counts[bucket]
+        )
+    )
+    for check in sort_checks(checks):
+        symbol = CHECK_SYMBOLS.get(cast(CheckBucket, check["bucket"]), "?")
+        # Only failures link to their logs
+        link = (
+            f"  {check['link']}"
+            if check["bucket"] in (CheckBucket.FAIL, CheckBucket.CANCEL)
+            and check.get("link")
+            else ""
+        )
+        print(f"  {symbol} {check['name']}{link}")
+
+
+class PrStreamWriter:
+    """Writes the grouped PRs of each repo as JSON as soon as it is collected.
+
+    With `ndjson` each repo is a line, followed by a summary line. Otherwise
+    the repos are streamed as elements of a single JSON document.
+    """
+
+    def __init__(self, ndjson: bool = False, stream: TextIO | None = None) -> None:
+        """Initialize PrStreamWriter."""
+        self._ndjson = ndjson
+        self._stream = stream or sys.stdout
+        self._summary = {"repos": 0, "prs": 0} | {group: 0 for group in GROUPS}
+
+    def _write(self, text: str) -> None:
+        self._stream.write(text)
+        self._stream.flush()
+
+    def write_repo(self, name: str, fullname: str, groups: Groups) -> None:
+        """Write the grouped PRs of a repo."""
+        record: dict[str, Any] = {"name": name, "repo": fullname}
+        for group in GROUPS:
+            record[group] = [asdict(pr) for pr in groups[group]]
+            self._summary[group] += len(groups[group])
+            self._summary["prs"] += len(groups[group])
+        if self._ndjson:
+            self._write(json.dumps({"type": "repo", **record}) + "\n")
+        else:
+            prefix = '{"repos": [' if not self._summary["repos"] else ", "
+            self._write(prefix + json.dumps(record))
+        self._summary["repos"] += 1
+
+    def close(self) -> None:
+        """Write the summary record."""
+        if self._ndjson:
+            self._write(json.dumps({"type": "summary", **self._summary}) + "\n")
+        else:
+            prefix = '{"repos": [' if not self._summary["repos"] else ""
+            self._write(f'{prefix}], "summary": {json.dumps(self._summary)}}}\n')
+
+
+def filter_package(
+    repos_data: list[tuple[str, str, Groups]], package: str
+) -> list[tuple[str, str, Groups]]:
+    """Return the grouped PRs limited to those updating the package."""
+    matched = {
+        (entry.fullname, entry.pr.number)
+        for entry in DependencyIndex.from_repos(repos_data).find(package)
+    }
+    return [
+        (
+            name,
+            fullname,
+            {
+                group: [pr for pr in prs if (fullname, pr.number) in matched]
+                for group, prs in groups.items()
+            },
+        )
+        for name, fullname, groups in repos_data
+    ]
+
+
+def print_package_index(index: DependencyIndex) -> None:
+    """Print the dependency update PRs grouped by package and version."""
+    if not index:
+        print("\nNo dependency update pull requests found.\n")
+        return
+    prefixes = {"ready": "🟢", "pending": "🟡", "attention": "🔴"}
+    for update, entries in index.updates():
+        change = f"{update.old} → {update.new}" if update.old else f"→ {update.new}"
+        repos = len({entry.fullname for entry in entries})
+        print(
+            f"\n\033[1m{update.package}\033[0m {change} ({repos} repo{'s' if repos != 1 else ''}):"
+        )
+        for entry in entries:
+            pr = entry.pr
+            print(
+                f"  {prefixes[entry.group]} [{entry.name}] #{pr.number:<4} {pr.title} - {pr.ci.label()}"
+            )
+    print()
+
+
+def print_pr_groups(repos_data: list[tuple[str, str, Groups]]) -> None:
+    """Print the grouped PRs of each repo."""
+    has_prs = False
+    for name, _, groups in repos_data:
+        if not (groups["ready"] or groups["pending"] or groups["attention"]):
+            continue
+        has_prs = True
+        print(f"\n\033[1m{name}\033[0m:")
+        for group, prefix in [("ready", "🟢"), ("pending", "🟡"), ("attention", "🔴")]:
+            for pr in groups[group]:
+                age = format_age(pr.created_at)
+
+                details = []
+                if pr.is_draft:
+                    details.append("\033[93mDraft\033[0m")
+                if pr.is_major:
+                    details.append("\033[93mMAJOR UPGRADE\033[0m")
+                if pr.is_security:
+                    details.append("\033[92mSECURITY\033[0m")
+                if pr.is_conflicting:
+                    details.append("\033[91mCONFLICT\033[0m")
+                if pr.has_rej_files:
+                    details.append("\033[91mREJECT FILES\033[0m")
+                if pr.review_decision == "REVIEW_REQUIRED":
+                    details.append("\033[93mNeeds Review\033[0m")
+                elif pr.review_decision == "CHANGES_REQUESTED":
+                    details.append("\033[91mChanges Requested\033[0m")
+                elif pr.review_decision == "APPROVED":
+                    details.append("\033[92mApproved\033[0m")
+
+                details_str = f" [{', '.join(details)}]" if details else ""
+                print(
+                    f"  {prefix} #{pr.number:<4} {pr.title} [@{pr.author or 'unknown'}] ({age}) - {pr.ci.label()}{details_str}"
+                )
+
+    if not has_prs:
+        print("\nNo open pull requests found matching the criteria.\n")
+    else:
+        print()
+
+
 class PrsAction:
     """PR Status and Health action."""
 
@@ -247,12 +803,30 @@ class PrsAction:
             default=False,
             action=BooleanOptionalAction,
         )
+        args.add_argument(
+            "--by-package",
+            help="Group dependency update PRs across repos by package and version",
+            default=False,
+            action=BooleanOptionalAction,
+        )
+        args.add_argument(
+            "--package",
+            help="Only include dependency update PRs for this package",
+            type=str,
+            default=None,
+        )
         args.add_argument(
             "--allow-major",
             help="Allow auto-merging major version upgrades",
             default=False,
             action=BooleanOptionalAction,
         )
+        args.add_argument(
+            "--auto-merge",
+            help="With --merge, enable GitHub auto-merge for PRs whose checks are still running",
+            default=False,
+            action=BooleanOptionalAction,
+        )
         args.add_argument(
             "-y",
             "--yes",
@@ -266,6 +840,31 @@ class PrsAction:
             default=False,
             action=BooleanOptionalAction,
         )
+        args.add_argument(
+            "--backend",
+            help="Call GitHub through the `gh` CLI or in-process over the API",
+            choices=sorted(CLIENTS),
+            default="gh",
+        )
+        args.add_argument(
+            "--cache",
+            help="Reuse changed files and completed checks for unchanged PR commits",
+            default=True,
+            action=BooleanOptionalAction,
+        )
+        args.add_argument(
+            "--format",
+            dest="output_format",
+            help="Print text, or stream each repo's PRs as JSON or JSON lines",
+            choices=FORMATS,
+            default="text",
+        )
+        args.add_argument(
+            "--watch",
+            help="Keep running and redraw the PR view as pull requests change",
+            default=False,
+            action=BooleanOptionalAction,
+        )
         args.set_defaults(cls=PrsAction)
         return args
 
@@ -281,12 +880,21 @@ class PrsAction:
         allow_major: bool = False,
         yes: bool = False,
         dry_run: bool = False,
+        backend: str = "gh",
+        cache: bool = True,
+        watch: bool = False,
+        auto_merge: bool = False,
+        by_package: bool = False,
+        package: str | None = None,
+        output_format: str = "text",
         client: GitHubClient | None = None,
         **kwargs,  # pylint: disable=unused-argument
     ) -> None:
         """Run implementation."""
         manifest = parse_manifest()
-        github_client = client or GitHubClient()
+        rules = RuleEngine.from_config(manifest.prs)
+        github_client = client or CLIENTS[backend]()
+        pr_cache = PrCache(enabled=cache)
 
         # Verify the user is logged into the gh CLI
         if not github_client.check_auth():
@@ -298,11 +906,49 @@ class PrsAction:
 
         # Resolve 'me' keyword to manifest user
         target_author = manifest.user if author == "me" else author
-        if target_author:
-            target_author = target_author.lower()
+        pr_filter = PrFilter(
+            manifest_user=manifest.user,
+            renovate=renovate,
+            cruft=cruft,
+            author=target_author.lower() if target_author else None,
+            show_all=kwargs.get("all", False),
+        )
+
+        if output_format != "text" and (
+            health or checks or merge or by_package or watch
+        ):
+            print(
+                f"Error: --format {output_format} only supports the default PR view.",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+        writer = (
+            PrStreamWriter(ndjson=output_format == "ndjson")
+            if output_format != "text"
+            else None
+        )
+
+        if watch:
+            if health or checks or merge or by_package or package:
+                print(
+                    "Error: --watch only supports the default PR view.",
+                    file=sys.stderr,
+                )
+                sys.exit(1)
+            self._watch(
+                manifest.repos
+                if not repo
+                else [r for r in manifest.repos if r.name == repo],
+                manifest.user,
+                github_client,
+                functools.partial(
+                    collect_prs, github_client, pr_cache, rules, pr_filter, allow_major
+                ),
+            )
+            return
 
         # Collect data for all matching repos
-        repos_data = []
+        repos_data: list[tuple[str, str, Groups]] = []
 
         for r in manifest.repos:
             if repo and r.name != repo:
@@ -313,189 +959,103 @@ class PrsAction:
 
             repo_fullname = f"{r.user}/{r.name}"
 
-            prs = github_client.list_prs(repo_fullname)
-            if not prs:
+            grouped = collect_prs(
+                github_client, pr_cache, rules, pr_filter, allow_major, repo_fullname
+            )
+            if grouped is None:
                 continue
-
-            filtered_prs = []
-            for pr in prs:
-                pr_author = pr.get("author", {}).get("login", "").lower()
-                pr_title = pr.get("title", "")
-                head_ref = pr.get("headRefName", "")
-
-                is_renovate = "renovate" in pr_author
-                is_dependabot = "dependabot" in pr_author
-                is_cruft = "cruft" in pr_title.lower() or head_ref == "cruft-update"
-                is_maintenance = is_renovate or is_dependabot or is_cruft
-
-                # Apply --cruft filter with strict verification rules
-                is_cruft_branch = pr.get("headRefName") == "cruft-update"
-                is_cruft_title = pr_title == "Apply cruft updates"
-                is_self_authored = pr_author == manifest.user.lower()
-
-                # Check for forks (headRepository must match baseRepository if present)
-                head_repo_owner = (
-                    pr.get("headRepository", {})
-                    .get("owner", {})
-                    .get("login", "")
-                    .lower()
-                )
-                is_internal_branch = (
-                    not head_repo_owner or head_repo_owner == manifest.user.lower()
+            if package:
+                ((_, _, grouped),) = filter_package(
+                    [(r.name, repo_fullname, grouped)], package
                 )
-
-                is_valid_cruft_pr = (
-                    is_cruft_branch
-                    and is_cruft_title
-                    and is_self_authored
-                    and is_internal_branch
-                )
-
-                if renovate and not (is_renovate or is_dependabot):
-                    continue
-                if cruft and not is_valid_cruft_pr:
-                    continue
-                if target_author and pr_author != target_author:
-                    continue
-
-                # Default: only show maintenance PRs unless --all is specified
-                if (
-                    not (renovate or cruft or target_author or kwargs.get("all"))
-                    and not is_maintenance
-                ):
-                    continue
-
-                filtered_prs.append(pr)
-
-            if filtered_prs or health or checks or merge:
-                # Group PRs by status
-                grouped = {"ready": [], "pending": [], "attention": []}
-                for pr in filtered_prs:
-                    checks_list = pr.get("statusCheckRollup", [])
-                    ci_str = get_ci_status(checks_list, color=False)
-                    m_state = pr.get("mergeable", "UNKNOWN")
-                    m_status = pr.get("mergeStateStatus", "UNKNOWN")
-                    rev_decision = pr.get("reviewDecision", "")
-                    is_draft = pr.get("isDraft", False)
-
-                    head_ref = pr.get("headRefName", "")
-                    pr_title = pr.get("title", "")
-                    pr_body = pr.get("body", "") or ""
-                    is_cruft = "cruft" in pr_title.lower() or head_ref == "cruft-update"
-
-                    is_major = is_major_version_bump(pr_title, pr_body)
-                    is_security = is_security_update(pr_title, pr_body)
-                    pr["is_major"] = is_major
-                    pr["is_security"] = is_security
-
-                    is_failed = "FAILED" in ci_str
-                    is_conflicting = (m_state == "CONFLICTING") or (m_status == "DIRTY")
-                    is_changes_requested = rev_decision == "CHANGES_REQUESTED"
-
-                    # Fetch file list for cruft PRs to check for .rej files
-                    has_rej_files = False
-                    if is_cruft and "number" in pr:
-                        modified_files = github_client.get_pr_diff_files(
-                            repo_fullname, int(pr["number"])
-                        )
-                        if any(f.endswith(".rej") for f in modified_files):
-                            has_rej_files = True
-
-                    # Store has_rej_files in the PR dict
-                    pr["has_rej_files"] = has_rej_files
-
-                    is_passed = "PASSED" in ci_str or ci_str == "No checks"
-                    is_mergeable = (m_state == "MERGEABLE") or (
-                        m_status in ["CLEAN", "HAS_HOOKS"]
-                    )
-                    is_approved_or_no_review = rev_decision in [
-                        "APPROVED",
-                        "",
-                        "NONE",
-                        None,
-                    ]
-
-                    if (
-                        is_failed
-                        or is_conflicting
-                        or is_changes_requested
-                        or has_rej_files
-                    ):
-                        grouped["attention"].append(pr)
-                    elif is_draft or (is_major and not allow_major):
-                        grouped["pending"].append(pr)
-                    elif is_passed and is_mergeable and is_approved_or_no_review:
-                        grouped["ready"].append(pr)
-                    else:
-                        grouped["pending"].append(pr)
-
+            if any(grouped.values()) or health or checks or merge:
                 repos_data.append((r.name, repo_fullname, grouped))
+                if writer:
+                    writer.write_repo(r.name, repo_fullname, grouped)
+
+        if writer:
+            writer.close()
+            return
 
         # Handle --checks execution
         if checks:
-            has_prs = False
-            for name, fullname, groups in repos_data:
-                all_prs = groups["ready"] + groups["pending"] + groups["attention"]
-                if not all_prs:
-                    continue
-                has_prs = True
-                for pr in all_prs:
-                    num = pr.get("number")
-                    title = pr.get("title")
-                    print(f"\n\033[1mChecks for {name} #{num}\033[0m: {title}")
-                    print("-" * 60)
-                    checks_out = github_client.get_pr_checks(fullname, num)
-                    print(checks_out or "Failed to retrieve check details.")
-            if not has_prs:
+            prs = [
+                (name, fullname, pr)
+                for name, fullname, groups in repos_data
+                for group in GROUPS
+                for pr in groups[group]
+            ]
+            if not prs:
                 print("\nNo open pull requests found matching the criteria.\n")
+                return
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=CHECKS_WORKERS, thread_name_prefix="checks"
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        pr_cache.fetch,
+                        fullname,
+                        pr.head_sha,
+                        CHECKS,
+                        functools.partial(
+                            github_client.get_pr_checks,
+                            fullname,
+                            pr.number,
+                            pr.head_sha,
+                        ),
+                        # Only completed check results are final for a commit
+                        cacheable=checks_complete,
+                    )
+                    for _, fullname, pr in prs
+                ]
+                # Print in repo and PR order as the results arrive
+                for (name, _, pr), future in zip(prs, futures, strict=True):
+                    print_pr_checks(name, pr, future.result())
             return
 
         # Handle --merge execution
         if merge:
-            if not (renovate or cruft):
+            # A package only selects dependency update PRs
+            if not (renovate or cruft or package):
                 print(
                     "\033[91mError: Naked --merge without a category filter is disabled for safety.\033[0m\n"
-                    "Please specify an explicit category filter (e.g. `repo prs --cruft --merge` or `repo prs --renovate --merge`).",
+                    "Please specify an explicit category filter (e.g. `repo prs --cruft --merge`, `repo prs --renovate --merge` or `repo prs --package pytest --merge`).",
                     file=sys.stderr,
                 )
                 sys.exit(1)
 
-            ready_to_merge_all = []
+            merge_requests = []
             for name, fullname, groups in repos_data:
-                for pr in groups["ready"]:
-                    pr_author = pr.get("author", {}).get("login", "").lower()
-                    is_bot = pr.get("author", {}).get("is_bot", False)
-
-                    if renovate:
-                        # Strictly target Renovate or Dependabot PRs only
-                        if not (
-                            "renovate" in pr_author
-                            or "dependabot" in pr_author
-                            or is_bot
-                        ):
+                for group in ("ready", "pending"):
+                    for pr in groups[group]:
+                        if renovate:
+                            # Strictly target Renovate or Dependabot PRs only
+                            if not (pr.is_dependency_update or pr.is_bot):
+                                continue
+                        elif cruft and not pr.is_cruft:
                             continue
-                    elif cruft:
-                        head_ref = pr.get("headRefName", "")
-                        pr_title = pr.get("title", "")
-                        is_cruft = (
-                            "cruft" in pr_title.lower() or head_ref == "cruft-update"
-                        )
-                        if not is_cruft:
+                        # Pending PRs are only merged once their checks pass
+                        if group == "pending" and not (
+                            auto_merge and is_awaiting_checks(pr, allow_major)
+                        ):
                             continue
 
-                    ready_to_merge_all.append((name, fullname, pr))
+                        merge_requests.append(
+                            MergeRequest(name, fullname, pr, auto=group == "pending")
+                        )
 
-            if not ready_to_merge_all:
+            if not merge_requests:
                 print("\nNo pull requests are ready to merge.\n")
                 return
 
             print("\nPull requests ready to merge:")
-            for name, fullname, pr in ready_to_merge_all:
-                num = pr.get("number")
-                title = pr.get("title")
-                author_login = pr.get("author", {}).get("login", "unknown")
-                age = format_age(pr.get("createdAt", ""))
-                print(f"  [{name}] #{num:<4} {title} [@{author_login}] ({age})")
+            for request in merge_requests:
+                pr = request.pr
+                age = format_age(pr.created_at)
+                auto = " (auto-merge once checks pass)" if request.auto else ""
+                print(
+                    f"  [{request.name}] #{pr.number:<4} {pr.title} [@{pr.author or 'unknown'}] ({age}){auto}"
+                )
 
             if dry_run:
                 print("\n[Dry-run] Would merge the above pull requests.\n")
@@ -503,23 +1063,28 @@ class PrsAction:
 
             if not yes:
                 confirm = input(
-                    f"\nProceed with merging these {len(ready_to_merge_all)} pull requests? [y/N]: "
+                    f"\nProceed with merging these {len(merge_requests)} pull requests? [y/N]: "
                 )
                 if confirm.strip().lower() not in ["y", "yes"]:
                     print("Merge cancelled.")
                     return
 
+            def report(result: MergeResult) -> None:
+                label = f"{result.request.name} #{result.request.pr.number}"
+                match result.status:
+                    case MergeStatus.MERGED:
+                        print(f"  \033[92m✓ Successfully merged {label}\033[0m")
+                    case MergeStatus.AUTO_MERGE:
+                        print(f"  \033[93m⏳ Enabled auto-merge for {label}\033[0m")
+                    case _:
+                        print(
+                            f"  \033[91m✗ Failed to merge {label}: {result.message}\033[0m"
+                        )
+
             print("\nMerging pull requests...")
-            for name, fullname, pr in ready_to_merge_all:
-                num = pr.get("number")
-                print(f"Merging {name} #{num}...")
-                success, err_msg = github_client.merge_pr(fullname, num)
-                if success:
-                    print(f"  \033[92m✓ Successfully merged {name} #{num}\033[0m")
-                else:
-                    print(
-                        f"  \033[91m✗ Failed to merge {name} #{num}: {err_msg}\033[0m"
-                    )
+            MergeScheduler(github_client, auto_merge=auto_merge).run(
+                merge_requests, report
+            )
             print()
             return
 
@@ -536,12 +1101,11 @@ class PrsAction:
                 open_cnt = ready_cnt + pending_cnt + attention_cnt
                 oldest_age = "-"
 
-                created_times = []
-                for pr in groups["ready"] + groups["pending"] + groups["attention"]:
-                    created_at = pr.get("createdAt")
-                    if created_at:
-                        created_times.append(created_at)
-
+                created_times = [
+                    pr.created_at
+                    for pr in groups["ready"] + groups["pending"] + groups["attention"]
+                    if pr.created_at
+                ]
                 if created_times:
                     oldest_age = format_age(min(created_times))
 
@@ -551,62 +1115,42 @@ class PrsAction:
             print()
             return
 
+        if by_package:
+            print_package_index(DependencyIndex.from_repos(repos_data))
+            return
+
         # Handle default print view
-        has_prs = False
-        for name, fullname, groups in repos_data:
-            if not (groups["ready"] or groups["pending"] or groups["attention"]):
-                continue
-            has_prs = True
-            print(f"\n\033[1m{name}\033[0m:")
-
-            def print_pr_list(prs: list[dict], prefix: str):
-                for pr in prs:
-                    num = pr.get("number")
-                    title = pr.get("title")
-                    author_login = pr.get("author", {}).get("login", "unknown")
-                    checks_list = pr.get("statusCheckRollup", [])
-                    ci_str = get_ci_status(checks_list, color=True)
-                    age = format_age(pr.get("createdAt", ""))
-
-                    m_state = pr.get("mergeable", "UNKNOWN")
-                    m_status = pr.get("mergeStateStatus", "UNKNOWN")
-                    rev_decision = pr.get("reviewDecision", "")
-                    is_draft = pr.get("isDraft", False)
-                    has_rej_files = pr.get("has_rej_files", False)
-                    is_major = pr.get("is_major", False)
-                    is_security = pr.get("is_security", False)
-
-                    details = []
-                    if is_draft:
-                        details.append("\033[93mDraft\033[0m")
-                    if is_major:
-                        details.append("\033[93mMAJOR UPGRADE\033[0m")
-                    if is_security:
-                        details.append("\033[92mSECURITY\033[0m")
-                    if m_state == "CONFLICTING" or m_status == "DIRTY":
-                        details.append("\033[91mCONFLICT\033[0m")
-                    if has_rej_files:
-                        details.append("\033[91mREJECT FILES\033[0m")
-                    if rev_decision == "REVIEW_REQUIRED":
-                        details.append("\033[93mNeeds Review\033[0m")
-                    elif rev_decision == "CHANGES_REQUESTED":
-                        details.append("\033[91mChanges Requested\033[0m")
-                    elif rev_decision == "APPROVED":
-                        details.append("\033[92mApproved\033[0m")
-
-                    details_str = f" [{', '.join(details)}]" if details else ""
-                    print(
-                        f"  {prefix} #{num:<4} {title} [@{author_login}] ({age}) - {ci_str}{details_str}"
-                    )
+        print_pr_groups(repos_data)
+
+    def _watch(
+        self,
+        repos: list[Repo],
+        manifest_user: str,
+        github_client: GitHubClient,
+        classify: Callable[[str], Groups | None],
+    ) -> None:
+        """Redraw the PR view in place as repos change until interrupted."""
+        session = (
+            github_client.session
+            if isinstance(github_client, RestGitHubClient)
+            else GitHubSession()
+        )
+        watcher = PrWatcher(
+            session,
+            classify,
+            [(r.name, f"{r.user or manifest_user}/{r.name}") for r in repos],
+        )
 
-            if groups["ready"]:
-                print_pr_list(groups["ready"], "🟢")
-            if groups["pending"]:
-                print_pr_list(groups["pending"], "🟡")
-            if groups["attention"]:
-                print_pr_list(groups["attention"], "🔴")
+        def render(repos_data: list[tuple[str, str, Groups]]) -> None:
+            if sys.stdout.isatty():
+                print("\033[H\033[2J", end="")
+            print(
+                f"[{time.strftime('%H:%M:%S')}] Watching {len(repos)} repos "
+                "(Ctrl-C to exit)"
+            )
+            print_pr_groups(repos_data)
 
-        if not has_prs:
-            print("\nNo open pull requests found matching the criteria.\n")
-        else:
-            print()
+        try:
+            watcher.watch(render)
+        except KeyboardInterrupt:
+            pass
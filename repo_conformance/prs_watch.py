@@ -0,0 +1,138 @@
+"""Library for keeping the open PRs of each repo up to date by polling.
+
+Each repo is polled with conditional requests (`If-None-Match`) for its open
+pull requests, and for the check runs of PRs whose CI is still pending. GitHub
+answers unchanged resources with `304 Not Modified`, which does not count
+against the rate limit, and only repos with changes are classified again.
+Repos that change are polled at the minimum interval, and quiet repos back
+off up to the maximum interval.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from .exceptions import CheckError
+from .github_api import GitHubApiError, GitHubSession
+from .pr_record import CiState, Groups
+
+_LOGGER = logging.getLogger(__name__)
+
+MIN_INTERVAL = 30.0
+MAX_INTERVAL = 300.0
+TICK = 1.0
+
+
+@dataclass
+class _RepoState:
+    """Polling state of a single repo."""
+
+    name: str
+    fullname: str
+    interval: float
+    groups: Groups | None = None
+    etag: str | None = None
+    check_etags: dict[str, str | None] = field(default_factory=dict)
+    next_poll: float = 0.0
+
+
+class PrWatcher:
+    """Polls repos for PR changes and reclassifies the ones that changed."""
+
+    def __init__(
+        self,
+        session: GitHubSession,
+        classify: Callable[[str], Groups | None],
+        repos: list[tuple[str, str]],
+        min_interval: float = MIN_INTERVAL,
+        max_interval: float = MAX_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize PrWatcher."""
+        self._session = session
+        self._classify = classify
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._clock = clock
+        self._repos = [
+            _RepoState(name=name, fullname=fullname, interval=min_interval)
+            for name, fullname in repos
+        ]
+
+    @property
+    def repos_data(self) -> list[tuple[str, str, Groups]]:
+        """Return the latest grouped PRs of each repo."""
+        return [
+            (state.name, state.fullname, state.groups)
+            for state in self._repos
+            if state.groups is not None
+        ]
+
+    def _modified(self, path: str, etag: str | None) -> tuple[bool, str | None]:
+        """Return if a resource changed since the etag, and its new etag."""
+        headers = {"If-None-Match": etag} if etag else None
+        resp = self._session.request("GET", path, headers=headers)
+        if resp.status == 304:
+            return False, etag
+        return etag is not None, resp.headers.get("etag")
+
+    def _poll_repo(self, state: _RepoState) -> bool:
+        changed, state.etag = self._modified(
+            f"/repos/{state.fullname}/pulls?state=open&per_page=100", state.etag
+        )
+        for sha, etag in state.check_etags.items():
+            checks_changed, state.check_etags[sha] = self._modified(
+                f"/repos/{state.fullname}/commits/{sha}/check-runs?per_page=100", etag
+            )
+            changed = changed or checks_changed
+
+        if changed or state.groups is None:
+            _LOGGER.debug("Pull requests changed for %s", state.fullname)
+            state.groups = self._classify(state.fullname) or {
+                "ready": [],
+                "pending": [],
+                "attention": [],
+            }
+            state.check_etags = {
+                pr.head_sha: state.check_etags.get(pr.head_sha)
+                for prs in state.groups.values()
+                for pr in prs
+                if pr.ci == CiState.PENDING and pr.head_sha
+            }
+            changed = True
+
+        if changed or state.check_etags:
+            state.interval = self._min_interval
+        else:
+            state.interval = min(state.interval * 2, self._max_interval)
+        return changed
+
+    def poll(self) -> bool:
+        """Poll the repos that are due, returning True if any changed."""
+        changed = False
+        for state in self._repos:
+            if self._clock() < state.next_poll:
+                continue
+            try:
+                changed = self._poll_repo(state) or changed
+            except (GitHubApiError, CheckError, OSError) as err:
+                _LOGGER.warning("Unable to poll %s: %s", state.fullname, err)
+                state.interval = min(state.interval * 2, self._max_interval)
+            state.next_poll = self._clock() + state.interval
+        return changed
+
+    def watch(
+        self,
+        render: Callable[[list[tuple[str, str, Groups]]], None],
+        stop: threading.Event | None = None,
+        tick: float = TICK,
+    ) -> None:
+        """Poll until stopped, rendering whenever a repo changes."""
+        stop = stop or threading.Event()
+        self.poll()
+        render(self.repos_data)
+        while not stop.wait(tick):
+            if self.poll():
+                render(self.repos_data)
@@ -0,0 +1,124 @@
+"""Library for pacing GitHub API calls across every process on the host.
+
+Parallel invocations of the tool share the same GitHub quota, so the token
+bucket lives in a file in the local state directory and is updated under an
+exclusive file lock. Each call takes a token before contacting GitHub, and
+the bucket is corrected from the `X-RateLimit-*` headers observed in
+responses so it tracks the real remaining quota. The bucket holds up to the
+hourly limit and refills at the limit per hour; when the quota is exhausted
+calls wait until GitHub resets it.
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Generator, Mapping
+from contextlib import contextmanager
+from typing import Any
+
+from . import deadline
+from .state import state_dir
+
+_LOGGER = logging.getLogger(__name__)
+
+API_HOST = "api.github.com"
+
+AUTHENTICATED_LIMIT = 5000
+UNAUTHENTICATED_LIMIT = 60
+WINDOW = 3600.0
+"""GitHub quotas are a number of calls per hour."""
+
+
+def github_token() -> str | None:
+    """Return the GitHub token from the environment, if any."""
+    return os.environ.get("GH_TOKEN") or os.environ.get("GITHUB_TOKEN")
+
+
+class TokenBucket:
+    """Token bucket persisted in a locked file shared between processes."""
+
+    def __init__(self, host: str, identity: str, limit: int) -> None:
+        """Initialize TokenBucket."""
+        key = hashlib.sha256(f"{host}\0{identity}".encode()).hexdigest()[:16]
+        self._name = f"ratelimit-{key}.json"
+        self._default_limit = limit
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _state(self) -> Generator[dict[str, Any]]:
+        """Yield the refilled bucket state, saving changes under the file lock."""
+        path = state_dir() / self._name
+        with self._lock, open(os.open(path, os.O_RDWR | os.O_CREAT), "r+") as fd:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                state = json.loads(fd.read() or "{}")
+            except ValueError:
+                state = {}
+            now = time.time()
+            limit = state.get("limit", self._default_limit)
+            tokens = state.get("tokens", float(limit))
+            elapsed = max(now - state.get("updated", now), 0)
+            if now >= state.get("reset", 0):
+                tokens = min(float(limit), tokens + elapsed * limit / WINDOW)
+            state.update(limit=limit, tokens=tokens, updated=now)
+            yield state
+            fd.seek(0)
+            fd.truncate()
+            fd.write(json.dumps(state))
+
+    def acquire(self) -> None:
+        """Take a token, waiting until one is available."""
+        while True:
+            with self._state() as state:
+                if state["tokens"] >= 1:
+                    state["tokens"] -= 1
+                    return
+                wait = (1 - state["tokens"]) * WINDOW / state["limit"]
+                wait = max(wait, state.get("reset", 0) - state["updated"])
+            _LOGGER.debug("Rate limited; waiting %.2fs for a token", wait)
+            time.sleep(deadline.timeout(wait))
+
+    def observe(self, remaining: int, reset: float, limit: int | None = None) -> None:
+        """Correct the bucket from the quota reported by GitHub.
+
+        The `reset` is the epoch time when GitHub resets the quota.
+        """
+        with self._state() as state:
+            if limit:
+                state["limit"] = limit
+            state["tokens"] = float(max(remaining, 0))
+            # An exhausted quota does not refill until GitHub resets it
+            state["reset"] = reset if remaining <= 0 else 0
+
+    def observe_headers(self, headers: Mapping[str, str]) -> None:
+        """Adjust the bucket from the `X-RateLimit-*` response headers."""
+        lower = {key.lower(): value for key, value in headers.items()}
+        try:
+            remaining = int(lower["x-ratelimit-remaining"])
+            reset = float(lower["x-ratelimit-reset"])
+            limit = int(lower.get("x-ratelimit-limit", 0))
+        except (KeyError, ValueError):
+            return
+        self.observe(remaining, reset, limit)
+
+
+_BUCKETS: dict[tuple[str, str], TokenBucket] = {}
+_BUCKETS_LOCK = threading.Lock()
+
+
+def bucket(authenticated: bool = True, host: str = API_HOST) -> TokenBucket:
+    """Return the token bucket shared by all callers using the same quota.
+
+    Authenticated calls share the quota of the token in the environment, or
+    of the token stored by the `gh` CLI when there is none.
+    """
+    identity = (github_token() or "gh") if authenticated else "anonymous"
+    with _BUCKETS_LOCK:
+        if (result := _BUCKETS.get((host, identity))) is None:
+            limit = AUTHENTICATED_LIMIT if authenticated else UNAUTHENTICATED_LIMIT
+            result = _BUCKETS[(host, identity)] = TokenBucket(host, identity, limit)
+        return result
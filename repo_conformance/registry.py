@@ -2,12 +2,27 @@
 
 This is generic in that it can support different types of inputs/outputs
 so that you can have checks at various levels (e.g. reusing state).
+
+The result of every check that runs is passed to the listener set with
+`record_checks` for the current thread, e.g. to store the history of runs.
+
+A run may be limited to a selection of checks, such as the checks that failed
+in a previous run. The selection applies to the checks of nested registries
+run by the selected checks as well.
 """
 
+import fnmatch
+import inspect
 import logging
-from collections.abc import Callable
-from typing import TypeVar
+import time
+from collections.abc import Callable, Collection, Generator, Iterable, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Concatenate, TypeVar
 
+from . import deadline, tracing
+from .cost import Cost
 from .exceptions import CheckError, Failure
 from .manifest import Repo
 
@@ -15,7 +30,109 @@ _LOGGER = logging.getLogger(__name__)
 
 
 T = TypeVar("T")
-Check = Callable[[Repo, T], None]
+Check = Callable[Concatenate[Repo, T, ...], None]
+Fixture = Callable[Concatenate[Repo, T, ...], Any]
+
+
+@dataclass
+class CheckInfo:
+    """Description of a registered check for a specific target."""
+
+    name: str
+    """Name of the check."""
+
+    default: bool
+    """True if the check runs unless excluded."""
+
+    cost: Cost
+    """The cost class of the check."""
+
+    network_calls: int
+    """Estimated network calls made by the check itself."""
+
+    children: list["CheckInfo"] = field(default_factory=list)
+    """Checks in a nested registry run by this check."""
+
+
+@dataclass
+class CheckRun:
+    """The result of running a single check against a repo."""
+
+    repo: str
+    """Name of the repo that was checked."""
+
+    check: str
+    """Name of the check, with nested checks as `worktree/cruft`."""
+
+    started: float
+    """The time.time() value when the check started."""
+
+    duration: float = 0.0
+    """Seconds the check took to run."""
+
+    failures: list[Failure] = field(default_factory=list)
+    """Failures reported by the check."""
+
+    upstream_sha: str | None = None
+    """The upstream commit the repo was compared against, if any."""
+
+
+CheckListener = Callable[[CheckRun], None]
+
+_LISTENER: ContextVar[CheckListener | None] = ContextVar("check_listener", default=None)
+_CURRENT: ContextVar[CheckRun | None] = ContextVar("check_run", default=None)
+_ONLY: ContextVar[Collection[str] | None] = ContextVar("check_only", default=None)
+
+
+@contextmanager
+def record_checks(listener: CheckListener | None) -> Generator[None]:
+    """Pass the result of each check run in this context to the listener."""
+    token = _LISTENER.set(listener)
+    try:
+        yield
+    finally:
+        _LISTENER.reset(token)
+
+
+def record_upstream(sha: str) -> None:
+    """Record the upstream commit the running check compared the repo against."""
+    if (run := _CURRENT.get()) is not None:
+        run.upstream_sha = sha
+
+
+def _requested_fixtures(func: Callable[..., Any]) -> list[str]:
+    """Return the fixture names requested after the (target, context) arguments."""
+    return list(inspect.signature(func).parameters)[2:]
+
+
+class _FixtureScope[T]:
+    """Lazily computed fixture values memoized for a single target."""
+
+    def __init__(self, registry: "CheckRegistry[T]", target: Repo, context: T) -> None:
+        self._registry = registry
+        self._target = target
+        self._context = context
+        self._values: dict[str, Any] = {}
+        self._errors: dict[str, CheckError] = {}
+
+    def resolve(self, names: list[str]) -> list[Any]:
+        """Return the values for the named fixtures."""
+        return [self._get(name) for name in names]
+
+    def _get(self, name: str) -> Any:
+        if name in self._errors:
+            raise self._errors[name]
+        if name not in self._values:
+            if (fixture := self._registry._fixtures.get(name)) is None:
+                raise ValueError(f"Misconfiguration with unknown fixture '{name}'")
+            args = self.resolve(self._registry._requests[name])
+            _LOGGER.debug("Computing fixture %s for %s", name, self._target)
+            try:
+                self._values[name] = fixture(self._target, self._context, *args)
+            except CheckError as err:
+                self._errors[name] = err
+                raise
+        return self._values[name]
 
 
 class CheckRegistry[T]:
@@ -24,49 +141,224 @@ class CheckRegistry[T]:
     Typically using includes instantiating an instance of this object
     to register a specific type of check, then adding a decorator of
     the register method for each check.
+
+    Expensive resources shared by several checks are registered with the
+    fixture decorator. A check (or another fixture) requests a fixture by
+    naming it as an argument after the (target, context) arguments, and
+    each fixture is computed at most once per target.
     """
 
     def __init__(self) -> None:
         """Initialize a CheckRegistry."""
         self._registry: dict[str, Check[T]] = {}
         self._default: dict[str, bool] = {}
+        self._paths: dict[str, list[str] | None] = {}
+        self._fixtures: dict[str, Fixture[T]] = {}
+        self._requests: dict[str, list[str]] = {}
+        self._cost: dict[str, Cost | Callable[[Repo], Cost]] = {}
+        self._network_calls: dict[str, int | Callable[[Repo], int]] = {}
+        self._nested: dict[str, CheckRegistry[Any]] = {}
 
-    def register(self, default: bool = True) -> Callable[[Check[T]], Check[T]]:
-        """Class method to register a check."""
+    def register(
+        self,
+        default: bool = True,
+        paths: list[str] | None = None,
+        cost: Cost | Callable[[Repo], Cost] = Cost.LOCAL,
+        network_calls: int | Callable[[Repo], int] = 0,
+        nested: "CheckRegistry[Any] | None" = None,
+    ) -> Callable[[Check[T]], Check[T]]:
+        """Class method to register a check.
+
+        The `paths` are glob patterns relative to the worktree of the files
+        the check reads. A check without paths is assumed to depend on
+        every file.
+
+        The `cost` and `network_calls` may be functions of the target repo
+        when they depend on its configuration (e.g. a local worktree). A
+        check that runs the checks of another registry names it as `nested`
+        so that its cost is included in estimates.
+        """
 
         def wrapper(wrapped_class: Check[T]) -> Check:
             name = getattr(wrapped_class, "__name__", str(wrapped_class))
-            if name in self._registry:
+            if name in self._registry or name in self._fixtures:
                 raise ValueError(
                     f"Misconfiguration with duplicate registry entry '{name}'"
                 )
             self._registry[name] = wrapped_class
             self._default[name] = default
+            self._paths[name] = paths
+            self._requests[name] = _requested_fixtures(wrapped_class)
+            self._cost[name] = cost
+            self._network_calls[name] = network_calls
+            if nested is not None:
+                self._nested[name] = nested
             return wrapped_class
 
         return wrapper
 
-    def run_checks(self, target: Repo, context: T) -> list[Failure]:
-        """Run checks against the target object."""
+    def fixture(self) -> Callable[[Fixture[T]], Fixture[T]]:
+        """Class method to register a fixture shared between checks."""
+
+        def wrapper(wrapped: Fixture[T]) -> Fixture[T]:
+            name = getattr(wrapped, "__name__", str(wrapped))
+            if name in self._fixtures or name in self._registry:
+                raise ValueError(
+                    f"Misconfiguration with duplicate registry entry '{name}'"
+                )
+            self._fixtures[name] = wrapped
+            self._requests[name] = _requested_fixtures(wrapped)
+            return wrapped
+
+        return wrapper
+
+    def enabled_checks(
+        self, target: Repo, only: Collection[str] | None = None
+    ) -> list[str]:
+        """Return the names of the checks that will run against the target.
+
+        When `only` is set, the checks are limited to those names.
+        """
         exclude = set(target.checks.exclude)
         include = set(target.checks.include)
+        if only is None:
+            only = _ONLY.get()
+        max_cost = target.checks.max_cost
+        return [
+            name
+            for name in self._registry
+            if name not in exclude
+            and (self._default[name] or name in include)
+            and (only is None or name in only)
+            and (max_cost is None or self.cost(name, target).rank <= max_cost.rank)
+        ]
+
+    def rerun_checks(self, paths: Iterable[Sequence[str]]) -> set[str] | None:
+        """Return the checks to run again to reproduce each failure path.
+
+        A path is the failure names below the repo, e.g. `("worktree", "cruft")`.
+        A failure of a check with nested checks, rather than of one of its
+        nested checks, reruns all of them. Returns None if a path does not
+        name a check, such as a failure of the whole repo.
+        """
+        result: set[str] = set()
+        for path in paths:
+            if not path or path[0] not in self._registry:
+                return None
+            result.add(path[0])
+            if (nested := self._nested.get(path[0])) is not None:
+                names = nested.rerun_checks([path[1:]]) if path[1:] else None
+                result |= set(nested._registry) if names is None else names
+        return result
+
+    def cost(self, name: str, target: Repo) -> Cost:
+        """Return the cost class of the check for the target."""
+        cost = self._cost[name]
+        return cost if isinstance(cost, Cost) else cost(target)
+
+    def describe(self, target: Repo) -> list[CheckInfo]:
+        """Describe every registered check as it applies to the target."""
+        result = []
+        for name in self._registry:
+            calls = self._network_calls[name]
+            nested = self._nested.get(name)
+            result.append(
+                CheckInfo(
+                    name=name,
+                    default=self._default[name],
+                    cost=self.cost(name, target),
+                    network_calls=calls if isinstance(calls, int) else calls(target),
+                    children=nested.describe(target) if nested else [],
+                )
+            )
+        return result
+
+    def estimate_network_calls(
+        self, target: Repo, only: Collection[str] | None = None
+    ) -> int:
+        """Return the estimated network calls to run the enabled checks."""
+        total = 0
+        for name in self.enabled_checks(target, only):
+            calls = self._network_calls[name]
+            total += calls if isinstance(calls, int) else calls(target)
+            if nested := self._nested.get(name):
+                total += nested.estimate_network_calls(target, only)
+        return total
+
+    def dependent_checks(self, changed_paths: Iterable[str]) -> set[str]:
+        """Return the names of the checks that read any of the changed paths."""
+        changed = list(changed_paths)
+        result = set()
+        for name, patterns in self._paths.items():
+            if patterns is None or any(
+                fnmatch.fnmatch(path, pattern)
+                for path in changed
+                for pattern in patterns
+            ):
+                result.add(name)
+        return result
+
+    def run_checks(
+        self, target: Repo, context: T, only: Collection[str] | None = None
+    ) -> list[Failure]:
+        """Run checks against the target object.
+
+        When `only` is set, only those checks run, including in the nested
+        registries of the checks. Otherwise the selection of the run of an
+        enclosing registry applies.
+        """
+        if only is not None:
+            token = _ONLY.set(only)
+            try:
+                return self.run_checks(target, context)
+            finally:
+                _ONLY.reset(token)
         _LOGGER.debug(
             "Checking %s (exclude_checks=%s, include_checks=%s)",
             target,
-            exclude,
-            include,
+            target.checks.exclude,
+            target.checks.include,
         )
         errors = []
-        for name, check in self._registry.items():
-            if name in exclude:
-                continue
-            if not self._default[name] and name not in include:
+        fixtures = _FixtureScope(self, target, context)
+        listener = _LISTENER.get()
+        for name in self.enabled_checks(target):
+            check = self._registry[name]
+            if (timed_out := deadline.expired()) is not None:
+                errors.extend(error.of(name) for error in timed_out.errors)
                 continue
-
+            check_deadline = None
+            if (timeout := target.checks.timeouts.get(name)) is not None:
+                check_deadline = deadline.Deadline.after(
+                    timeout, f"{name} timeout of {timeout}s"
+                )
             _LOGGER.debug("Checking %s on %s", name, target)
-            try:
-                check(target, context)
-            except CheckError as err:
-                for error in err.errors:
-                    errors.append(error.of(name))
+            run = None
+            if listener is not None:
+                parent = _CURRENT.get()
+                run = CheckRun(
+                    repo=target.name,
+                    check=f"{parent.check}/{name}" if parent else name,
+                    started=time.time(),
+                )
+            token = _CURRENT.set(run)
+            start = time.monotonic()
+            failures: list[Failure] = []
+            with (
+                deadline.scope(check_deadline),
+                tracing.span(name, "check", repo=target.name),
+            ):
+                try:
+                    check(target, context, *fixtures.resolve(self._requests[name]))
+                except CheckError as err:
+                    # Report a timeout rather than the error from the operation
+                    # that was interrupted by the deadline.
+                    failures = (deadline.expired() or err).errors
+                    errors.extend(error.of(name) for error in failures)
+                finally:
+                    _CURRENT.reset(token)
+            if listener is not None and run is not None:
+                run.duration = time.monotonic() - start
+                run.failures = failures
+                listener(run)
         return errors
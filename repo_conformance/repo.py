@@ -9,6 +9,7 @@ from typing import Any
 import yaml
 
 from .check import CheckAction
+from .history import HistoryAction
 from .list import ListAction
 from .list_repos import ListReposAction
 from .prs import PrsAction
@@ -47,6 +48,7 @@ def main() -> None:
     CheckAction.register(subparsers)
     UpdateRepoAction.register(subparsers)
     PrsAction.register(subparsers)
+    HistoryAction.register(subparsers)
 
     args = parser.parse_args()
     if args.log_level:
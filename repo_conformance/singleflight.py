@@ -0,0 +1,121 @@
+"""Library for coalescing concurrent identical calls into a single call.
+
+When several threads (or asyncio tasks) ask for the same key at the same
+time, only the first runs the underlying function and the rest wait for it
+and share its result or its error. Unlike a cache, nothing is remembered
+once the call completes, so this is typically combined with a cache to
+prevent a stampede of concurrent misses.
+
+Calls are only shared by tasks of the same event loop. A call that fails
+because the deadline of its caller passed, or because its task was cancelled,
+is not shared; the waiting callers make the call again themselves.
+"""
+
+import asyncio
+import functools
+import threading
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, cast
+
+from . import deadline
+from .exceptions import DeadlineExceeded
+
+
+class _Call:
+    """An in-flight call shared by concurrent callers."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight[V]:
+    """Coalesces concurrent calls for the same key."""
+
+    def __init__(self) -> None:
+        """Initialize SingleFlight."""
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self._futures: dict[
+            tuple[asyncio.AbstractEventLoop, Hashable], asyncio.Future[V]
+        ] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], V]) -> V:
+        """Call fn, or wait for an in-flight call with the same key."""
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if call is None:
+                    call = self._calls[key] = _Call()
+            if leader:
+                return self._lead(key, call, fn)
+            current = deadline.current()
+            if not call.done.wait(current.remaining() if current else None):
+                raise cast(deadline.Deadline, current).error()
+            if isinstance(call.error, DeadlineExceeded):
+                continue
+            if call.error is not None:
+                raise call.error
+            return cast(V, call.result)
+
+    def _lead(self, key: Hashable, call: _Call, fn: Callable[[], V]) -> V:
+        try:
+            call.result = fn()
+            return cast(V, call.result)
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[V]]) -> V:
+        """Await fn, or wait for an in-flight call in this loop with the same key."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                future = self._futures.get((loop, key))
+                if future is None:
+                    future = self._futures[(loop, key)] = loop.create_future()
+                    break
+            try:
+                return await asyncio.shield(future)
+            except DeadlineExceeded:
+                continue
+            except asyncio.CancelledError:
+                # Only the leader was cancelled, not this task
+                task = asyncio.current_task()
+                if future.cancelled() and not (task and task.cancelling()):
+                    continue
+                raise
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as err:
+            future.set_exception(err)
+            # Mark the error as retrieved in case there are no waiters
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._futures[(loop, key)]
+
+
+def single_flight[**P, R](func: Callable[P, R]) -> Callable[P, R]:
+    """Decorator to coalesce concurrent calls with the same arguments."""
+    group = SingleFlight[R]()
+
+    @functools.wraps(func)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        key = (args, tuple(sorted(kwargs.items())))
+        return group.do(key, lambda: func(*args, **kwargs))
+
+    return wrapper
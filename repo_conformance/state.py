@@ -0,0 +1,44 @@
+"""Library for persisting local state between runs of the tool."""
+
+import json
+import os
+import pathlib
+import tempfile
+from typing import Any
+
+STATE_DIR_ENV = "REPO_CONFORMANCE_STATE_DIR"
+"""Environment variable to override the local state directory."""
+
+
+def state_dir() -> pathlib.Path:
+    """Return the directory used for local state, creating it if needed."""
+    if override := os.environ.get(STATE_DIR_ENV):
+        path = pathlib.Path(override)
+    else:
+        base = os.environ.get("XDG_STATE_HOME") or pathlib.Path.home() / ".local/state"
+        path = pathlib.Path(base) / "repo-conformance"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def load_json(name: str) -> Any:
+    """Load a json state file, returning None if it does not exist or is invalid."""
+    path = state_dir() / name
+    try:
+        with path.open("r") as fd:
+            return json.load(fd)
+    except (OSError, ValueError):
+        return None
+
+
+def save_json(name: str, data: Any) -> None:
+    """Atomically write a json state file."""
+    path = state_dir() / name
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{name}.")
+    try:
+        with os.fdopen(fd, "w") as tmp_fd:
+            json.dump(data, tmp_fd)
+        os.replace(tmp, path)
+    except BaseException:
+        pathlib.Path(tmp).unlink(missing_ok=True)
+        raise
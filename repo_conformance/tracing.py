@@ -0,0 +1,116 @@
+"""Library for recording a timeline of a run in Chrome trace event format.
+
+Spans are recorded around checks, network calls and subprocesses from every
+worker thread while a trace is active, and written as a JSON file that can be
+opened in a trace viewer such as https://ui.perfetto.dev or chrome://tracing.
+Each thread is shown as its own track, so the repo or call on the critical
+path of a run is visible directly.
+
+When no trace is active `span` returns a shared no-op context manager, so
+instrumented code pays only for a global lookup.
+"""
+
+import json
+import logging
+import os
+import pathlib
+import threading
+import time
+from collections.abc import Generator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+_DISABLED = nullcontext()
+
+
+class Tracer:
+    """Collects trace events from all threads."""
+
+    def __init__(self) -> None:
+        """Initialize Tracer."""
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._events: list[dict[str, Any]] = []
+        self._threads: set[int] = set()
+
+    @contextmanager
+    def span(self, name: str, category: str, **args: Any) -> Generator[None]:
+        """Record the enclosed block as a complete event."""
+        start = time.perf_counter_ns()
+        try:
+            yield
+        except BaseException as err:
+            args["error"] = repr(err)
+            raise
+        finally:
+            end = time.perf_counter_ns()
+            self._add(name, category, start, end, args)
+
+    def _add(
+        self, name: str, category: str, start: int, end: int, args: dict[str, Any]
+    ) -> None:
+        thread = threading.current_thread()
+        tid = thread.ident or 0
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": start / 1000,
+            "dur": (end - start) / 1000,
+            "pid": self._pid,
+            "tid": tid,
+            "args": args,
+        }
+        with self._lock:
+            if tid not in self._threads:
+                self._threads.add(tid)
+                self._events.append(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": self._pid,
+                        "tid": tid,
+                        "args": {"name": thread.name},
+                    }
+                )
+            self._events.append(event)
+
+    @property
+    def events(self) -> list[dict[str, Any]]:
+        """Return the recorded events."""
+        with self._lock:
+            return list(self._events)
+
+    def write(self, path: pathlib.Path) -> None:
+        """Write the recorded events as a trace file."""
+        data = {"traceEvents": self.events, "displayTimeUnit": "ms"}
+        path.write_text(json.dumps(data, default=str))
+
+
+_TRACER: Tracer | None = None
+
+
+def span(name: str, category: str, **args: Any) -> AbstractContextManager[None]:
+    """Return a context manager recording the enclosed block in the trace."""
+    if (tracer := _TRACER) is None:
+        return _DISABLED
+    return tracer.span(name, category, **args)
+
+
+@contextmanager
+def trace_to(path: pathlib.Path | None) -> Generator[None]:
+    """Record the spans of every thread in the enclosed block to the file."""
+    global _TRACER
+    if path is None:
+        yield
+        return
+    tracer = _TRACER = Tracer()
+    try:
+        with tracer.span("run", "run"):
+            yield
+    finally:
+        _TRACER = None
+        tracer.write(path)
+        _LOGGER.info("Wrote %d trace events to %s", len(tracer.events), path)
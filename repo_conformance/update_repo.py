@@ -14,6 +14,9 @@ from typing import cast
 import git
 import scruft
 
+from . import ratelimit, tracing
+from .github_api import GitHubSession, observe_gh_rate_limit
+from .journal import Journal, JournalEntry
 from .manifest import Repo, parse_manifest
 
 _LOGGER = logging.getLogger(__name__)
@@ -24,6 +27,9 @@ PR_TITLE = "Apply cruft updates"
 PR_BODY = "Automatically generated PR from `repo-conformance` to apply updates using `scruft`."
 COMMIT_MSG = "Apply cruft updates"
 
+UPDATED = "updated"
+UP_TO_DATE = "up to date"
+
 
 @contextmanager
 def repo_working_dir(repo: Repo, worktree: pathlib.Path | None) -> Generator[git.Repo]:
@@ -40,7 +46,8 @@ def repo_working_dir(repo: Repo, worktree: pathlib.Path | None) -> Generator[git
         )
         if not origin.exists():
             raise ValueError("Failure to setup repo origin")
-        origin.fetch()
+        with tracing.span("git fetch", "git", repo=repo.name):
+            origin.fetch()
         if not origin.refs.main:
             raise ValueError("Git repo does not have main branch")
         main = git_repo.create_head("main", origin.refs.main)
@@ -50,15 +57,22 @@ def repo_working_dir(repo: Repo, worktree: pathlib.Path | None) -> Generator[git
         yield git_repo
 
 
-def verify_gh_auth() -> None:
+def verify_gh_auth(session: GitHubSession | None = None) -> None:
     """Verify the user is logged into the Github CLI."""
     _LOGGER.debug("Verifying user is logged into Github CLI")
-    result = run(
-        ["gh", "auth", "status"],
-        check=True,
-        capture_output=True,
-    )
+    if session is not None:
+        if not session.check_auth():
+            raise ValueError("Unable to authenticate with the GitHub API")
+        return
+    ratelimit.bucket().acquire()
+    with tracing.span("gh auth status", "subprocess"):
+        result = run(
+            ["gh", "auth", "status"],
+            check=True,
+            capture_output=True,
+        )
     _LOGGER.debug("gh auth status: %s", result.stdout.decode())
+    observe_gh_rate_limit()
 
 
 def create_cruft_branch(git_repo: git.Repo) -> None:
@@ -76,7 +90,9 @@ def apply_updates(git_repo: git.Repo) -> None:
     """Perform cruft updates in the github repository."""
     _LOGGER.debug("Applying changes from cruft")
     working_dir = pathlib.Path(git_repo.working_dir)
-    if not scruft.update(working_dir):
+    with tracing.span("scruft.update", "subprocess"):
+        updated = scruft.update(working_dir)
+    if not updated:
         raise ValueError("Cruft update failed")
 
 
@@ -88,28 +104,40 @@ def commit_changes(git_repo: git.Repo, comit_message: str) -> None:
     git_repo.index.commit(comit_message)
 
 
-def push_and_create_pr(git_repo: git.Repo, dry_run: bool = False) -> str:
-    git_repo.remote().push(refspec=f"{CRUFT_BRANCH}:{CRUFT_BRANCH}", force=True)
+def push_and_create_pr(
+    git_repo: git.Repo,
+    dry_run: bool = False,
+    session: GitHubSession | None = None,
+    repo_fullname: str | None = None,
+) -> str:
+    with tracing.span("git push", "git"):
+        git_repo.remote().push(refspec=f"{CRUFT_BRANCH}:{CRUFT_BRANCH}", force=True)
     _LOGGER.info("Branch '%s' pushed to remote.", CRUFT_BRANCH)
     _LOGGER.info("Creating PR")
-    result = run(
-        [
-            "gh",
-            "pr",
-            "create",
-            "--title",
-            PR_TITLE,
-            "--body",
-            PR_BODY,
-            "--head",
-            CRUFT_BRANCH,
-            "--base",
-            "main",
-        ],
-        cwd=str(git_repo.working_dir),
-        check=False,
-        capture_output=True,
-    )
+    if session is not None and repo_fullname is not None:
+        return session.create_pull_request(
+            repo_fullname, PR_TITLE, PR_BODY, head=CRUFT_BRANCH, base="main"
+        )
+    ratelimit.bucket().acquire()
+    with tracing.span("gh pr create", "subprocess"):
+        result = run(
+            [
+                "gh",
+                "pr",
+                "create",
+                "--title",
+                PR_TITLE,
+                "--body",
+                PR_BODY,
+                "--head",
+                CRUFT_BRANCH,
+                "--base",
+                "main",
+            ],
+            cwd=str(git_repo.working_dir),
+            check=False,
+            capture_output=True,
+        )
     if result.returncode != 0:
         stderr_decoded = result.stderr.decode()
         if "already exists" in stderr_decoded:
@@ -149,21 +177,57 @@ class UpdateRepoAction:
             default=False,
             action=BooleanOptionalAction,
         )
+        args.add_argument(
+            "--resume",
+            help="Skip repos finished by the previous interrupted run",
+            default=False,
+            action=BooleanOptionalAction,
+        )
+        args.add_argument(
+            "--trace",
+            help="Write a timeline of the run in Chrome trace event format",
+            type=pathlib.Path,
+            required=False,
+        )
+        args.add_argument(
+            "--backend",
+            help="Call GitHub through the `gh` CLI or in-process over the API",
+            choices=["gh", "rest"],
+            default="gh",
+        )
         args.set_defaults(cls=UpdateRepoAction)
         return args
 
-    def run(
+    def run(  # type: ignore[no-untyped-def]
+        self,
+        trace: pathlib.Path | None = None,
+        **kwargs,
+    ) -> None:
+        """Action implementation, optionally recording a trace of the run."""
+        with tracing.trace_to(trace):
+            self._run(**kwargs)
+
+    def _run(
         self,
         repo: str,
         worktree: pathlib.Path | None = None,
         dry_run: bool = False,
+        backend: str = "gh",
+        resume: bool = False,
         **kwargs,  # pylint: disable=unused-argument
     ) -> None:
         """Async Action implementation."""
         manifest = parse_manifest()
+        session = GitHubSession() if backend == "rest" else None
         # Before attempting to send a PR make sure we're able to leverage gh credentials
-        verify_gh_auth()
+        verify_gh_auth(session)
 
+        journal = Journal(
+            "update_repo",
+            {"repo": repo, "worktree": str(worktree) if worktree else None},
+            resume=resume,
+            enabled=not dry_run,
+        )
         projects = 0
         updated = 0
         already_up_to_date = 0
@@ -179,8 +243,21 @@ class UpdateRepoAction:
             if not manifest_repo.user:
                 manifest_repo.user = manifest.user
 
+            if (entry := journal.get(manifest_repo.name)) is not None:
+                url = f" ({entry.url})" if entry.url else ""
+                print(f"Skipping repo {manifest_repo}: already {entry.outcome}{url}")
+                projects += 1
+                if entry.outcome == UP_TO_DATE:
+                    already_up_to_date += 1
+                else:
+                    updated += 1
+                continue
+
             print(f"Updating repo: {manifest_repo}")
-            with repo_working_dir(manifest_repo, worktree) as git_repo:
+            with (
+                tracing.span(manifest_repo.name, "repo"),
+                repo_working_dir(manifest_repo, worktree) as git_repo,
+            ):
                 if git_repo.is_dirty() or git_repo.untracked_files:
                     raise ValueError(
                         "Local clone of repository is dirty or has untracked files"
@@ -194,6 +271,7 @@ class UpdateRepoAction:
                     _LOGGER.info(
                         "No changes detected after scruft update; Repo is up to date."
                     )
+                    journal.record(manifest_repo.name, JournalEntry(UP_TO_DATE))
                     continue
                 updated += 1
 
@@ -202,8 +280,15 @@ class UpdateRepoAction:
                     print("Dry run complete. Changes applied locally.")
                     continue
 
-                url = push_and_create_pr(git_repo)
+                url = push_and_create_pr(
+                    git_repo,
+                    session=session,
+                    repo_fullname=f"{manifest_repo.user}/{manifest_repo.name}",
+                )
                 print(f"Created pull request: {url}")
+                journal.record(manifest_repo.name, JournalEntry(UPDATED, url=url))
+
+        journal.complete()
 
         print(
             f"Updated {updated} of {projects} projects ({already_up_to_date} already up to date)."
@@ -0,0 +1,99 @@
+"""Library for watching a local worktree and rerunning affected checks."""
+
+import logging
+import os
+import pathlib
+import threading
+from collections.abc import Callable
+
+from .checks.registries import WORKTREE_CHECKS
+from .exceptions import Failure
+from .manifest import Repo
+
+_LOGGER = logging.getLogger(__name__)
+
+POLL_INTERVAL = 0.5
+IGNORED_DIRS = {".git", ".venv", "venv", "__pycache__", "node_modules"}
+
+Snapshot = dict[str, tuple[int, int]]
+
+
+def snapshot(root: pathlib.Path) -> Snapshot:
+    """Return the modification time and size of every file in the worktree."""
+    result: Snapshot = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [name for name in dirnames if name not in IGNORED_DIRS]
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            result[os.path.relpath(path, root)] = (stat.st_mtime_ns, stat.st_size)
+    return result
+
+
+def changed_paths(before: Snapshot, after: Snapshot) -> set[str]:
+    """Return the paths added, removed or modified between two snapshots."""
+    return {
+        path
+        for path in before.keys() | after.keys()
+        if before.get(path) != after.get(path)
+    }
+
+
+class WorktreeWatcher:
+    """Reruns worktree checks whose file dependencies changed."""
+
+    def __init__(self, repo: Repo, worktree: pathlib.Path) -> None:
+        """Initialize WorktreeWatcher."""
+        self._repo = repo
+        self._worktree = worktree
+        self._snapshot = snapshot(worktree)
+        self._failures: dict[str, list[Failure]] = {}
+
+    @property
+    def failures(self) -> list[Failure]:
+        """Return the current failures across all checks."""
+        return [
+            fail.of("worktree").of(self._repo.name)
+            for failures in self._failures.values()
+            for fail in failures
+        ]
+
+    def run_checks(self, names: set[str] | None = None) -> list[str]:
+        """Run the named checks (or all enabled checks) and return what ran."""
+        enabled = WORKTREE_CHECKS.enabled_checks(self._repo)
+        selected = [name for name in enabled if names is None or name in names]
+        if not selected:
+            return []
+        errors = WORKTREE_CHECKS.run_checks(self._repo, self._worktree, only=selected)
+        for name in selected:
+            self._failures[name] = [fail for fail in errors if fail.names[0] == name]
+        return selected
+
+    def poll(self) -> list[str] | None:
+        """Check for file changes and rerun affected checks.
+
+        Returns the checks that were rerun, or None if nothing changed.
+        """
+        current = snapshot(self._worktree)
+        changed = changed_paths(self._snapshot, current)
+        self._snapshot = current
+        if not changed:
+            return None
+        _LOGGER.debug("Changed paths: %s", sorted(changed))
+        return self.run_checks(WORKTREE_CHECKS.dependent_checks(changed))
+
+    def watch(
+        self,
+        report: Callable[[list[str]], None],
+        stop: threading.Event | None = None,
+        interval: float = POLL_INTERVAL,
+    ) -> None:
+        """Poll the worktree until stopped, reporting after each rerun."""
+        stop = stop or threading.Event()
+        report(self.run_checks())
+        while not stop.wait(interval):
+            if (ran := self.poll()) is not None:
+                report(ran)
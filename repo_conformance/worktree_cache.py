@@ -0,0 +1,97 @@
+"""Cache of conformance results for local worktrees.
+
+Results are keyed on the git tree hash of HEAD plus a fingerprint of any
+uncommitted changes, the set of checks that ran and the tool version, so that
+an unchanged worktree can replay its previous outcome without rerunning the
+checks. Remote inputs (e.g. the latest template commit) are not part of the
+key, so use `--no-cache` to force a fresh run.
+"""
+
+import hashlib
+import logging
+import pathlib
+import subprocess
+from importlib import metadata
+
+from . import tracing
+from .exceptions import Failure
+from .state import load_json, save_json
+
+_LOGGER = logging.getLogger(__name__)
+
+CACHE_FILE = "worktree-cache.json"
+
+
+def _tool_version() -> str:
+    try:
+        return metadata.version("repo_conformance")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def _git(worktree: pathlib.Path, *args: str) -> bytes:
+    with tracing.span(f"git {args[0]}", "subprocess"):
+        return subprocess.run(
+            ["git", "-C", str(worktree), *args],
+            check=True,
+            capture_output=True,
+            timeout=30,
+        ).stdout
+
+
+def worktree_fingerprint(worktree: pathlib.Path, checks: list[str]) -> str | None:
+    """Compute the cache key for a worktree, or None if it is not a git repo."""
+    try:
+        tree = _git(worktree, "rev-parse", "HEAD^{tree}").strip()
+        status = _git(
+            worktree, "status", "--porcelain=v1", "-z", "--untracked-files=all"
+        )
+    except (subprocess.SubprocessError, OSError) as err:
+        _LOGGER.debug("Unable to fingerprint worktree %s: %s", worktree, err)
+        return None
+
+    digest = hashlib.sha256()
+    digest.update(tree)
+    digest.update(b"\0".join(name.encode() for name in sorted(checks)))
+    digest.update(_tool_version().encode())
+    digest.update(status)
+    # Porcelain entries are "XY path"; renames and copies are followed by a
+    # separate entry holding only the source path, which is skipped
+    entries = iter(status.split(b"\0"))
+    for entry in entries:
+        if len(entry) < 4:
+            continue
+        if b"R" in entry[:2] or b"C" in entry[:2]:
+            next(entries, None)
+        path = worktree / entry[3:].decode(errors="surrogateescape")
+        if path.is_file():
+            digest.update(hashlib.sha256(path.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+class WorktreeCache:
+    """Persistent cache of check failures for local worktrees."""
+
+    def __init__(self) -> None:
+        """Initialize WorktreeCache."""
+        self._entries: dict[str, dict] = load_json(CACHE_FILE) or {}
+
+    def get(self, worktree: pathlib.Path, key: str) -> list[Failure] | None:
+        """Return the cached failures for the worktree if the key matches."""
+        entry = self._entries.get(str(worktree.resolve()))
+        if not entry or entry.get("key") != key:
+            return None
+        return [
+            Failure(detail=fail["detail"], names=fail["names"])
+            for fail in entry["failures"]
+        ]
+
+    def put(self, worktree: pathlib.Path, key: str, failures: list[Failure]) -> None:
+        """Store the failures for the worktree."""
+        self._entries[str(worktree.resolve())] = {
+            "key": key,
+            "failures": [
+                {"detail": fail.detail, "names": fail.names} for fail in failures
+            ],
+        }
+        save_json(CACHE_FILE, self._entries)
@@ -0,0 +1,54 @@
+"""Test fixtures for repo_conformance."""
+
+import threading
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+
+from repo_conformance import breaker, hedge
+from repo_conformance.github_api import GitHubSession
+from repo_conformance.prs import RestGitHubClient
+from repo_conformance.state import STATE_DIR_ENV
+
+from .fake_github_api import FakeApiServer
+
+
+@pytest.fixture(autouse=True)
+def isolated_state_dir(
+    tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch
+) -> Path:
+    """Keep local state written by the tool out of the user's home directory."""
+    state = tmp_path_factory.mktemp("state")
+    monkeypatch.setenv(STATE_DIR_ENV, str(state))
+    return state
+
+
+@pytest.fixture(autouse=True)
+def reset_circuit_breakers() -> None:
+    """Start each test with every destination available."""
+    breaker.configure(breaker.FAILURE_THRESHOLD, breaker.RESET_TIMEOUT)
+
+
+@pytest.fixture(autouse=True)
+def reset_hedging() -> None:
+    """Start each test with hedging disabled and no latency history."""
+    hedge.configure(enabled=False)
+
+
+@pytest.fixture
+def api_server() -> Generator[FakeApiServer]:
+    """Run a fake GitHub API server."""
+    server = FakeApiServer()
+    server.routes[("GET", "/user")] = (200, {"login": "test-user"})
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def api_client(api_server: FakeApiServer) -> RestGitHubClient:
+    """GitHub API client for the fake server."""
+    return RestGitHubClient(GitHubSession(token="test-token", base_url=api_server.url))
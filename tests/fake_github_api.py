@@ -0,0 +1,104 @@
+"""Fake GitHub API server for tests of the in-process API client."""
+
+import hashlib
+import json
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+PR_NODE = {
+    "number": 1,
+    "title": "Update dependency pytest to v8.3.2",
+    "url": "https://github.com/test-user/repo1/pull/1",
+    "createdAt": "2026-01-01T00:00:00Z",
+    "headRefName": "renovate/pytest",
+    "reviewDecision": None,
+    "mergeable": "MERGEABLE",
+    "mergeStateStatus": "CLEAN",
+    "isDraft": False,
+    "author": {"login": "renovate", "__typename": "Bot"},
+    "headRepositoryOwner": {"login": "test-user"},
+}
+
+CHECK_RUN = {
+    "__typename": "CheckRun",
+    "name": "test",
+    "status": "COMPLETED",
+    "conclusion": "SUCCESS",
+}
+
+PR_DETAILS_NODE = {
+    "number": 1,
+    "body": "Bumps pytest from 8.3.1 to 8.3.2",
+    "commits": {
+        "nodes": [
+            {"commit": {"statusCheckRollup": {"contexts": {"nodes": [CHECK_RUN]}}}}
+        ]
+    },
+}
+
+
+def graphql_response(body: dict) -> tuple[int, Any]:
+    """Respond to the list or details query."""
+    if "pullRequests" in body["query"]:
+        nodes = [PR_NODE, {**PR_NODE, "number": 2, "author": {"login": "someone"}}]
+        return 200, {"data": {"repository": {"pullRequests": {"nodes": nodes}}}}
+    return 200, {"data": {"repository": {"pr1": PR_DETAILS_NODE}}}
+
+
+class FakeApiServer(ThreadingHTTPServer):
+    """Local server that serves canned GitHub API responses."""
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), FakeApiHandler)
+        self.routes: dict[
+            tuple[str, str], tuple[int, Any] | Callable[[Any], tuple[int, Any]]
+        ] = {}
+        self.requests: list[tuple[str, str, Any]] = []
+        self.clients: set[tuple[str, int]] = set()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+
+class FakeApiHandler(BaseHTTPRequestHandler):
+    """Serve responses from the server routes, keeping connections open."""
+
+    protocol_version = "HTTP/1.1"
+    server: FakeApiServer
+
+    def _handle(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length)) if length else None
+        self.server.requests.append((self.command, self.path, body))
+        self.server.clients.add(self.client_address)
+        route = self.server.routes.get(
+            (self.command, self.path), (404, {"message": "Not Found"})
+        )
+        status, data = route(body) if callable(route) else route
+        if isinstance(data, bytes):
+            payload = data
+        else:
+            payload = json.dumps(data).encode() if data is not None else b""
+        etag = f'"{hashlib.sha1(payload).hexdigest()}"'
+        # Answer unchanged resources with 304 Not Modified like GitHub
+        if (
+            self.command == "GET"
+            and status == 200
+            and self.headers.get("If-None-Match") == etag
+        ):
+            status, payload = 304, b""
+        self.send_response(status)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("X-RateLimit-Limit", "5000")
+        self.send_header("X-RateLimit-Remaining", "4999")
+        self.send_header("X-RateLimit-Reset", "0")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+    def log_message(self, *args: object) -> None:
+        pass
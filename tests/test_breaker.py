@@ -0,0 +1,79 @@
+"""Tests for failing fast when a destination is unavailable."""
+
+import time
+import urllib.error
+from unittest.mock import patch
+
+import pytest
+
+from repo_conformance.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from repo_conformance.check import CheckAction
+from repo_conformance.exceptions import CircuitOpenError
+from repo_conformance.manifest import CheckContext, Manifest, Repo
+
+
+def fail(circuit: CircuitBreaker) -> None:
+    """Make a failing call through the circuit breaker."""
+    with pytest.raises(OSError), circuit.guard():
+        raise OSError("timed out")
+
+
+def test_circuit_opens_and_recovers() -> None:
+    """Test the circuit opens after consecutive failures and probes recovery."""
+    circuit = CircuitBreaker("example.com", failure_threshold=2, reset_timeout=0.1)
+    fail(circuit)
+    assert circuit.state == CLOSED
+    fail(circuit)
+    assert circuit.state == OPEN
+    assert circuit.tripped
+
+    with (
+        pytest.raises(CircuitOpenError, match="example.com is unavailable"),
+        circuit.guard(),
+    ):
+        pytest.fail("Call should have been short-circuited")
+    assert circuit.short_circuited == 1
+
+    time.sleep(0.1)
+    fail(circuit)
+    assert circuit.state == OPEN
+
+    time.sleep(0.1)
+    with circuit.guard():
+        assert circuit.state == HALF_OPEN
+        with pytest.raises(CircuitOpenError), circuit.guard():
+            pass
+    assert circuit.state == CLOSED
+
+
+def test_request_errors_do_not_open_circuit() -> None:
+    """Test that errors classified as request problems keep the circuit closed."""
+    circuit = CircuitBreaker("example.com", failure_threshold=1)
+    with pytest.raises(KeyError), circuit.guard(lambda err: False):
+        raise KeyError("missing")
+    assert circuit.state == CLOSED
+
+
+def test_check_action_reports_degraded_run(capsys: pytest.CaptureFixture) -> None:
+    """Test that an outage is reported once rather than once per repo."""
+    repos = [Repo(name=f"repo{i}", user="allenporter") for i in range(6)]
+    fake_manifest = Manifest(user="allenporter", repos=repos, checks=CheckContext())
+    timeout = urllib.error.URLError("timed out")
+
+    with (
+        patch("repo_conformance.check.parse_manifest", return_value=fake_manifest),
+        patch("repo_conformance.check.MAX_WORKERS", 1),
+        patch("urllib.request.urlopen", side_effect=timeout) as mock_urlopen,
+        pytest.raises(SystemExit),
+    ):
+        CheckAction().run(repo=None, breaker_threshold=2)
+
+    assert mock_urlopen.call_count == 2
+    out = capsys.readouterr().out
+    assert (
+        "Run degraded: raw.githubusercontent.com is unavailable (4 calls skipped)"
+        in out
+    )
+    assert "unchecked repos: repo2, repo3, repo4, repo5" in out
+    assert "2 repos: repo0, repo1" in out
+    assert out.count("timed out") == 1
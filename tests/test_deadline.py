@@ -0,0 +1,122 @@
+"""Tests for deadline propagation and run time budgets."""
+
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from repo_conformance import deadline
+from repo_conformance.check import CheckAction
+from repo_conformance.deadline import Deadline, is_timeout
+from repo_conformance.exceptions import CheckError, DeadlineExceeded, Failure
+from repo_conformance.manifest import CheckContext, Repo
+from repo_conformance.registry import CheckRegistry
+
+
+def test_timeout_bounded_by_scope() -> None:
+    """Test that nested scopes can only shorten the deadline."""
+    assert deadline.timeout(5) == 5
+    with deadline.scope(Deadline.after(2, "outer")):
+        assert deadline.timeout(5) <= 2
+        with deadline.scope(Deadline.after(60, "inner")):
+            assert deadline.current().description == "outer"
+        assert deadline.timeout(1) == 1
+
+    with deadline.scope(Deadline.after(-1, "expired")):
+        assert deadline.expired() is not None
+        with pytest.raises(DeadlineExceeded, match=r"Deadline exceeded \(expired\)"):
+            deadline.timeout(5)
+    assert deadline.current() is None
+
+
+def test_check_timeout_reported_as_distinct_failure() -> None:
+    """Test a per-check timeout replaces the error of the interrupted operation."""
+    registry = CheckRegistry[None]()
+
+    @registry.register()
+    def slow(repo: Repo, context: None) -> None:
+        time.sleep(deadline.timeout(5))
+        raise CheckError("socket timed out")
+
+    @registry.register()
+    def fast(repo: Repo, context: None) -> None:
+        pass
+
+    repo = Repo(name="ical", checks=CheckContext(timeouts={"slow": 0.05}))
+    errors = registry.run_checks(repo, None)
+    assert [(fail.names, fail.detail) for fail in errors] == [
+        (("slow",), "Deadline exceeded (slow timeout of 0.05s)")
+    ]
+    assert is_timeout(errors[0])
+
+
+def test_expired_run_skips_remaining_checks() -> None:
+    """Test that checks are not started once the run deadline has passed."""
+    registry = CheckRegistry[None]()
+    ran = []
+
+    @registry.register()
+    def check(repo: Repo, context: None) -> None:
+        ran.append(repo.name)
+
+    with deadline.scope(Deadline.after(0, "run deadline of 0s")):
+        errors = registry.run_checks(Repo(name="ical"), None)
+    assert not ran
+    assert [fail.detail for fail in errors] == [
+        "Deadline exceeded (run deadline of 0s)"
+    ]
+
+
+def test_run_abandons_hung_repos() -> None:
+    """Test that a hung repo check does not block the run past the deadline."""
+    release = threading.Event()
+
+    def check_repo(target: Repo) -> list[Failure]:
+        if target.name == "hung":
+            release.wait(10)
+        return []
+
+    repos = [Repo(name="hung"), Repo(name="ical")]
+    start = time.monotonic()
+    try:
+        errors = CheckAction()._run_all(
+            repos, check_repo, Deadline.after(0.1, "run deadline of 0.1s")
+        )
+    finally:
+        release.set()
+    assert time.monotonic() - start < 5
+    assert [(fail.names, fail.detail) for fail in errors] == [
+        (("hung",), "Deadline exceeded (run deadline of 0.1s)")
+    ]
+
+
+HUNG_RUN = """
+import threading
+from repo_conformance.check import CheckAction
+from repo_conformance.deadline import Deadline
+from repo_conformance.manifest import Repo
+
+def check_repo(target):
+    threading.Event().wait()
+
+errors = CheckAction()._run_all(
+    [Repo(name="hung")], check_repo, Deadline.after(0.1, "run deadline of 0.1s")
+)
+print(errors[0].detail)
+"""
+
+
+def test_hung_repo_does_not_block_exit() -> None:
+    """Test that the process exits at the deadline while a check is still hung."""
+    start = time.monotonic()
+    result = subprocess.run(
+        [sys.executable, "-c", HUNG_RUN],
+        capture_output=True,
+        text=True,
+        timeout=10,
+        check=True,
+    )
+    assert time.monotonic() - start < 5
+    assert result.stdout.strip() == "Deadline exceeded (run deadline of 0.1s)"
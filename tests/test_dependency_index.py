@@ -0,0 +1,94 @@
+"""Tests for the fleet-wide dependency update index."""
+
+from unittest.mock import MagicMock, patch
+
+from repo_conformance.dependency_index import DependencyIndex
+from repo_conformance.manifest import Manifest, Repo
+from repo_conformance.pr_record import Groups, PullRequest
+from repo_conformance.prs import PrsAction
+
+from .test_prs import FakeGitHubClient
+
+
+def renovate_pr(number: int, title: str, body: str = "") -> dict:
+    return {
+        "number": number,
+        "title": title,
+        "author": {"login": "renovate[bot]", "is_bot": True},
+        "headRefName": f"renovate/{number}",
+        "mergeable": "MERGEABLE",
+        "mergeStateStatus": "CLEAN",
+        "body": body,
+        "statusCheckRollup": [{"status": "COMPLETED", "conclusion": "SUCCESS"}],
+    }
+
+
+PYTEST = "Bump pytest from 8.3.0 to 8.4.0"
+RUFF = "Bump ruff from 0.8.0 to 0.9.0"
+PRS_BY_REPO = {
+    "allenporter/repo1": [renovate_pr(1, PYTEST), renovate_pr(2, RUFF)],
+    "allenporter/repo2": [renovate_pr(3, PYTEST)],
+    "allenporter/repo3": [renovate_pr(4, "Bump pytest from 8.2.0 to 8.4.0")],
+}
+
+
+def groups(*prs: dict) -> Groups:
+    return {
+        "ready": [PullRequest.from_dict(pr) for pr in prs],
+        "pending": [],
+        "attention": [],
+    }
+
+
+def test_index_groups_updates_across_repos() -> None:
+    """Test the same update in many repos is indexed once."""
+    index = DependencyIndex.from_repos(
+        [(name.split("/")[1], name, groups(*prs)) for name, prs in PRS_BY_REPO.items()]
+    )
+    assert len(index) == 3
+    update, entries = index.updates()[0]
+    assert (update.package, update.old, update.new) == ("pytest", "8.3.0", "8.4.0")
+    assert [(entry.name, entry.pr.number) for entry in entries] == [
+        ("repo1", 1),
+        ("repo2", 3),
+    ]
+    assert sorted(entry.pr.number for entry in index.find("PyTest")) == [1, 3, 4]
+    assert index.find("missing") == []
+
+
+@patch("repo_conformance.prs.parse_manifest")
+def test_prs_by_package_and_merge_package(mock_parse_manifest: MagicMock) -> None:
+    """Test the by-package view and merging one package across repos."""
+    mock_parse_manifest.return_value = Manifest(
+        user="allenporter",
+        repos=[Repo(name="repo1"), Repo(name="repo2"), Repo(name="repo3")],
+    )
+    fake_client = FakeGitHubClient(PRS_BY_REPO)
+
+    with patch("builtins.print") as mock_print:
+        PrsAction().run(repo=None, renovate=True, by_package=True, client=fake_client)
+    printed = [call.args[0] for call in mock_print.call_args_list if call.args]
+    assert any("pytest\033[0m 8.3.0 → 8.4.0 (2 repos)" in line for line in printed)
+    assert any("ruff\033[0m 0.8.0 → 0.9.0 (1 repo)" in line for line in printed)
+
+    expected = [
+        ("allenporter/repo1", 1),
+        ("allenporter/repo2", 3),
+        ("allenporter/repo3", 4),
+    ]
+    PrsAction().run(
+        repo=None,
+        renovate=True,
+        merge=True,
+        package="pytest",
+        yes=True,
+        client=fake_client,
+    )
+    assert sorted(fake_client.merged_prs) == expected
+
+    # The package is a category filter of its own
+    fake_client.merged_prs.clear()
+    PrsAction().run(
+        repo=None, merge=True, package="pytest", yes=True, client=fake_client
+    )
+    assert sorted(fake_client.merged_prs) == expected
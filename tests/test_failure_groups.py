@@ -0,0 +1,102 @@
+"""Tests for grouping the same failure reported by many repos."""
+
+import pytest
+
+from repo_conformance.check import print_errors
+from repo_conformance.exceptions import Failure
+from repo_conformance.failure_groups import group_failures
+
+TEMPLATE = "ae5501352e9a6fe363996818fc2b4c82f5816450"
+
+
+def out_of_date(repo: str, commit: str) -> Failure:
+    """Return a cruft failure nested as reported by a fleet run."""
+    detail = f"Repo is out of date, expected {TEMPLATE}, got {commit}"
+    return Failure(detail).of("cruft").of("worktree").of(repo)
+
+
+def test_group_failures() -> None:
+    """Test failures are grouped by check and detail ignoring varying SHAs."""
+    errors = [
+        Failure("Missing file").of("readme").of("repo0"),
+        out_of_date("repo1", "6035ef7fa54ecaf83d0593a553074cf952172437"),
+        out_of_date("repo2", "374e42a1098294fb8c98b8bfe7554b684a7ad14d"),
+        Failure("Missing file").of("readme").of("repo3"),
+        out_of_date("repo3", "6035ef7fa54ecaf83d0593a553074cf952172437"),
+        Failure("Missing file").of("license").of("repo4"),
+    ]
+    groups = group_failures(errors)
+    assert [(group.path, group.repos, group.detail) for group in groups] == [
+        (
+            ("worktree", "cruft"),
+            ["repo1", "repo2", "repo3"],
+            f"Repo is out of date, expected {TEMPLATE}, got <sha>",
+        ),
+        (("readme",), ["repo0", "repo3"], "Missing file"),
+        (("license",), ["repo4"], "Missing file"),
+    ]
+
+
+def test_group_failures_naming_repo() -> None:
+    """Test failures that only differ by the name of their repo are grouped."""
+
+    def fetch_failed(repo: str) -> Failure:
+        detail = (
+            f"Failed to fetch .cruft.json for 'allenporter/{repo}': "
+            "<urlopen error [Errno -2] Name or service not known>"
+        )
+        return Failure(detail).of("cruft").of("worktree").of(repo)
+
+    errors = [
+        fetch_failed("ical"),
+        fetch_failed("pyrainbird"),
+        Failure("Missing topics for ical-tools").of("github").of("ical"),
+        Failure("Missing topics for ical-tools").of("github").of("ical-tools"),
+    ]
+    groups = group_failures(errors)
+    assert [(group.path, group.repos, group.detail) for group in groups] == [
+        (
+            ("worktree", "cruft"),
+            ["ical", "pyrainbird"],
+            (
+                "Failed to fetch .cruft.json for '<repo>': "
+                "<urlopen error [Errno -2] Name or service not known>"
+            ),
+        ),
+        (("github",), ["ical"], "Missing topics for ical-tools"),
+        (("github",), ["ical-tools"], "Missing topics for ical-tools"),
+    ]
+
+
+def test_failure_names_are_shared() -> None:
+    """Test the names of failures of the same check are stored once."""
+    first = out_of_date("repo1", "6035ef7")
+    second = Failure("other", names=["repo1", "worktree", "cruft"])
+    assert first.names is second.names
+    assert first.names[1:] == ("worktree", "cruft")
+    assert not hasattr(first, "__dict__")
+
+
+def test_print_errors(capsys: pytest.CaptureFixture) -> None:
+    """Test identical failures print once with the repos they affect."""
+    print_errors(
+        [
+            out_of_date("repo1", "6035ef7fa54ecaf83d0593a553074cf952172437"),
+            out_of_date("repo2", "374e42a1098294fb8c98b8bfe7554b684a7ad14d"),
+            Failure("Deadline exceeded").of("repo3"),
+            Failure("Deadline exceeded").of("repo4"),
+            Failure("Missing file").of("readme").of("repo5"),
+        ]
+    )
+    assert capsys.readouterr().out == (
+        "2 repos: repo1, repo2\n"
+        "  worktree:\n"
+        f"    cruft: Repo is out of date, expected {TEMPLATE}, got <sha>\n"
+        "\n"
+        "2 repos: repo3, repo4\n"
+        "  Deadline exceeded\n"
+        "\n"
+        "repo5:\n"
+        "  readme: Missing file\n"
+        "\n"
+    )
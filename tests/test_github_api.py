@@ -0,0 +1,278 @@
+"""Tests for the in-process GitHub API client."""
+
+import http.client
+import time
+from unittest.mock import patch
+
+import pytest
+
+from repo_conformance import deadline
+from repo_conformance.github_api import GitHubApiError, GitHubSession
+from repo_conformance.manifest import Manifest, Repo
+from repo_conformance.prs import PrsAction, RestGitHubClient
+
+from .fake_github_api import CHECK_RUN, FakeApiServer, graphql_response
+
+
+def test_check_auth_is_cached(
+    api_server: FakeApiServer, api_client: RestGitHubClient
+) -> None:
+    """Test the token is only verified once per session."""
+    assert api_client.check_auth()
+    assert api_client.check_auth()
+    assert [r[1] for r in api_server.requests] == ["/user"]
+
+
+def test_check_auth_failure(api_server: FakeApiServer) -> None:
+    """Test a rejected token fails authentication."""
+    api_server.routes[("GET", "/user")] = (401, {"message": "Bad credentials"})
+    session = GitHubSession(token="bad-token", base_url=api_server.url)
+    assert not session.check_auth()
+
+
+def test_list_prs(api_server: FakeApiServer, api_client: RestGitHubClient) -> None:
+    """Test pull requests are listed with only the lightweight fields."""
+    api_server.routes[("POST", "/graphql")] = graphql_response
+    prs = api_client.list_prs("test-user/repo1")
+    assert [pr["number"] for pr in prs] == [1, 2]
+    assert prs[0]["author"] == {"login": "renovate", "is_bot": True}
+    assert "body" not in prs[0]
+    assert "statusCheckRollup" not in prs[0]
+    assert api_server.requests[0][2]["variables"] == {
+        "owner": "test-user",
+        "name": "repo1",
+    }
+
+
+def test_get_pr_details(
+    api_server: FakeApiServer, api_client: RestGitHubClient
+) -> None:
+    """Test bodies and check rollups are fetched in one batched query."""
+    api_server.routes[("POST", "/graphql")] = graphql_response
+    details = api_client.get_pr_details("test-user/repo1", [1])
+    assert details == {
+        1: {
+            "body": "Bumps pytest from 8.3.1 to 8.3.2",
+            "statusCheckRollup": [CHECK_RUN],
+        }
+    }
+    assert "pr1: pullRequest(number: 1)" in api_server.requests[0][2]["query"]
+
+
+def test_list_prs_error(
+    api_server: FakeApiServer, api_client: RestGitHubClient
+) -> None:
+    """Test GraphQL errors return no pull requests."""
+    api_server.routes[("POST", "/graphql")] = (
+        200,
+        {"errors": [{"message": "Could not resolve to a Repository"}]},
+    )
+    assert api_client.list_prs("test-user/missing") == []
+
+
+def test_connection_reused(
+    api_server: FakeApiServer, api_client: RestGitHubClient
+) -> None:
+    """Test that calls share a single keep-alive connection."""
+    api_server.routes[
+        ("GET", "/repos/test-user/repo1/pulls/1/files?per_page=100&page=1")
+    ] = (
+        200,
+        [{"filename": "README.md"}, {"filename": "setup.cfg.rej"}],
+    )
+    assert api_client.check_auth()
+    for _ in range(3):
+        assert api_client.get_pr_diff_files("test-user/repo1", 1) == [
+            "README.md",
+            "setup.cfg.rej",
+        ]
+    assert len(api_server.requests) == 4
+    assert len(api_server.clients) == 1
+
+
+def test_request_error(api_server: FakeApiServer) -> None:
+    """Test that error responses raise with the API message."""
+    session = GitHubSession(token="test-token", base_url=api_server.url)
+    with pytest.raises(GitHubApiError, match="Not Found") as exc_info:
+        session.request("GET", "/repos/test-user/missing")
+    assert exc_info.value.status == 404
+
+
+def test_request_error_without_json(api_server: FakeApiServer) -> None:
+    """Test that responses that are not json raise an API error."""
+    api_server.routes[("GET", "/user")] = (502, b"<html>Bad Gateway</html>")
+    session = GitHubSession(token="test-token", base_url=api_server.url)
+    with pytest.raises(GitHubApiError) as exc_info:
+        session.request("GET", "/user")
+    assert exc_info.value.status == 502
+
+    api_server.routes[("GET", "/user")] = (200, b"<html>OK</html>")
+    with pytest.raises(GitHubApiError, match="Invalid JSON"):
+        session.request("GET", "/user")
+
+
+def test_deadline_applies_to_kept_alive_connection(api_server: FakeApiServer) -> None:
+    """Test the remaining deadline bounds requests on a reused connection."""
+    api_server.routes[("GET", "/user")] = (200, {"login": "test-user"})
+    session = GitHubSession(token="test-token", base_url=api_server.url)
+    session.request("GET", "/user")
+    with deadline.scope(deadline.Deadline.after(2.0, "test deadline")):
+        session.request("GET", "/user")
+        assert session._local.conn.sock.gettimeout() <= 2.0
+    assert len(api_server.clients) == 1
+
+
+def test_connection_reset_after_timeout(api_server: FakeApiServer) -> None:
+    """Test a request that timed out does not break the thread's connection."""
+    delays = [0.5]
+
+    def slow_user(body: object) -> tuple[int, dict]:
+        time.sleep(delays.pop() if delays else 0)
+        return 200, {"login": "test-user"}
+
+    api_server.routes[("GET", "/user")] = slow_user
+    session = GitHubSession(token="test-token", base_url=api_server.url)
+    with (
+        deadline.scope(deadline.Deadline.after(0.1, "test deadline")),
+        pytest.raises(TimeoutError),
+    ):
+        session.request("GET", "/user")
+    assert session.request("GET", "/user").data == {"login": "test-user"}
+
+    # Protocol errors are connection errors for callers
+    with (
+        patch.object(
+            http.client.HTTPConnection,
+            "getresponse",
+            side_effect=http.client.BadStatusLine("garbage"),
+        ),
+        pytest.raises(ConnectionError, match="BadStatusLine"),
+    ):
+        session.request("GET", "/user")
+    assert session.request("GET", "/user").data == {"login": "test-user"}
+
+
+def test_merge_pr(api_server: FakeApiServer, api_client: RestGitHubClient) -> None:
+    """Test merging squashes the PR and deletes its branch."""
+    api_server.routes[("GET", "/repos/test-user/repo1/pulls/1")] = (
+        200,
+        {
+            "head": {
+                "sha": "abc123",
+                "ref": "renovate/pytest",
+                "repo": {"full_name": "test-user/repo1"},
+            }
+        },
+    )
+    api_server.routes[("PUT", "/repos/test-user/repo1/pulls/1/merge")] = (
+        200,
+        {"merged": True},
+    )
+    api_server.routes[
+        ("DELETE", "/repos/test-user/repo1/git/refs/heads/renovate/pytest")
+    ] = (204, None)
+    assert api_client.merge_pr("test-user/repo1", 1) == (True, "")
+    assert api_server.requests[1][2] == {"merge_method": "squash", "sha": "abc123"}
+    assert api_server.requests[2][0] == "DELETE"
+
+
+def test_get_pr_checks(api_server: FakeApiServer, api_client: RestGitHubClient) -> None:
+    """Test check runs and statuses are returned like `gh pr checks --json`."""
+    api_server.routes[("GET", "/repos/test-user/repo1/pulls/1")] = (
+        200,
+        {"head": {"sha": "abc123"}},
+    )
+    api_server.routes[
+        ("GET", "/repos/test-user/repo1/commits/abc123/check-runs?per_page=100")
+    ] = (
+        200,
+        {
+            "check_runs": [
+                {"name": "lint", "conclusion": "failure", "html_url": "https://l"},
+                {"name": "test", "conclusion": None, "html_url": "https://t"},
+                {"name": "docs", "conclusion": "skipped", "html_url": "https://d"},
+            ]
+        },
+    )
+    api_server.routes[
+        ("GET", "/repos/test-user/repo1/commits/abc123/status?per_page=100")
+    ] = (
+        200,
+        {
+            "statuses": [
+                {"context": "ci/build", "state": "error", "target_url": "https://b"},
+                {"context": "ci/deploy", "state": "pending", "target_url": None},
+            ]
+        },
+    )
+    checks = [
+        {"name": "lint", "bucket": "fail", "link": "https://l"},
+        {"name": "test", "bucket": "pending", "link": "https://t"},
+        {"name": "docs", "bucket": "skipping", "link": "https://d"},
+        {"name": "ci/build", "bucket": "fail", "link": "https://b"},
+        {"name": "ci/deploy", "bucket": "pending", "link": ""},
+    ]
+    assert api_client.get_pr_checks("test-user/repo1", 1) == checks
+    assert api_client.get_pr_checks("test-user/repo1", 2) == []
+
+    # The PR is not fetched when its head commit is already known
+    api_server.requests.clear()
+    assert api_client.get_pr_checks("test-user/repo1", 1, "abc123") == checks
+    assert [path for _, path, _ in api_server.requests] == [
+        "/repos/test-user/repo1/commits/abc123/check-runs?per_page=100",
+        "/repos/test-user/repo1/commits/abc123/status?per_page=100",
+    ]
+
+
+def test_merge_pr_failure(
+    api_server: FakeApiServer, api_client: RestGitHubClient
+) -> None:
+    """Test a rejected merge reports the API error."""
+    api_server.routes[("GET", "/repos/test-user/repo1/pulls/1")] = (
+        200,
+        {"head": {"sha": "abc123", "ref": "feature", "repo": None}},
+    )
+    api_server.routes[("PUT", "/repos/test-user/repo1/pulls/1/merge")] = (
+        405,
+        {"message": "Pull Request is not mergeable"},
+    )
+    success, message = api_client.merge_pr("test-user/repo1", 1)
+    assert not success
+    assert "not mergeable" in message
+
+
+def test_create_pull_request_exists(api_server: FakeApiServer) -> None:
+    """Test creating a PR that already exists returns the existing PR url."""
+    api_server.routes[("POST", "/repos/test-user/repo1/pulls")] = (
+        422,
+        {"message": "Validation Failed"},
+    )
+    api_server.routes[
+        ("GET", "/repos/test-user/repo1/pulls?state=open&head=test-user:cruft-update")
+    ] = (200, [{"html_url": "https://github.com/test-user/repo1/pull/7"}])
+    session = GitHubSession(token="test-token", base_url=api_server.url)
+    url = session.create_pull_request(
+        "test-user/repo1", "title", "body", head="cruft-update", base="main"
+    )
+    assert url == "https://github.com/test-user/repo1/pull/7"
+
+
+def test_prs_action_with_rest_client(
+    api_server: FakeApiServer,
+    api_client: RestGitHubClient,
+    capsys: pytest.CaptureFixture,
+) -> None:
+    """Test the prs action fetches details only for PRs that pass the filters."""
+    api_server.routes[("POST", "/graphql")] = graphql_response
+    manifest = Manifest(user="test-user", repos=[Repo(name="repo1")])
+    with patch("repo_conformance.prs.parse_manifest", return_value=manifest):
+        PrsAction().run(repo=None, client=api_client)
+    captured = capsys.readouterr()
+    assert "repo1" in captured.out
+    assert "#1" in captured.out
+    assert "#2" not in captured.out
+    assert "PASSED" in captured.out
+    queries = [body["query"] for _, _, body in api_server.requests if body]
+    assert len(queries) == 2
+    assert "pr1: pullRequest(number: 1)" in queries[1]
+    assert "pr2:" not in queries[1]
@@ -0,0 +1,154 @@
+"""Tests for hedging slow remote fetches."""
+
+import threading
+import time
+from collections.abc import Generator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from repo_conformance import deadline, hedge
+from repo_conformance.checks.worktree import fetch_remote_cruft_config
+from repo_conformance.deadline import Deadline
+from repo_conformance.exceptions import DeadlineExceeded
+from repo_conformance.hedge import LatencyTracker
+
+SLOW_DELAY = 2.0
+
+
+class LatencyServer(ThreadingHTTPServer):
+    """Local server that delays the first request for each slow path."""
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), LatencyHandler)
+        self.slow_paths: set[str] = set()
+        self.requests: list[str] = []
+
+
+class LatencyHandler(BaseHTTPRequestHandler):
+    """Serve a .cruft.json, injecting latency into slow requests."""
+
+    server: LatencyServer
+
+    def do_GET(self) -> None:
+        self.server.requests.append(self.path)
+        if self.path in self.server.slow_paths:
+            self.server.slow_paths.discard(self.path)
+            time.sleep(SLOW_DELAY)
+        body = b'{"commit": "abc1234"}'
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+@pytest.fixture(name="server")
+def server_fixture() -> Generator[LatencyServer]:
+    """Run the latency injecting server and point remote fetches at it."""
+    server = LatencyServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_port}/{{user}}/{{repo}}/main/.cruft.json"
+    with patch("repo_conformance.checks.worktree.RAW_CRUFT_URL_FORMAT", url):
+        yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_latency_percentile() -> None:
+    """Test latency percentiles over a sliding window."""
+    tracker = LatencyTracker(window=10)
+    assert tracker.percentile(0.5) is None
+    for value in range(20):
+        tracker.record(float(value))
+    assert tracker.percentile(0.0) == 10.0
+    assert tracker.percentile(0.5) == 15.0
+    assert tracker.percentile(1.0) == 19.0
+
+
+def test_slow_fetch_is_hedged(server: LatencyServer) -> None:
+    """Test a slow fetch is duplicated and the fast duplicate wins."""
+    hedge.configure(enabled=True, percentile=0.9, max_extra=1)
+    for i in range(hedge.MIN_SAMPLES):
+        assert fetch_remote_cruft_config("allenporter", f"warmup{i}")
+
+    server.slow_paths = {
+        "/allenporter/slow/main/.cruft.json",
+        "/allenporter/capped/main/.cruft.json",
+    }
+    start = time.monotonic()
+    assert fetch_remote_cruft_config("allenporter", "slow") == b'{"commit": "abc1234"}'
+    assert time.monotonic() - start < SLOW_DELAY / 2
+    assert server.requests.count("/allenporter/slow/main/.cruft.json") == 2
+
+    # The budget of extra requests is exhausted so the next slow fetch waits
+    start = time.monotonic()
+    fetch_remote_cruft_config("allenporter", "capped")
+    assert time.monotonic() - start >= SLOW_DELAY
+    assert server.requests.count("/allenporter/capped/main/.cruft.json") == 1
+
+
+def test_hedging_disabled(server: LatencyServer) -> None:
+    """Test that requests are not duplicated unless hedging is enabled."""
+    for i in range(hedge.MIN_SAMPLES):
+        fetch_remote_cruft_config("allenporter", f"warmup{i}")
+    server.slow_paths = {"/allenporter/slow/main/.cruft.json"}
+    fetch_remote_cruft_config("allenporter", "slow")
+    assert server.requests.count("/allenporter/slow/main/.cruft.json") == 1
+
+
+def test_hedges_start_when_every_worker_is_waiting() -> None:
+    """Test duplicates are not queued behind the slow requests they race."""
+    hedge.configure(enabled=True, percentile=0.9, max_extra=hedge.MAX_WORKERS)
+    hedger = hedge.hedger("example.com")
+    for _ in range(hedge.MIN_SAMPLES):
+        hedger.call(lambda: time.sleep(0.01))
+
+    lock = threading.Lock()
+    started: set[int] = set()
+
+    def fetch(worker: int) -> int:
+        with lock:
+            first = worker not in started
+            started.add(worker)
+        time.sleep(SLOW_DELAY if first else 0.01)
+        return worker
+
+    results: list[int] = []
+    start = time.monotonic()
+    workers = [
+        threading.Thread(
+            target=lambda i=i: results.append(hedger.call(lambda: fetch(i)))
+        )
+        for i in range(hedge.MAX_WORKERS)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert sorted(results) == list(range(hedge.MAX_WORKERS))
+    assert time.monotonic() - start < SLOW_DELAY / 2
+
+
+def test_hedged_call_honors_deadline() -> None:
+    """Test a caller stops waiting on a hung request at its deadline."""
+    hedge.configure(enabled=True, percentile=0.9, max_extra=0)
+    hedger = hedge.hedger("example.com")
+    for _ in range(hedge.MIN_SAMPLES):
+        hedger.call(lambda: time.sleep(0.01))
+
+    release = threading.Event()
+    start = time.monotonic()
+    try:
+        with (
+            deadline.scope(Deadline.after(0.2, "test deadline")),
+            pytest.raises(DeadlineExceeded, match="test deadline"),
+        ):
+            hedger.call(lambda: release.wait(10))
+    finally:
+        release.set()
+    assert time.monotonic() - start < SLOW_DELAY
@@ -0,0 +1,162 @@
+"""Tests for the history of conformance check runs."""
+
+from unittest.mock import patch
+
+import pytest
+
+from repo_conformance.check import CheckAction, longest_first
+from repo_conformance.checks.registries import REPO_CHECKS
+from repo_conformance.exceptions import CheckError, Failure
+from repo_conformance.history import HistoryAction, format_duration, parse_since
+from repo_conformance.history_store import HistoryStore
+from repo_conformance.manifest import CheckContext, Manifest, Repo
+from repo_conformance.registry import CheckRegistry, CheckRun, record_upstream
+
+NESTED_CHECKS: CheckRegistry[None] = CheckRegistry()
+CHECKS: CheckRegistry[None] = CheckRegistry()
+FAILING: set[str] = set()
+
+
+@NESTED_CHECKS.register()
+def cruft(repo: Repo, context: None) -> None:
+    record_upstream("abc1234def5678")
+    if repo.name in FAILING:
+        raise CheckError("out of date")
+
+
+@CHECKS.register(nested=NESTED_CHECKS)
+def worktree(repo: Repo, context: None) -> None:
+    if errors := NESTED_CHECKS.run_checks(repo, context):
+        raise CheckError(errors)
+
+
+def run_fleet() -> None:
+    """Run the check action against a fleet of two repos."""
+    with (
+        patch(
+            "repo_conformance.check.parse_manifest",
+            return_value=Manifest(
+                user="allenporter",
+                repos=[Repo(name="repo1"), Repo(name="repo2")],
+                checks=CheckContext(),
+            ),
+        ),
+        patch.object(REPO_CHECKS, "run_checks", side_effect=CHECKS.run_checks),
+    ):
+        try:
+            CheckAction().run(repo=None)
+        except SystemExit:
+            pass
+
+
+def test_record_check_runs(capsys: pytest.CaptureFixture) -> None:
+    """Test fleet runs are recorded and failing checks are queried."""
+    run_fleet()
+    FAILING.add("repo1")
+    try:
+        run_fleet()
+        run_fleet()
+    finally:
+        FAILING.clear()
+
+    store = HistoryStore()
+    runs = store.runs()
+    assert [(run.repos, run.checks, run.failed) for run in runs] == [
+        (2, 4, 2),
+        (2, 4, 2),
+        (2, 4, 0),
+    ]
+    assert all(run.finished for run in runs)
+
+    failing = store.failing()
+    assert [(status.repo, status.check) for status in failing] == [
+        ("repo1", "worktree"),
+        ("repo1", "worktree/cruft"),
+    ]
+    # Failing since the first of the two failed runs
+    first_failure = min(
+        started
+        for (started,) in store._conn.execute(
+            "SELECT started FROM results WHERE passed = 0 AND check_name = ?",
+            ("worktree/cruft",),
+        )
+    )
+    assert failing[1].since == first_failure
+    assert failing[1].upstream_sha == "abc1234def5678"
+    assert failing[1].details == ["out of date"]
+    assert store.failing(repo="repo2") == []
+    assert len(store.failing(check="worktree/cruft")) == 1
+    store.close()
+
+    HistoryAction().run(check="worktree/cruft")
+    assert capsys.readouterr().out.splitlines()[-2:] == [
+        "repo1 worktree/cruft: failing for 0s (upstream abc1234def56)",
+        "  out of date",
+    ]
+
+
+def test_regressions() -> None:
+    """Test regressions are checks that passed at the start of the window."""
+    store = HistoryStore()
+    run_id = store.start_run("check", {})
+    for repo, check, started, failures in (
+        ("repo1", "cruft", 100.0, []),
+        ("repo1", "cruft", 300.0, [Failure("out of date", ["repo1"])]),
+        ("repo2", "cruft", 100.0, [Failure("out of date", ["repo2"])]),
+        ("repo2", "cruft", 300.0, [Failure("out of date", ["repo2"])]),
+        ("repo3", "cruft", 100.0, []),
+        ("repo3", "cruft", 300.0, []),
+    ):
+        store.record(run_id, CheckRun(repo, check, started, failures=failures))
+    store.finish_run(run_id)
+
+    assert [status.repo for status in store.failing()] == ["repo1", "repo2"]
+    assert [status.repo for status in store.regressions(200.0)] == ["repo1"]
+    assert store.regressions(50.0) == []
+    assert store.failing()[1].since == 100.0
+    store.close()
+
+
+def test_parse_since() -> None:
+    """Test parsing the start of a query window."""
+    assert parse_since("2024-01-31") < parse_since("2w") < parse_since("1d")
+    assert parse_since("12h") < parse_since("30m")
+    with pytest.raises(ValueError, match="Invalid --since"):
+        parse_since("yesterday")
+    assert format_duration(3 * 86400 + 5) == "3d"
+    assert format_duration(90) == "1m"
+
+
+def test_longest_first() -> None:
+    """Test repos are ordered by the recent mean duration of their checks."""
+    store = HistoryStore()
+    for durations in ({"repo1": 1.0, "repo2": 9.0}, {"repo1": 3.0, "repo2": 1.0}):
+        run_id = store.start_run("check", {})
+        for repo, duration in durations.items():
+            store.record(run_id, CheckRun(repo, "worktree", 0.0, duration=duration))
+            store.record(run_id, CheckRun(repo, "github", 0.0, duration=1.0))
+            # Nested checks are part of the duration of the check running them
+            store.record(run_id, CheckRun(repo, "worktree/cruft", 0.0, duration=5.0))
+        store.finish_run(run_id)
+    # A run limited to one check does not lower the estimates of the others
+    run_id = store.start_run("check", {})
+    store.record(run_id, CheckRun("repo2", "github", 1.0, duration=2.0))
+    store.finish_run(run_id)
+
+    durations = store.durations()
+    assert durations == {
+        ("repo1", "github"): 1.0,
+        ("repo1", "worktree"): 2.0,
+        ("repo2", "github"): 4.0 / 3,
+        ("repo2", "worktree"): 5.0,
+    }
+    assert store.durations(runs=1)[("repo2", "worktree")] == 1.0
+    store.close()
+
+    repos = [Repo(name=name) for name in ("repo1", "new1", "repo2", "new2")]
+    ordered = longest_first(repos, durations)
+    assert [target.name for target in ordered] == ["repo2", "new1", "new2", "repo1"]
+    # Only the checks that will run count towards the expected duration
+    ordered = longest_first(repos, durations, {"repo2": ["github"]})
+    assert [target.name for target in ordered][-1] == "repo2"
+    assert longest_first(repos, {}) == repos
@@ -0,0 +1,81 @@
+"""Tests for resuming interrupted runs from a journal."""
+
+from unittest.mock import patch
+
+import pytest
+
+from repo_conformance.check import CheckAction
+from repo_conformance.checks.registries import REPO_CHECKS
+from repo_conformance.exceptions import Failure
+from repo_conformance.journal import Journal, JournalEntry
+from repo_conformance.manifest import CheckContext, Manifest, Repo
+
+
+def test_resume_journal() -> None:
+    """Test only a journal from a matching, unfinished run is resumed."""
+    journal = Journal("test", {"repo": None})
+    journal.record("repo1", JournalEntry("updated", url="https://pr/1"))
+    journal.record("repo2", JournalEntry("failed", failures=[Failure("bad", ["c"])]))
+
+    journal = Journal("test", {"repo": None}, resume=True)
+    assert journal.get("repo1") == JournalEntry("updated", url="https://pr/1")
+    assert journal.get("repo2") == JournalEntry(
+        "failed", failures=[Failure("bad", ["c"])]
+    )
+    assert journal.get("repo3") is None
+
+    assert Journal("test", {"repo": "repo1"}, resume=True).get("repo1") is None
+    assert Journal("test", {"repo": None}, resume=True).get("repo1") is None
+
+
+def test_completed_and_disabled_journal() -> None:
+    """Test a completed run starts over and a disabled journal keeps progress."""
+    journal = Journal("test", {})
+    journal.record("repo1", JournalEntry("updated"))
+    Journal("test", {}, enabled=False).record("repo2", JournalEntry("updated"))
+    journal = Journal("test", {}, resume=True)
+    assert journal.get("repo1") is not None
+    assert journal.get("repo2") is None
+
+    journal.complete()
+    assert Journal("test", {}, resume=True).get("repo1") is None
+
+
+def test_check_resume(capsys: pytest.CaptureFixture) -> None:
+    """Test an interrupted check only reruns the unfinished repos."""
+    repos = [Repo(name=f"repo{i}", user="allenporter") for i in range(3)]
+    manifest = Manifest(user="allenporter", repos=repos, checks=CheckContext())
+    checked: list[str] = []
+
+    def run_checks(
+        repo: Repo, context: None, only: list[str] | None = None
+    ) -> list[Failure]:
+        checked.append(repo.name)
+        if repo.name == "repo2" and interrupt:
+            raise KeyboardInterrupt
+        return [Failure("not conformant", ["cruft"])] if repo.name == "repo1" else []
+
+    with (
+        patch("repo_conformance.check.parse_manifest", return_value=manifest),
+        patch("repo_conformance.check.MAX_WORKERS", 1),
+        patch.object(REPO_CHECKS, "run_checks", side_effect=run_checks),
+    ):
+        interrupt = True
+        with pytest.raises(KeyboardInterrupt):
+            CheckAction().run(repo=None)
+        assert checked == ["repo0", "repo1", "repo2"]
+
+        interrupt = False
+        checked.clear()
+        with pytest.raises(SystemExit):
+            CheckAction().run(repo=None, resume=True)
+        assert checked == ["repo2"]
+        captured = capsys.readouterr()
+        assert "Resuming: 2 repos already checked" in captured.err
+        assert "repo1:\n  cruft: not conformant" in captured.out
+
+        # The previous run completed, so every repo is checked again
+        checked.clear()
+        with pytest.raises(SystemExit):
+            CheckAction().run(repo=None, resume=True)
+        assert checked == ["repo0", "repo1", "repo2"]
@@ -0,0 +1,122 @@
+"""Tests for the concurrent merge scheduler."""
+
+import threading
+
+from repo_conformance.merge_scheduler import (
+    MergeRequest,
+    MergeResult,
+    MergeScheduler,
+    MergeStatus,
+)
+from repo_conformance.pr_record import PullRequest
+
+
+class FakeMergeClient:
+    """Fake client recording merges and returning scripted mergeability."""
+
+    def __init__(
+        self,
+        mergeable: dict[int, list[tuple[str, str]]] | None = None,
+        failures: set[int] | None = None,
+    ) -> None:
+        self.mergeable = mergeable or {}
+        self.failures = failures or set()
+        self.merged: list[tuple[str, int]] = []
+        self.auto_merged: list[tuple[str, int]] = []
+        self.checks: list[int] = []
+        self.threads: dict[str, set[str]] = {}
+        self.barrier = threading.Barrier(2, timeout=5)
+        self.wait_for: set[str] = set()
+
+    def merge_pr(self, repo_fullname: str, pr_number: int) -> tuple[bool, str]:
+        self.threads.setdefault(repo_fullname, set()).add(
+            threading.current_thread().name
+        )
+        if repo_fullname in self.wait_for:
+            # Both repos must merge at the same time to pass the barrier
+            self.barrier.wait()
+        if pr_number in self.failures:
+            return False, "Pull Request is not mergeable"
+        self.merged.append((repo_fullname, pr_number))
+        return True, ""
+
+    def get_pr_mergeable(self, repo_fullname: str, pr_number: int) -> tuple[str, str]:
+        self.checks.append(pr_number)
+        states = self.mergeable.get(pr_number, [("MERGEABLE", "CLEAN")])
+        return states.pop(0) if len(states) > 1 else states[0]
+
+    def enable_auto_merge(self, repo_fullname: str, pr_number: int) -> tuple[bool, str]:
+        self.auto_merged.append((repo_fullname, pr_number))
+        return True, ""
+
+
+def merge_request(fullname: str, number: int, auto: bool = False) -> MergeRequest:
+    pr = PullRequest.from_dict({"number": number, "title": f"PR {number}"})
+    return MergeRequest(fullname.split("/")[1], fullname, pr, auto=auto)
+
+
+def statuses(results: list[MergeResult]) -> dict[int, MergeStatus]:
+    return {result.request.pr.number: result.status for result in results}
+
+
+def test_merges_repos_concurrently_and_prs_serially() -> None:
+    """Test repos merge in parallel while PRs in a repo merge in order."""
+    client = FakeMergeClient()
+    client.wait_for = {"user/repo1", "user/repo2"}
+    requests = [merge_request("user/repo1", 1), merge_request("user/repo2", 2)]
+    reported: list[MergeResult] = []
+    results = MergeScheduler(client).run(requests, reported.append)
+    assert statuses(results) == {1: MergeStatus.MERGED, 2: MergeStatus.MERGED}
+    assert len(reported) == 2
+
+    client = FakeMergeClient()
+    requests = [merge_request("user/repo1", n) for n in (1, 2, 3)]
+    results = MergeScheduler(client, recheck_delay=0).run(requests)
+    assert client.merged == [("user/repo1", 1), ("user/repo1", 2), ("user/repo1", 3)]
+    assert len(client.threads["user/repo1"]) == 1
+    # Mergeability is only re-checked after the base branch moved
+    assert client.checks == [2, 3]
+
+
+def test_skips_conflicts_after_earlier_merge() -> None:
+    """Test a PR that conflicts with an earlier merge is skipped."""
+    client = FakeMergeClient(
+        mergeable={2: [("UNKNOWN", "UNKNOWN"), ("CONFLICTING", "DIRTY")]}
+    )
+    requests = [merge_request("user/repo", n) for n in (1, 2, 3)]
+    results = MergeScheduler(client, recheck_delay=0).run(requests)
+    assert statuses(results) == {
+        1: MergeStatus.MERGED,
+        2: MergeStatus.SKIPPED,
+        3: MergeStatus.MERGED,
+    }
+    assert client.checks == [2, 2, 3]
+
+
+def test_auto_merge_fallback() -> None:
+    """Test auto-merge is enabled for PRs that cannot be merged yet."""
+    client = FakeMergeClient(mergeable={2: [("MERGEABLE", "BLOCKED")]}, failures={3})
+    requests = [
+        merge_request("user/repo", 1),
+        merge_request("user/repo", 2),
+        merge_request("user/repo", 3),
+        merge_request("user/other", 4, auto=True),
+    ]
+    results = MergeScheduler(client, auto_merge=True, recheck_delay=0).run(requests)
+    assert statuses(results) == {
+        1: MergeStatus.MERGED,
+        2: MergeStatus.AUTO_MERGE,
+        3: MergeStatus.AUTO_MERGE,
+        4: MergeStatus.AUTO_MERGE,
+    }
+    assert sorted(client.auto_merged) == [
+        ("user/other", 4),
+        ("user/repo", 2),
+        ("user/repo", 3),
+    ]
+
+    # Without auto-merge a failed merge is reported
+    client = FakeMergeClient(failures={1})
+    results = MergeScheduler(client).run([merge_request("user/repo", 1)])
+    assert results[0].status == MergeStatus.FAILED
+    assert results[0].message == "Pull Request is not mergeable"
@@ -0,0 +1,101 @@
+"""Tests for the pull request cache keyed by head commit."""
+
+from unittest.mock import patch
+
+from repo_conformance.manifest import Manifest, Repo
+from repo_conformance.pr_cache import CHECKS, DIFF_FILES, PrCache
+from repo_conformance.pr_record import checks_complete
+from repo_conformance.prs import PrsAction
+
+from .test_prs import MOCK_PRS_PAYLOAD, FakeGitHubClient
+
+
+class CountingGitHubClient(FakeGitHubClient):
+    """Fake client that records calls for changed files and checks."""
+
+    def __init__(self, prs_by_repo: dict[str, list[dict]]) -> None:
+        super().__init__(prs_by_repo)
+        self.calls: list[tuple[str, int]] = []
+
+    def get_pr_diff_files(self, repo_fullname: str, pr_number: int) -> list[str]:
+        self.calls.append((DIFF_FILES, pr_number))
+        return super().get_pr_diff_files(repo_fullname, pr_number)
+
+    def get_pr_checks(
+        self, repo_fullname: str, pr_number: int, head_sha: str = ""
+    ) -> list[dict[str, str]]:
+        self.calls.append((CHECKS, pr_number))
+        return super().get_pr_checks(repo_fullname, pr_number, head_sha)
+
+
+def test_lru_eviction() -> None:
+    """Test the least recently used commits are evicted."""
+    cache = PrCache(max_entries=2)
+    cache.put("user/repo", "sha1", DIFF_FILES, ["a"])
+    cache.put("user/repo", "sha2", DIFF_FILES, ["b"])
+    assert cache.get("user/repo", "sha1", DIFF_FILES) == ["a"]
+    cache.put("user/repo", "sha3", DIFF_FILES, ["c"])
+    assert cache.get("user/repo", "sha2", DIFF_FILES) is None
+
+    # Reloaded from the state directory
+    cache = PrCache(max_entries=2)
+    assert cache.get("user/repo", "sha1", DIFF_FILES) == ["a"]
+    assert cache.get("user/repo", "sha3", DIFF_FILES) == ["c"]
+
+
+def test_fetch_skips_uncacheable_results() -> None:
+    """Test pending, empty and unknown commit results are not cached."""
+    cache = PrCache()
+    calls = []
+
+    def fetch() -> str:
+        calls.append(1)
+        return "pending"
+
+    cache.fetch("user/repo", "sha1", CHECKS, fetch, cacheable=False)
+    cache.fetch("user/repo", "", CHECKS, fetch)
+    cache.fetch("user/repo", "sha2", CHECKS, lambda: "")
+    assert cache.get("user/repo", "sha1", CHECKS) is None
+    assert cache.get("user/repo", "sha2", CHECKS) is None
+    assert len(calls) == 2
+
+    cache.fetch("user/repo", "sha1", CHECKS, fetch)
+    cache.fetch("user/repo", "sha1", CHECKS, fetch)
+    assert len(calls) == 3
+
+
+def test_prs_reuses_results_for_unchanged_commits() -> None:
+    """Test a second run makes no calls for PRs that were not pushed to."""
+    payload = [{**pr, "headRefOid": f"sha{pr['number']}"} for pr in MOCK_PRS_PAYLOAD]
+    manifest = Manifest(user="allenporter", repos=[Repo(name="test-repo")])
+    client = CountingGitHubClient({"allenporter/test-repo": payload})
+    with patch("repo_conformance.prs.parse_manifest", return_value=manifest):
+        PrsAction().run(repo=None, cruft=True, checks=True, client=client)
+        assert sorted(client.calls) == [
+            (CHECKS, 301),
+            (CHECKS, 302),
+            (DIFF_FILES, 301),
+            (DIFF_FILES, 302),
+        ]
+        client.calls.clear()
+        PrsAction().run(repo=None, cruft=True, checks=True, client=client)
+        assert client.calls == []
+
+        client.calls.clear()
+        PrsAction().run(repo=None, cruft=True, checks=True, cache=False, client=client)
+        assert len(client.calls) == 4
+
+
+def test_fetch_skips_incomplete_checks() -> None:
+    """Test checks are not cached while any check is still running."""
+    cache = PrCache()
+    checks = [
+        {"name": "lint", "bucket": "fail", "link": ""},
+        {"name": "test", "bucket": "pending", "link": ""},
+    ]
+    cache.fetch("user/repo", "sha1", CHECKS, lambda: checks, cacheable=checks_complete)
+    assert cache.get("user/repo", "sha1", CHECKS) is None
+
+    checks[1]["bucket"] = "pass"
+    cache.fetch("user/repo", "sha1", CHECKS, lambda: checks, cacheable=checks_complete)
+    assert cache.get("user/repo", "sha1", CHECKS) == checks
@@ -0,0 +1,99 @@
+"""Tests for the pull request classification rules."""
+
+import pytest
+
+from repo_conformance.exceptions import ManifestError
+from repo_conformance.manifest import PrRules
+from repo_conformance.pr_rules import (
+    BODY_SCAN_LIMIT,
+    DependencyUpdate,
+    RuleEngine,
+)
+
+RENOVATE_BODY = """This PR contains the following updates:
+
+| Package | Change | Age | Confidence |
+|---|---|---|---|
+| [pytest](https://docs.pytest.org) ([source](https://github.com/pytest-dev/pytest)) | `7.4.0` -> `8.0.0` | [![age](https://example)](https://example) | |
+| `ruff` | `v0.8.0` -> `v0.9.0` | | |
+
+---
+
+### Release Notes
+
+Fixes a security vulnerability in an unrelated dependency.
+"""
+
+
+def test_renovate_table_updates() -> None:
+    """Test package updates are read from the Renovate table."""
+    rules = RuleEngine()
+    assert rules.updates(RENOVATE_BODY) == [
+        DependencyUpdate("pytest", "7.4.0", "8.0.0"),
+        DependencyUpdate("ruff", "0.8.0", "0.9.0"),
+    ]
+    assert rules.is_major("Update all dependencies", RENOVATE_BODY)
+    assert not rules.is_major(
+        "Update dependency ruff", RENOVATE_BODY.replace("`8.0.0`", "`7.5.0`")
+    )
+
+
+def test_renovate_table_bounds_scan() -> None:
+    """Test text after the Renovate table is not scanned."""
+    rules = RuleEngine()
+    assert rules.excerpt(RENOVATE_BODY).endswith(
+        "| `ruff` | `v0.8.0` -> `v0.9.0` | | |\n"
+    )
+    assert not rules.is_security("Update all dependencies", RENOVATE_BODY)
+
+
+def test_body_prefix_bounds_scan() -> None:
+    """Test only a prefix of a long body is scanned."""
+    rules = RuleEngine()
+    body = "x" * BODY_SCAN_LIMIT + "\nFixes CVE-2024-0001"
+    assert not rules.is_security("Update dependency foo", body)
+    assert rules.is_security("Update dependency foo", body[BODY_SCAN_LIMIT:])
+    assert rules.is_security("[SECURITY] Update dependency foo", body)
+
+
+def test_dependency_updates() -> None:
+    """Test package updates are read from Renovate and Dependabot PRs."""
+    rules = RuleEngine()
+    assert rules.dependency_updates("Update all dependencies", RENOVATE_BODY) == (
+        DependencyUpdate("pytest", "7.4.0", "8.0.0"),
+        DependencyUpdate("ruff", "0.8.0", "0.9.0"),
+    )
+    assert rules.dependency_updates("Bump pytest from 8.3.0 to 8.4.0 in /docs") == (
+        DependencyUpdate("pytest", "8.3.0", "8.4.0"),
+    )
+    assert rules.dependency_updates(
+        "Update dependency foo", "Bumps [foo](https://example) from 1.10.0 to 2.0.0."
+    ) == (DependencyUpdate("foo", "1.10.0", "2.0.0"),)
+    assert rules.dependency_updates(
+        "chore(deps): update module github.com/foo/bar to v2"
+    ) == (DependencyUpdate("github.com/foo/bar", "", "2"),)
+    assert rules.dependency_updates("Update all non-major dependencies") == ()
+
+
+def test_configured_rules() -> None:
+    """Test rules extended from the manifest."""
+    rules = RuleEngine.from_config(
+        PrRules(
+            security_keywords=["GHSA-"],
+            major_patterns=[r"\bbreaking change\b"],
+            trusted_bots=["pre-commit-ci"],
+        )
+    )
+    assert rules.is_security("Update foo", "See GHSA-xxxx-yyyy")
+    assert rules.is_security("Fix security issue")
+    assert rules.is_major("Update foo", "This is a Breaking Change")
+    assert rules.is_trusted_bot("pre-commit-ci[bot]")
+    assert rules.is_trusted_bot("renovate[bot]")
+    assert not rules.is_trusted_bot("someone")
+    assert not RuleEngine().is_trusted_bot("pre-commit-ci[bot]")
+
+
+def test_invalid_major_pattern() -> None:
+    """Test an invalid pattern in the manifest is reported."""
+    with pytest.raises(ManifestError, match="Invalid major version pattern"):
+        RuleEngine(major_patterns=["("])
@@ -1,15 +1,26 @@
 """Tests for PR status logic, SemVer boundary guard, security update detection, and filtering strictness using Fakes."""
 
+import json
+import time
 from unittest.mock import MagicMock, patch
 
 import pytest
 
 from repo_conformance.manifest import Manifest, Repo
+from repo_conformance.pr_cache import PrCache
+from repo_conformance.pr_record import (
+    CiState,
+    PullRequest,
+    is_major_version_bump,
+    is_security_update,
+)
+from repo_conformance.pr_rules import RuleEngine
 from repo_conformance.prs import (
+    DETAIL_FIELDS,
     GitHubClient,
+    PrFilter,
     PrsAction,
-    is_major_version_bump,
-    is_security_update,
+    collect_prs,
 )
 
 
@@ -33,13 +44,21 @@ class FakeGitHubClient(GitHubClient):
                 return pr.get("mock_diff_files", [])
         return []
 
-    def get_pr_checks(self, repo_fullname: str, pr_number: int) -> str:
-        return "All checks passed"
+    def get_pr_checks(
+        self, repo_fullname: str, pr_number: int, head_sha: str = ""
+    ) -> list[dict[str, str]]:
+        return [{"name": "test", "bucket": "pass", "link": ""}]
 
     def merge_pr(self, repo_fullname: str, pr_number: int) -> tuple[bool, str]:
         self.merged_prs.append((repo_fullname, pr_number))
         return True, ""
 
+    def get_pr_mergeable(self, repo_fullname: str, pr_number: int) -> tuple[str, str]:
+        return "MERGEABLE", "CLEAN"
+
+    def enable_auto_merge(self, repo_fullname: str, pr_number: int) -> tuple[bool, str]:
+        return True, ""
+
 
 def test_is_major_version_bump_titles() -> None:
     """Test detecting major version bumps from PR titles and bodies."""
@@ -164,6 +183,26 @@ MOCK_PRS_PAYLOAD = [
 ]
 
 
+def test_pull_request_record() -> None:
+    """Test that classifications are computed once when parsing a PR."""
+    renovate, major, feature, _, cruft, cruft_rej = (
+        PullRequest.from_dict(pr) for pr in MOCK_PRS_PAYLOAD
+    )
+    assert renovate.is_renovate
+    assert renovate.is_maintenance
+    assert renovate.ci == CiState.PASSED
+    assert not renovate.is_major
+    assert major.is_major
+    assert not feature.is_maintenance
+    assert cruft.is_cruft
+    assert cruft.is_valid_cruft("allenporter")
+    assert not cruft.is_valid_cruft("someone-else")
+    assert cruft_rej.is_cruft
+    assert not cruft_rej.has_rej_files
+    assert PullRequest.from_dict({"number": 1}).ci == CiState.NONE
+    assert CiState.FAILED.label(color=False) == "🔴 FAILED"
+
+
 @patch("repo_conformance.prs.parse_manifest")
 def test_prs_renovate_filter_strictly_excludes_self_authored_and_cruft_with_fake(
     mock_parse_manifest: MagicMock,
@@ -234,6 +273,88 @@ def test_prs_renovate_actual_merge_execution_with_fake(
     assert fake_client.merged_prs == [("allenporter/test-repo", 101)]
 
 
+@patch("repo_conformance.prs.parse_manifest")
+def test_prs_auto_merge_pending_renovate_with_fake(
+    mock_parse_manifest: MagicMock,
+) -> None:
+    """Test --auto-merge enables auto-merge for PRs with checks still running."""
+    mock_parse_manifest.return_value = Manifest(
+        user="allenporter", repos=[Repo(name="test-repo", user="allenporter")]
+    )
+    pending = {
+        **MOCK_PRS_PAYLOAD[0],
+        "number": 103,
+        "statusCheckRollup": [{"status": "IN_PROGRESS", "conclusion": ""}],
+    }
+    fake_client = FakeGitHubClient(
+        {"allenporter/test-repo": [*MOCK_PRS_PAYLOAD, pending]}
+    )
+    auto_merged = []
+    fake_client.enable_auto_merge = lambda fullname, number: (  # type: ignore[method-assign]
+        auto_merged.append(number) or (True, "")
+    )
+
+    PrsAction().run(repo=None, renovate=True, merge=True, yes=True, client=fake_client)
+    assert fake_client.merged_prs == [("allenporter/test-repo", 101)]
+    assert auto_merged == []
+
+    fake_client.merged_prs.clear()
+    PrsAction().run(
+        repo=None,
+        renovate=True,
+        merge=True,
+        auto_merge=True,
+        yes=True,
+        client=fake_client,
+    )
+    assert fake_client.merged_prs == [("allenporter/test-repo", 101)]
+    assert auto_merged == [103]
+
+
+@patch("repo_conformance.prs.parse_manifest")
+def test_prs_missing_details_never_ready(mock_parse_manifest: MagicMock) -> None:
+    """Test a PR whose body and checks could not be fetched is not merged."""
+    mock_parse_manifest.return_value = Manifest(
+        user="allenporter", repos=[Repo(name="test-repo", user="allenporter")]
+    )
+    listed = [
+        {k: v for k, v in pr.items() if k not in DETAIL_FIELDS}
+        for pr in MOCK_PRS_PAYLOAD
+    ]
+    fake_client = FakeGitHubClient({"allenporter/test-repo": listed})
+    fake_client.get_pr_details = lambda fullname, numbers: {}  # type: ignore[method-assign]
+    auto_merged = []
+    fake_client.enable_auto_merge = lambda fullname, number: (  # type: ignore[method-assign]
+        auto_merged.append(number) or (True, "")
+    )
+
+    groups = collect_prs(
+        fake_client,
+        PrCache(enabled=False),
+        RuleEngine(),
+        PrFilter(manifest_user="allenporter", renovate=True),
+        False,
+        "allenporter/test-repo",
+    )
+    assert groups
+    assert not groups["ready"]
+    assert [(pr.number, pr.ci) for pr in groups["pending"]] == [
+        (101, CiState.UNKNOWN),
+        (102, CiState.UNKNOWN),
+    ]
+
+    PrsAction().run(
+        repo=None,
+        renovate=True,
+        merge=True,
+        auto_merge=True,
+        yes=True,
+        client=fake_client,
+    )
+    assert fake_client.merged_prs == []
+    assert auto_merged == []
+
+
 @patch("repo_conformance.prs.parse_manifest")
 def test_prs_cruft_filter_accepts_valid_and_rejects_rej_files(
     mock_parse_manifest: MagicMock,
@@ -319,3 +440,129 @@ def test_prs_renovate_allow_major_includes_major_bump_with_fake(
     # Self-authored PRs MUST STILL BE EXCLUDED
     assert ("allenporter/test-repo", 201) not in fake_client.merged_prs
     assert ("allenporter/test-repo", 202) not in fake_client.merged_prs
+
+
+@pytest.mark.parametrize("output_format", ["json", "ndjson"])
+@patch("repo_conformance.prs.parse_manifest")
+def test_prs_json_output(
+    mock_parse_manifest: MagicMock,
+    output_format: str,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """Test the grouped PRs of each repo are written as JSON with a summary."""
+    mock_parse_manifest.return_value = Manifest(
+        user="allenporter",
+        repos=[Repo(name="test-repo"), Repo(name="empty"), Repo(name="other")],
+    )
+    fake_client = FakeGitHubClient(
+        {
+            "allenporter/test-repo": MOCK_PRS_PAYLOAD,
+            "allenporter/other": MOCK_PRS_PAYLOAD[:1],
+        }
+    )
+    PrsAction().run(
+        repo=None, renovate=True, output_format=output_format, client=fake_client
+    )
+    out = capsys.readouterr().out
+
+    if output_format == "ndjson":
+        *repos, summary = [json.loads(line) for line in out.splitlines()]
+        assert [record.pop("type") for record in repos] == ["repo", "repo"]
+        assert summary.pop("type") == "summary"
+    else:
+        document = json.loads(out)
+        repos, summary = document["repos"], document["summary"]
+
+    assert [record["repo"] for record in repos] == [
+        "allenporter/test-repo",
+        "allenporter/other",
+    ]
+    ready = repos[0]["ready"][0]
+    assert ready["number"] == 101
+    assert ready["ci"] == "passed"
+    assert ready["updates"] == [{"package": "ruff", "old": "0.8.0", "new": "0.9.0"}]
+    assert [pr["number"] for pr in repos[0]["pending"]] == [102]
+    assert summary == {"repos": 2, "prs": 3, "ready": 2, "pending": 1, "attention": 0}
+
+
+@patch("repo_conformance.prs.parse_manifest")
+def test_prs_json_output_no_repos(
+    mock_parse_manifest: MagicMock, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """Test a valid document is written when no repo has open PRs."""
+    mock_parse_manifest.return_value = Manifest(user="allenporter", repos=[])
+    PrsAction().run(repo=None, output_format="json", client=FakeGitHubClient())
+    assert json.loads(capsys.readouterr().out) == {
+        "repos": [],
+        "summary": {"repos": 0, "prs": 0, "ready": 0, "pending": 0, "attention": 0},
+    }
+
+
+class SlowChecksClient(FakeGitHubClient):
+    """Fake client where earlier PRs take longer to return their checks."""
+
+    def get_pr_checks(
+        self, repo_fullname: str, pr_number: int, head_sha: str = ""
+    ) -> list[dict[str, str]]:
+        time.sleep(0.01 * (302 - pr_number) / 100)
+        return [
+            {"name": "test", "bucket": "pass", "link": "https://test"},
+            {"name": "lint", "bucket": "fail", "link": f"https://lint/{pr_number}"},
+            {"name": "build", "bucket": "pending", "link": "https://build"},
+        ]
+
+
+@patch("repo_conformance.prs.parse_manifest")
+def test_prs_checks_ordered_with_failures_first(
+    mock_parse_manifest: MagicMock, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """Test checks are fetched concurrently and printed in a stable order."""
+    mock_parse_manifest.return_value = Manifest(
+        user="allenporter", repos=[Repo(name="test-repo")]
+    )
+    fake_client = SlowChecksClient({"allenporter/test-repo": MOCK_PRS_PAYLOAD})
+    PrsAction().run(repo=None, renovate=True, checks=True, client=fake_client)
+    out = capsys.readouterr().out
+    assert out.index("test-repo #101") < out.index("test-repo #102")
+    section = out[out.index("test-repo #101") : out.index("test-repo #102")]
+    assert "1 fail, 1 pending, 1 pass" in section
+    lines = [line.strip() for line in section.splitlines() if line.startswith("  ")]
+    assert [line.split()[1] for line in lines] == ["lint", "build", "test"]
+    assert lines[0].endswith("https://lint/101")
+    assert "https://test" not in section
+
+
+def test_gh_client_observes_rate_limit() -> None:
+    """Test the gh backend corrects the shared bucket from the real quota."""
+    graphql_output = (
+        "HTTP/2.0 200 OK\r\n"
+        "Content-Type: application/json\r\n"
+        "X-Ratelimit-Limit: 5000\r\n"
+        "X-Ratelimit-Remaining: 1234\r\n"
+        "X-Ratelimit-Reset: 1700000000\r\n"
+        "\r\n"
+        '{"data": {"repository": {"pr1": null}}}'
+    )
+    rate_limit_output = json.dumps(
+        {"rate": {"limit": 5000, "remaining": 4321, "reset": 1700000000}}
+    )
+
+    def run(args: list[str], **kwargs: object) -> MagicMock:
+        if args[:3] == ["gh", "api", "rate_limit"]:
+            return MagicMock(returncode=0, stdout=rate_limit_output, stderr="")
+        if args[:3] == ["gh", "api", "graphql"]:
+            assert "--include" in args
+            return MagicMock(returncode=0, stdout=graphql_output, stderr="")
+        return MagicMock(returncode=0, stdout="", stderr="")
+
+    with (
+        patch("subprocess.run", side_effect=run),
+        patch("repo_conformance.ratelimit.TokenBucket.observe") as observe,
+    ):
+        client = GitHubClient()
+        assert client.check_auth()
+        observe.assert_called_once_with(4321, 1700000000.0, 5000)
+
+        observe.reset_mock()
+        assert client.get_pr_details("user/repo", [1]) == {}
+        observe.assert_called_once_with(1234, 1700000000.0, 5000)
@@ -0,0 +1,137 @@
+"""Tests for watching pull requests with conditional requests."""
+
+import functools
+from typing import Any
+
+from repo_conformance.manifest import Manifest
+from repo_conformance.pr_cache import PrCache
+from repo_conformance.pr_rules import RuleEngine
+from repo_conformance.prs import PrFilter, RestGitHubClient, collect_prs
+from repo_conformance.prs_watch import PrWatcher
+
+from .fake_github_api import CHECK_RUN, PR_DETAILS_NODE, FakeApiServer, graphql_response
+
+REPO = "test-user/repo1"
+PULLS = f"/repos/{REPO}/pulls?state=open&per_page=100"
+CHECK_RUNS = f"/repos/{REPO}/commits/abc123/check-runs?per_page=100"
+
+
+class FakeClock:
+    """Clock advanced manually by tests."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def new_watcher(api_client: RestGitHubClient, clock: FakeClock) -> PrWatcher:
+    """Create a watcher classifying PRs like the prs action."""
+    manifest = Manifest(user="test-user")
+    classify = functools.partial(
+        collect_prs,
+        api_client,
+        PrCache(),
+        RuleEngine.from_config(manifest.prs),
+        PrFilter(manifest_user=manifest.user),
+        False,
+    )
+    return PrWatcher(
+        api_client.session,
+        classify,
+        [("repo1", REPO)],
+        min_interval=10,
+        max_interval=40,
+        clock=clock,
+    )
+
+
+def graphql_count(api_server: FakeApiServer) -> int:
+    return sum(1 for _, path, _ in api_server.requests if path == "/graphql")
+
+
+def test_watch_reclassifies_only_on_change(
+    api_server: FakeApiServer, api_client: RestGitHubClient
+) -> None:
+    """Test unchanged repos are not classified again and back off."""
+    api_server.routes[("GET", PULLS)] = (200, [{"number": 1}])
+    api_server.routes[("POST", "/graphql")] = graphql_response
+    clock = FakeClock()
+    watcher = new_watcher(api_client, clock)
+
+    assert watcher.poll()
+    ((name, _, groups),) = watcher.repos_data
+    assert name == "repo1"
+    assert [pr.number for pr in groups["ready"]] == [1]
+    assert graphql_count(api_server) == 2
+
+    # Not due yet
+    requests = len(api_server.requests)
+    clock.now = 5
+    assert not watcher.poll()
+    assert len(api_server.requests) == requests
+
+    # Unchanged, answered with 304 and the interval doubles
+    clock.now = 10
+    assert not watcher.poll()
+    assert api_server.requests[-1][1] == PULLS
+    assert graphql_count(api_server) == 2
+    requests = len(api_server.requests)
+    clock.now = 25
+    assert not watcher.poll()
+    assert len(api_server.requests) == requests
+
+    # A new PR is opened
+    clock.now = 30
+    api_server.routes[("GET", PULLS)] = (200, [{"number": 1}, {"number": 2}])
+    assert watcher.poll()
+    assert graphql_count(api_server) == 4
+
+
+def test_watch_pending_checks(
+    api_server: FakeApiServer, api_client: RestGitHubClient
+) -> None:
+    """Test the check runs of pending PRs are polled until they complete."""
+    pending = {**CHECK_RUN, "status": "IN_PROGRESS", "conclusion": None}
+    details = {
+        **PR_DETAILS_NODE,
+        "commits": {
+            "nodes": [
+                {"commit": {"statusCheckRollup": {"contexts": {"nodes": [pending]}}}}
+            ]
+        },
+    }
+
+    def respond(body: dict) -> tuple[int, Any]:
+        status, data = graphql_response(body)
+        if "pullRequests" in body["query"]:
+            pull_requests = data["data"]["repository"]["pullRequests"]
+            pull_requests["nodes"] = [
+                {**node, "headRefOid": "abc123"} for node in pull_requests["nodes"]
+            ]
+        else:
+            data = {"data": {"repository": {"pr1": details}}}
+        return status, data
+
+    api_server.routes[("GET", PULLS)] = (200, [{"number": 1}])
+    api_server.routes[("GET", CHECK_RUNS)] = (200, {"check_runs": [pending]})
+    api_server.routes[("POST", "/graphql")] = respond
+    clock = FakeClock()
+    watcher = new_watcher(api_client, clock)
+
+    assert watcher.poll()
+    assert [pr.number for pr in watcher.repos_data[0][2]["pending"]] == [1]
+
+    # First check poll records the etag, then unchanged checks are a 304
+    for now in (10, 20):
+        clock.now = now
+        assert not watcher.poll()
+        assert api_server.requests[-1][1] == CHECK_RUNS
+
+    # Checks complete
+    details["commits"] = PR_DETAILS_NODE["commits"]
+    api_server.routes[("GET", CHECK_RUNS)] = (200, {"check_runs": [CHECK_RUN]})
+    clock.now = 30
+    assert watcher.poll()
+    assert [pr.number for pr in watcher.repos_data[0][2]["ready"]] == [1]
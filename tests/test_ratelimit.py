@@ -0,0 +1,79 @@
+"""Tests for the token bucket shared between processes."""
+
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from repo_conformance import deadline
+from repo_conformance.deadline import Deadline
+from repo_conformance.exceptions import DeadlineExceeded
+from repo_conformance.ratelimit import TokenBucket, bucket
+
+LIMIT = 36000
+"""A quota that refills 10 tokens per second."""
+
+ACQUIRE_SCRIPT = """
+from repo_conformance.ratelimit import bucket
+for _ in range(40):
+    bucket().acquire()
+"""
+
+
+def tokens(state_dir: Path) -> float:
+    """Return the tokens stored in the only bucket in the state directory."""
+    (path,) = state_dir.glob("ratelimit-*.json")
+    return float(json.loads(path.read_text())["tokens"])
+
+
+def test_acquire_paces_calls(isolated_state_dir: Path) -> None:
+    """Test that calls wait for the bucket to refill once empty."""
+    limiter = TokenBucket("api.example.com", "token", LIMIT)
+    limiter.observe(remaining=2, reset=time.time() + 3600)
+
+    start = time.monotonic()
+    limiter.acquire()
+    limiter.acquire()
+    assert time.monotonic() - start < 0.05
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.05
+
+
+def test_exhausted_quota_waits_for_reset(isolated_state_dir: Path) -> None:
+    """Test that an exhausted quota waits until the reset time."""
+    limiter = TokenBucket("api.example.com", "token", LIMIT)
+    limiter.observe_headers(
+        {
+            "X-RateLimit-Remaining": "0",
+            "X-RateLimit-Reset": str(time.time() + 0.3),
+            "X-RateLimit-Limit": str(LIMIT),
+        }
+    )
+    start = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.25
+
+    limiter.observe(remaining=0, reset=time.time() + 60)
+    with (
+        deadline.scope(Deadline.after(0.1, "test deadline")),
+        pytest.raises(DeadlineExceeded),
+    ):
+        limiter.acquire()
+
+
+def test_bucket_shared_between_processes(isolated_state_dir: Path) -> None:
+    """Test that tokens taken by another process are seen by this one."""
+    limiter = bucket()
+    limiter.observe(remaining=100, reset=time.time() + 3600)
+    subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            ACQUIRE_SCRIPT,
+        ],
+        check=True,
+    )
+    assert tokens(isolated_state_dir) < 61
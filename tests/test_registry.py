@@ -0,0 +1,193 @@
+"""Tests for the conformance check registry."""
+
+import pytest
+
+from repo_conformance.cost import Cost
+from repo_conformance.exceptions import CheckError
+from repo_conformance.manifest import Repo
+from repo_conformance.registry import CheckRegistry
+
+
+def test_fixture_computed_once_per_target() -> None:
+    """Test that a fixture shared by several checks is only computed once."""
+    registry = CheckRegistry[str]()
+    calls: list[str] = []
+
+    @registry.fixture()
+    def metadata(repo: Repo, context: str) -> str:
+        calls.append(repo.name)
+        return f"{context}:{repo.name}"
+
+    @registry.fixture()
+    def upper_metadata(repo: Repo, context: str, metadata: str) -> str:
+        return metadata.upper()
+
+    @registry.register()
+    def first(repo: Repo, context: str, metadata: str) -> None:
+        raise CheckError(metadata)
+
+    @registry.register()
+    def second(repo: Repo, context: str, metadata: str, upper_metadata: str) -> None:
+        raise CheckError(upper_metadata)
+
+    errors = registry.run_checks(Repo(name="ical"), "ctx")
+    assert [(fail.names, fail.detail) for fail in errors] == [
+        (("first",), "ctx:ical"),
+        (("second",), "CTX:ICAL"),
+    ]
+    assert calls == ["ical"]
+
+    registry.run_checks(Repo(name="icaldav"), "ctx")
+    assert calls == ["ical", "icaldav"]
+
+
+def test_fixture_failure_reported_per_check() -> None:
+    """Test that a failing fixture fails each requesting check without retrying."""
+    registry = CheckRegistry[None]()
+    calls = 0
+
+    @registry.fixture()
+    def remote(repo: Repo, context: None) -> str:
+        nonlocal calls
+        calls += 1
+        raise CheckError("Remote unavailable")
+
+    @registry.register()
+    def first(repo: Repo, context: None, remote: str) -> None:
+        pass
+
+    @registry.register()
+    def second(repo: Repo, context: None, remote: str) -> None:
+        pass
+
+    @registry.register()
+    def local(repo: Repo, context: None) -> None:
+        pass
+
+    errors = registry.run_checks(Repo(name="ical"), None)
+    assert [(fail.names, fail.detail) for fail in errors] == [
+        (("first",), "Remote unavailable"),
+        (("second",), "Remote unavailable"),
+    ]
+    assert calls == 1
+
+
+def test_unknown_fixture() -> None:
+    """Test that requesting an unregistered fixture is a misconfiguration."""
+    registry = CheckRegistry[None]()
+
+    @registry.register()
+    def check(repo: Repo, context: None, missing: str) -> None:
+        pass
+
+    with pytest.raises(ValueError, match="unknown fixture 'missing'"):
+        registry.run_checks(Repo(name="ical"), None)
+
+
+def test_max_cost_and_network_estimate() -> None:
+    """Test that checks over the cost budget are skipped and not estimated."""
+    registry = CheckRegistry[None]()
+    nested = CheckRegistry[None]()
+    ran: list[str] = []
+
+    @nested.register(cost=Cost.REMOTE_CONTENT, network_calls=1)
+    def remote(repo: Repo, context: None) -> None:
+        ran.append("remote")
+
+    @registry.register(
+        cost=lambda repo: Cost.LOCAL if repo.worktree else Cost.REMOTE_CONTENT,
+        network_calls=lambda repo: 0 if repo.worktree else 1,
+        nested=nested,
+    )
+    def files(repo: Repo, context: None) -> None:
+        ran.append("files")
+        nested.run_checks(repo, None)
+
+    @registry.register(cost=Cost.API, network_calls=2)
+    def api(repo: Repo, context: None) -> None:
+        ran.append("api")
+
+    repo = Repo(name="ical")
+    assert registry.estimate_network_calls(repo) == 4
+
+    repo.checks.max_cost = Cost.REMOTE_CONTENT
+    assert registry.enabled_checks(repo) == ["files"]
+    assert registry.estimate_network_calls(repo) == 2
+
+    repo.worktree = "/tmp/ical"
+    repo.checks.max_cost = Cost.LOCAL
+    assert registry.estimate_network_calls(repo) == 0
+    assert registry.run_checks(repo, None) == []
+    assert ran == ["files"]
+
+    info = registry.describe(repo)
+    assert [(check.name, check.cost) for check in info] == [
+        ("files", Cost.LOCAL),
+        ("api", Cost.API),
+    ]
+    assert [child.name for child in info[0].children] == ["remote"]
+
+
+def test_rerun_checks() -> None:
+    """Test the checks needed to reproduce failures are selected."""
+    registry = CheckRegistry[None]()
+    nested = CheckRegistry[None]()
+
+    @nested.register()
+    def cruft(repo: Repo, context: None) -> None:
+        pass
+
+    @nested.register()
+    def license(repo: Repo, context: None) -> None:
+        pass
+
+    @registry.register(nested=nested)
+    def worktree(repo: Repo, context: None) -> None:
+        pass
+
+    @registry.register()
+    def github(repo: Repo, context: None) -> None:
+        pass
+
+    assert registry.rerun_checks([["worktree", "cruft"]]) == {"worktree", "cruft"}
+    assert registry.rerun_checks([["github"], ["worktree", "cruft"]]) == {
+        "github",
+        "worktree",
+        "cruft",
+    }
+    # A failure of the check itself reruns all nested checks
+    assert registry.rerun_checks([["worktree"]]) == {"worktree", "cruft", "license"}
+    assert registry.rerun_checks([["unknown"]]) is None
+
+
+def test_run_only_selected_checks() -> None:
+    """Test a selection of checks applies to nested registries."""
+    registry = CheckRegistry[None]()
+    nested = CheckRegistry[None]()
+    ran: list[str] = []
+
+    @nested.register()
+    def cruft(repo: Repo, context: None) -> None:
+        ran.append("cruft")
+
+    @nested.register()
+    def license(repo: Repo, context: None) -> None:
+        ran.append("license")
+
+    @registry.register(nested=nested)
+    def worktree(repo: Repo, context: None) -> None:
+        ran.append("worktree")
+        nested.run_checks(repo, None)
+
+    @registry.register()
+    def github(repo: Repo, context: None) -> None:
+        ran.append("github")
+
+    repo = Repo(name="ical")
+    registry.run_checks(repo, None, only=["worktree", "cruft"])
+    assert ran == ["worktree", "cruft"]
+
+    # The selection only applies to the run it was passed to
+    ran.clear()
+    registry.run_checks(repo, None)
+    assert ran == ["worktree", "cruft", "license", "github"]
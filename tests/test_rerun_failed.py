@@ -0,0 +1,96 @@
+"""Tests for rerunning the repos and checks that failed in the previous run."""
+
+from unittest.mock import patch
+
+import pytest
+
+from repo_conformance.check import CheckAction
+from repo_conformance.checks.registries import REPO_CHECKS
+from repo_conformance.exceptions import CheckError
+from repo_conformance.history_store import HistoryStore
+from repo_conformance.manifest import CheckContext, Manifest, Repo
+from repo_conformance.registry import CheckRegistry
+
+NESTED_CHECKS: CheckRegistry[None] = CheckRegistry()
+CHECKS: CheckRegistry[None] = CheckRegistry()
+FAILING: dict[str, set[str]] = {}
+RAN: list[tuple[str, str]] = []
+
+
+@NESTED_CHECKS.register()
+def cruft(repo: Repo, context: None) -> None:
+    RAN.append((repo.name, "cruft"))
+    if "cruft" in FAILING.get(repo.name, ()):
+        raise CheckError("out of date")
+
+
+@CHECKS.register()
+def github(repo: Repo, context: None) -> None:
+    RAN.append((repo.name, "github"))
+    if "github" in FAILING.get(repo.name, ()):
+        raise CheckError("settings differ")
+
+
+@CHECKS.register(nested=NESTED_CHECKS)
+def worktree(repo: Repo, context: None) -> None:
+    if errors := NESTED_CHECKS.run_checks(repo, context):
+        raise CheckError(errors)
+
+
+def run_fleet(**kwargs: object) -> list[tuple[str, str]]:
+    """Run the check action against three repos and return the checks run."""
+    RAN.clear()
+    with (
+        patch(
+            "repo_conformance.check.parse_manifest",
+            side_effect=lambda: Manifest(
+                user="allenporter",
+                repos=[Repo(name=f"repo{i}") for i in range(3)],
+                checks=CheckContext(),
+            ),
+        ),
+        patch.object(REPO_CHECKS, "run_checks", side_effect=CHECKS.run_checks),
+    ):
+        try:
+            CheckAction().run(repo=None, **kwargs)
+        except SystemExit:
+            pass
+    return sorted(RAN)
+
+
+def test_rerun_failed(capsys: pytest.CaptureFixture) -> None:
+    """Test only failed repos and checks run again and results are merged."""
+    FAILING.update({"repo1": {"cruft"}, "repo2": {"cruft", "github"}})
+    assert len(run_fleet()) == 6
+    assert HistoryStore().failed_checks() == {
+        "repo1": [("worktree", "cruft")],
+        "repo2": [("github",), ("worktree", "cruft")],
+    }
+
+    # A run of only some checks keeps the failures of the others
+    FAILING["repo2"].discard("github")
+    assert run_fleet(exclude=["worktree"]) == [
+        ("repo0", "github"),
+        ("repo1", "github"),
+        ("repo2", "github"),
+    ]
+    assert HistoryStore().failed_checks() == {
+        "repo1": [("worktree", "cruft")],
+        "repo2": [("worktree", "cruft")],
+    }
+
+    # repo2 is fixed
+    del FAILING["repo2"]
+    assert run_fleet(rerun_failed_checks=True) == [
+        ("repo1", "cruft"),
+        ("repo2", "cruft"),
+    ]
+    assert HistoryStore().failed_checks() == {"repo1": [("worktree", "cruft")]}
+
+    del FAILING["repo1"]
+    assert run_fleet(rerun_failed=True) == [("repo1", "cruft"), ("repo1", "github")]
+    assert HistoryStore().failed_checks() == {}
+
+    capsys.readouterr()
+    assert run_fleet(rerun_failed=True) == []
+    assert "No failures from the previous run" in capsys.readouterr().out
@@ -0,0 +1,181 @@
+"""Tests for coalescing concurrent identical calls."""
+
+import asyncio
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from repo_conformance.checks.cruft import get_latest_commit
+from repo_conformance.exceptions import DeadlineExceeded
+from repo_conformance.singleflight import SingleFlight, single_flight
+
+
+def test_concurrent_calls_coalesced() -> None:
+    """Test that concurrent callers for the same key share one call."""
+    calls = 0
+    barrier = threading.Barrier(5)
+
+    @single_flight
+    def lookup(key: str) -> str:
+        nonlocal calls
+        calls += 1
+        time.sleep(0.2)
+        return f"value-{key}"
+
+    def call(key: str) -> str:
+        barrier.wait()
+        return lookup(key)
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        results = list(executor.map(call, ["a", "a", "a", "a", "b"]))
+
+    assert results == ["value-a"] * 4 + ["value-b"]
+    assert calls == 2
+
+    # Nothing is remembered after the call completes
+    lookup("a")
+    assert calls == 3
+
+
+def test_concurrent_callers_share_error() -> None:
+    """Test that waiting callers receive the error of the in-flight call."""
+    group = SingleFlight[str]()
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail() -> str:
+        started.set()
+        release.wait()
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(group.do, "key", fail)
+        started.wait()
+        follower = executor.submit(group.do, "key", lambda: "unused")
+        time.sleep(0.05)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ValueError, match="boom"):
+                future.result()
+
+
+async def test_do_async_coalesced() -> None:
+    """Test that concurrent tasks for the same key share one call."""
+    group = SingleFlight[int]()
+    calls = 0
+
+    async def fetch() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return 42
+
+    results = await asyncio.gather(*(group.do_async("key", fetch) for _ in range(4)))
+    assert results == [42] * 4
+    assert calls == 1
+
+
+async def test_do_async_leader_cancelled() -> None:
+    """Test waiting tasks make the call again when only the leader is cancelled."""
+    group = SingleFlight[int]()
+    calls = 0
+
+    async def fetch() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.1)
+        return calls
+
+    leader = asyncio.create_task(group.do_async("key", fetch))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(group.do_async("key", fetch))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    assert await follower == 2
+
+    # A cancelled follower does not retry
+    leader = asyncio.create_task(group.do_async("key", fetch))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(group.do_async("key", fetch))
+    await asyncio.sleep(0.01)
+    follower.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await follower
+    assert await leader == 3
+
+
+def test_get_latest_commit_stampede() -> None:
+    """Test that concurrent cache misses launch a single git ls-remote."""
+    mock_res = subprocess.CompletedProcess(
+        args=[], returncode=0, stdout="abc123456789\trefs/heads/main\n"
+    )
+
+    def slow_run(*args: object, **kwargs: object) -> subprocess.CompletedProcess:
+        time.sleep(0.2)
+        return mock_res
+
+    with (
+        patch("subprocess.run", side_effect=slow_run) as mock_run,
+        ThreadPoolExecutor(max_workers=8) as executor,
+    ):
+        results = list(
+            executor.map(get_latest_commit, ["allenporter/stampede-template"] * 8)
+        )
+    assert results == ["abc123456789"] * 8
+    mock_run.assert_called_once()
+
+
+def test_leader_deadline_not_shared() -> None:
+    """Test callers retry when the call failed on the deadline of its caller."""
+    group = SingleFlight[str]()
+    started = threading.Event()
+    calls = 0
+
+    def lookup() -> str:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            started.set()
+            time.sleep(0.1)
+            raise DeadlineExceeded("Deadline exceeded (leader)")
+        return "value"
+
+    def follow() -> str:
+        started.wait()
+        return group.do("key", lookup)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(group.do, "key", lookup)
+        follower = executor.submit(follow)
+        with pytest.raises(DeadlineExceeded):
+            leader.result()
+        assert follower.result() == "value"
+    assert calls == 2
+
+
+def test_do_async_per_event_loop() -> None:
+    """Test calls are only shared by tasks of the same event loop."""
+    group = SingleFlight[int]()
+    calls = 0
+    barrier = threading.Barrier(2)
+
+    async def fetch() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.1)
+        return 42
+
+    async def run() -> list[int]:
+        barrier.wait()
+        return await asyncio.gather(*(group.do_async("key", fetch) for _ in range(3)))
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(lambda _: asyncio.run(run()), range(2)))
+    assert results == [[42] * 3] * 2
+    assert calls == 2
@@ -0,0 +1,83 @@
+"""Tests for recording a timeline of a run."""
+
+import json
+import pathlib
+from unittest.mock import patch
+
+import pytest
+
+from repo_conformance import tracing
+from repo_conformance.check import CheckAction
+from repo_conformance.checks.registries import REPO_CHECKS
+from repo_conformance.exceptions import CheckError
+from repo_conformance.manifest import CheckContext, Manifest, Repo
+from repo_conformance.registry import CheckRegistry
+
+CHECKS: CheckRegistry[None] = CheckRegistry()
+
+
+@CHECKS.register()
+def readme(repo: Repo, context: None) -> None:
+    with tracing.span("GET", "http", url=f"https://example.com/{repo.name}"):
+        if repo.name == "repo2":
+            raise CheckError("Missing README")
+
+
+def test_trace_check_run(tmp_path: pathlib.Path) -> None:
+    """Test spans from the worker threads are written as trace events."""
+    trace_file = tmp_path / "trace.json"
+    with (
+        patch(
+            "repo_conformance.check.parse_manifest",
+            return_value=Manifest(
+                user="allenporter",
+                repos=[Repo(name="repo1"), Repo(name="repo2")],
+                checks=CheckContext(),
+            ),
+        ),
+        patch.object(REPO_CHECKS, "run_checks", side_effect=CHECKS.run_checks),
+        pytest.raises(SystemExit),
+    ):
+        CheckAction().run(repo=None, history=False, trace=trace_file)
+
+    events = json.loads(trace_file.read_text())["traceEvents"]
+    spans = {
+        (event["cat"], event["name"], event["args"].get("repo"))
+        for event in events
+        if event["ph"] == "X"
+    }
+    assert spans == {
+        ("run", "run", None),
+        ("repo", "repo1", None),
+        ("repo", "repo2", None),
+        ("check", "readme", "repo1"),
+        ("check", "readme", "repo2"),
+        ("http", "GET", None),
+    }
+    (http_error,) = [
+        event for event in events if event["name"] == "GET" and "error" in event["args"]
+    ]
+    assert http_error["args"]["url"] == "https://example.com/repo2"
+    assert "Missing README" in http_error["args"]["error"]
+
+    # Each check runs within the span of its repo on the same thread
+    repo_span = next(event for event in events if event["name"] == "repo1")
+    check_span = next(
+        event
+        for event in events
+        if event["name"] == "readme" and event["args"]["repo"] == "repo1"
+    )
+    assert check_span["tid"] == repo_span["tid"]
+    assert repo_span["ts"] <= check_span["ts"]
+    assert check_span["ts"] + check_span["dur"] <= repo_span["ts"] + repo_span["dur"]
+    thread_names = {
+        event["tid"]: event["args"]["name"] for event in events if event["ph"] == "M"
+    }
+    assert repo_span["tid"] in thread_names
+
+
+def test_span_disabled() -> None:
+    """Test spans are a shared no-op when no trace is recorded."""
+    assert tracing.span("GET", "http") is tracing.span("git fetch", "git")
+    with tracing.trace_to(None), tracing.span("GET", "http"):
+        pass
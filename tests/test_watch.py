@@ -0,0 +1,64 @@
+"""Tests for watching a local worktree for changes."""
+
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+from repo_conformance.checks.registries import WORKTREE_CHECKS
+from repo_conformance.manifest import CheckContext, Repo
+from repo_conformance.watch import WorktreeWatcher, changed_paths, snapshot
+
+TEMPLATE = "https://github.com/allenporter/cookiecutter-python"
+
+
+def write_cruft(worktree: Path, commit: str) -> None:
+    """Write a .cruft.json file pointing at the given commit."""
+    (worktree / ".cruft.json").write_text(
+        json.dumps({"template": TEMPLATE, "commit": commit})
+    )
+
+
+def test_changed_paths(tmp_path: Path) -> None:
+    """Test detecting added, modified and removed files."""
+    (tmp_path / "a.txt").write_text("a")
+    (tmp_path / "b.txt").write_text("b")
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "HEAD").write_text("ref")
+    before = snapshot(tmp_path)
+    assert set(before) == {"a.txt", "b.txt"}
+
+    (tmp_path / "a.txt").write_text("changed")
+    (tmp_path / "b.txt").unlink()
+    (tmp_path / "c.txt").write_text("c")
+    assert changed_paths(before, snapshot(tmp_path)) == {"a.txt", "b.txt", "c.txt"}
+
+
+def test_dependent_checks() -> None:
+    """Test selecting checks by their declared file dependencies."""
+    assert "cruft" in WORKTREE_CHECKS.dependent_checks([".cruft.json"])
+    assert "cruft" not in WORKTREE_CHECKS.dependent_checks(["README.md"])
+
+
+def test_watcher_reruns_affected_checks(tmp_path: Path) -> None:
+    """Test that only checks reading the changed files are rerun."""
+    write_cruft(tmp_path, "abc1234")
+    repo = Repo(name="ical", user="allenporter", checks=CheckContext(include=["cruft"]))
+
+    with patch(
+        "repo_conformance.checks.cruft.get_latest_commit", return_value="def5678"
+    ) as mock_latest:
+        watcher = WorktreeWatcher(repo, tmp_path)
+        assert watcher.run_checks() == ["cruft"]
+        assert [fail.names for fail in watcher.failures] == [
+            ("ical", "worktree", "cruft")
+        ]
+        assert watcher.poll() is None
+
+        (tmp_path / "README.md").write_text("docs")
+        assert watcher.poll() == []
+        assert mock_latest.call_count == 1
+
+        write_cruft(tmp_path, "def5678")
+        assert watcher.poll() == ["cruft"]
+        assert mock_latest.call_count == 2
+        assert watcher.failures == []
@@ -0,0 +1,103 @@
+"""Tests for caching of local worktree check results."""
+
+import json
+import subprocess
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from repo_conformance.check import CheckAction
+from repo_conformance.manifest import CheckContext, Manifest, Repo
+from repo_conformance.worktree_cache import worktree_fingerprint
+
+TEMPLATE = "https://github.com/allenporter/cookiecutter-python"
+
+
+@pytest.fixture(name="git_worktree")
+def git_worktree_fixture(tmp_path: Path) -> Path:
+    """Create a git worktree with a committed .cruft.json."""
+    (tmp_path / ".cruft.json").write_text(
+        json.dumps({"template": TEMPLATE, "commit": "abc1234"})
+    )
+    for args in (
+        ["init", "-q"],
+        ["add", ".cruft.json"],
+        [
+            "-c",
+            "user.name=test",
+            "-c",
+            "user.email=test@example.com",
+            "commit",
+            "-qm",
+            "init",
+        ],
+    ):
+        subprocess.run(["git", "-C", str(tmp_path), *args], check=True)
+    return tmp_path
+
+
+def test_fingerprint_changes_with_worktree(git_worktree: Path) -> None:
+    """Test the fingerprint tracks dirty state and the check set."""
+    key = worktree_fingerprint(git_worktree, ["cruft"])
+    assert key
+    assert worktree_fingerprint(git_worktree, ["cruft"]) == key
+    assert worktree_fingerprint(git_worktree, ["cruft", "github"]) != key
+
+    (git_worktree / "README.md").write_text("untracked")
+    untracked_key = worktree_fingerprint(git_worktree, ["cruft"])
+    assert untracked_key != key
+
+    (git_worktree / "README.md").write_text("edited")
+    assert worktree_fingerprint(git_worktree, ["cruft"]) not in (key, untracked_key)
+
+
+def test_fingerprint_staged_rename(git_worktree: Path) -> None:
+    """Test the source path of a rename is not read as a status entry."""
+    subprocess.run(
+        ["git", "-C", str(git_worktree), "mv", ".cruft.json", "cruft.json"], check=True
+    )
+    # An ignored file whose name is the source path without its first 3 bytes
+    (git_worktree / ".git" / "info" / "exclude").write_text("uft.json\n")
+    (git_worktree / "uft.json").write_text("ignored")
+    key = worktree_fingerprint(git_worktree, ["cruft"])
+    assert key
+
+    (git_worktree / "uft.json").write_text("still ignored")
+    assert worktree_fingerprint(git_worktree, ["cruft"]) == key
+
+    (git_worktree / "cruft.json").write_text("edited")
+    assert worktree_fingerprint(git_worktree, ["cruft"]) != key
+
+
+def test_fingerprint_not_a_git_repo(tmp_path: Path) -> None:
+    """Test that plain directories are not cached."""
+    assert worktree_fingerprint(tmp_path, ["cruft"]) is None
+
+
+def test_check_action_replays_cached_results(git_worktree: Path) -> None:
+    """Test that an unchanged worktree does not rerun checks."""
+    repo = Repo(name="ical", user="allenporter", checks=CheckContext(include=["cruft"]))
+    fake_manifest = Manifest(user="allenporter", repos=[repo], checks=CheckContext())
+
+    with (
+        patch("repo_conformance.check.parse_manifest", return_value=fake_manifest),
+        patch(
+            "repo_conformance.checks.cruft.get_latest_commit",
+            return_value="def5678",
+        ) as mock_latest,
+    ):
+        for _ in range(2):
+            with pytest.raises(SystemExit):
+                CheckAction().run(repo="ical", worktree=git_worktree)
+        assert mock_latest.call_count == 1
+
+        with pytest.raises(SystemExit):
+            CheckAction().run(repo="ical", worktree=git_worktree, cache=False)
+        assert mock_latest.call_count == 2
+
+        (git_worktree / ".cruft.json").write_text(
+            json.dumps({"template": TEMPLATE, "commit": "def5678"})
+        )
+        CheckAction().run(repo="ical", worktree=git_worktree)
+        assert mock_latest.call_count == 3